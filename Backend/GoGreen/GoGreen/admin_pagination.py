@@ -0,0 +1,44 @@
+"""
+Changelist paginator for large admin tables.
+
+The admin changelist runs ``COUNT(*)`` on every page load, and on Postgres that
+reads the whole table. For an unfiltered changelist over a big table this
+paginator returns the planner's row estimate (``pg_class.reltuples``) instead.
+Filtered changelists, other databases and tables below
+``ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows keep the exact count.
+
+Use together with ``show_full_result_count = False`` so a filtered changelist
+does not run a second unfiltered ``COUNT(*)`` for the "N total" link.
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is not None:
+            return estimate
+        return super().count
+
+    def _estimated_count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is None or query.where or query.distinct:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(self.object_list.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0 on older servers) until the table is first analyzed.
+        if not row or row[0] < settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return None
+        return int(row[0])
@@ -0,0 +1,101 @@
+"""
+Signed, stateless API tokens.
+
+``login_user`` and ``verify_otp`` return a short-lived access token and a
+longer-lived refresh token. Both are ``django.core.signing`` strings: the
+compact JSON claims, a timestamp and an HMAC-SHA256 signature keyed by
+``SECRET_KEY`` (with a different salt per token kind, so one cannot stand in
+for the other).
+
+Protected views read the caller from ``Authorization: Bearer <access token>``
+with ``request_claims(request)``, which checks the signature and age only; no
+database query is made. The trade-off is that an access token stays valid
+until it expires (``AUTH_ACCESS_TOKEN_TTL``), so keep that short.
+
+``POST /api/users/token/refresh/`` is the one place that looks the user up
+again: the refresh token carries a fingerprint of the password hash, so a
+password change (or deactivating the account) stops further refreshes.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+ACCESS_SALT = "gogreen.auth.access"
+REFRESH_SALT = "gogreen.auth.refresh"
+
+TokenClaims = namedtuple("TokenClaims", ["user_id", "is_verified"])
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _password_fingerprint(user):
+    return salted_hmac(REFRESH_SALT, user.password or "").hexdigest()[:16]
+
+
+def issue_tokens(user):
+    """Return the token fields added to login/verify responses."""
+    claims = {"uid": user.pk, "ver": bool(user.is_verified)}
+    return {
+        "access_token": signing.dumps(claims, salt=ACCESS_SALT),
+        "refresh_token": signing.dumps(
+            {**claims, "pwd": _password_fingerprint(user)}, salt=REFRESH_SALT
+        ),
+        "token_type": "Bearer",
+        "expires_in": settings.AUTH_ACCESS_TOKEN_TTL,
+    }
+
+
+def read_access_token(token):
+    """Return ``TokenClaims`` for a valid access token; raises ``InvalidToken``."""
+    try:
+        claims = signing.loads(token, salt=ACCESS_SALT, max_age=settings.AUTH_ACCESS_TOKEN_TTL)
+    except signing.SignatureExpired:
+        raise InvalidToken("Token has expired")
+    except signing.BadSignature:
+        raise InvalidToken("Invalid token")
+    return TokenClaims(claims["uid"], claims["ver"])
+
+
+def read_refresh_token(token):
+    """Return the refresh claims dict (``uid``, ``ver``, ``pwd``); raises ``InvalidToken``."""
+    try:
+        return signing.loads(token, salt=REFRESH_SALT, max_age=settings.AUTH_REFRESH_TOKEN_TTL)
+    except signing.SignatureExpired:
+        raise InvalidToken("Refresh token has expired")
+    except signing.BadSignature:
+        raise InvalidToken("Invalid refresh token")
+
+
+def refresh_matches_user(claims, user):
+    """True if ``user`` may still use a refresh token carrying ``claims``."""
+    return (
+        user.is_active
+        and user.is_verified
+        and constant_time_compare(claims.get("pwd", ""), _password_fingerprint(user))
+    )
+
+
+def request_claims(request):
+    """
+    ``TokenClaims`` for a verified caller's bearer token, else ``None``.
+
+    The result is kept on the request, so a view and its conditional-GET
+    validator check the signature once.
+    """
+    if not hasattr(request, "_token_claims"):
+        claims = None
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token.strip():
+            try:
+                claims = read_access_token(token.strip())
+            except InvalidToken:
+                claims = None
+        if claims is not None and not claims.is_verified:
+            claims = None
+        request._token_claims = claims
+    return request._token_claims
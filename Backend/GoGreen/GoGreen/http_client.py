@@ -0,0 +1,285 @@
+"""
+Pooled HTTP clients for the upstream APIs we call (Razorpay and Mapbox).
+
+Each upstream gets one module-level ``UpstreamClient`` holding a keep-alive
+``requests.Session``, so a worker reuses TLS connections instead of opening a
+new one per request. On top of that the client adds:
+
+- short connect/read timeouts, so a slow upstream does not pin a sync worker;
+- bounded retries with full-jitter backoff. Idempotent methods retry on
+  connection errors, timeouts and 429/5xx responses. Other methods retry only
+  when the connection was never made;
+- a circuit breaker per upstream. Once the failure ratio over the recent calls
+  crosses the threshold, calls fail fast with ``CircuitOpenError`` until the
+  cooldown has passed and a single probe call succeeds;
+- a latency histogram per upstream, exposed by ``stats()``.
+
+``CircuitOpenError`` subclasses ``requests.RequestException``, so existing
+``except requests.RequestException`` handlers keep working.
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_CAP_SECONDS = 2.0
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds) safe to share between threads."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect_left(self.buckets_ms, elapsed_ms)] += 1
+            self._total_ms += elapsed_ms
+
+    def _percentile(self, counts, total, fraction):
+        threshold = total * fraction
+        running = 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= threshold:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else None
+        return None
+
+    def snapshot(self):
+        """Bucket counts keyed by upper bound, plus bucket-resolution percentiles."""
+        with self._lock:
+            counts = list(self._counts)
+            total_ms = self._total_ms
+        total = sum(counts)
+        labels = [f"le_{bound}ms" for bound in self.buckets_ms] + ["gt_max"]
+        snapshot = {
+            "count": total,
+            "mean_ms": round(total_ms / total, 2) if total else 0,
+            "buckets": dict(zip(labels, counts)),
+        }
+        for name, fraction in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            snapshot[name] = self._percentile(counts, total, fraction) if total else None
+        return snapshot
+
+
+class CircuitBreaker:
+    """
+    Failure-ratio circuit breaker over the last ``window`` calls.
+
+    closed -> open when at least ``min_calls`` outcomes are recorded and the
+    failure ratio reaches ``failure_ratio``. After ``cooldown`` seconds one
+    probe call is let through (half open); its outcome closes or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window, min_calls, failure_ratio, cooldown):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if success:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip()
+                return
+            if self.state == self.OPEN:
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_ratio
+            ):
+                self._trip()
+
+    def _trip(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def stats(self):
+        with self._lock:
+            recent = len(self._outcomes)
+            return {
+                "state": self.state,
+                "recent_calls": recent,
+                "recent_failures": self._outcomes.count(False),
+            }
+
+
+class UpstreamClient:
+    """Keep-alive session with timeouts, retries, a circuit breaker and latency stats."""
+
+    def __init__(
+        self,
+        name,
+        base_url,
+        read_timeout,
+        connect_timeout=None,
+        max_retries=None,
+        pool_size=None,
+        breaker=None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = (
+            settings.UPSTREAM_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout,
+            read_timeout,
+        )
+        self.max_retries = settings.UPSTREAM_MAX_RETRIES if max_retries is None else max_retries
+        self.breaker = breaker or CircuitBreaker(
+            window=settings.CIRCUIT_BREAKER_WINDOW,
+            min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+            failure_ratio=settings.CIRCUIT_BREAKER_FAILURE_RATIO,
+            cooldown=settings.CIRCUIT_BREAKER_COOLDOWN,
+        )
+        self.latency = LatencyHistogram()
+
+        pool_size = settings.UPSTREAM_POOL_SIZE if pool_size is None else pool_size
+        # Retries are handled here, not by urllib3, so each attempt is timed
+        # and reported to the breaker.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._counter_lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    def max_duration(self):
+        """Worst-case seconds one ``request()`` call can block, backoff included."""
+        attempts = self.max_retries + 1
+        return attempts * sum(self.timeout) + self.max_retries * BACKOFF_CAP_SECONDS
+
+    def _count(self, **increments):
+        with self._counter_lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def _backoff(self, attempt):
+        time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)))
+
+    def request(self, method, path, idempotent=None, **kwargs):
+        """
+        Send ``method`` to ``base_url + path`` and return the ``requests.Response``.
+
+        Raises ``CircuitOpenError`` when the upstream's circuit is open and
+        ``requests.RequestException`` when every attempt failed to connect.
+        A 429/5xx response is returned as-is once the retries are used up.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.base_url}{path}"
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count(short_circuited=1)
+                raise CircuitOpenError(f"{self.name} circuit is open; not calling {url}")
+
+            self._count(requests=1)
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as exc:
+                self.latency.record(time.monotonic() - started)
+                self.breaker.record(False)
+                self._count(failures=1)
+                # A connect timeout means the request never reached the upstream.
+                retryable = idempotent or isinstance(exc, requests.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            else:
+                self.latency.record(time.monotonic() - started)
+                failed = response.status_code in RETRY_STATUSES
+                self.breaker.record(not failed)
+                if not failed:
+                    return response
+                self._count(failures=1)
+                if not idempotent or attempt >= self.max_retries:
+                    return response
+                response.close()
+
+            self._count(retries=1)
+            self._backoff(attempt)
+            attempt += 1
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def stats(self):
+        with self._counter_lock:
+            counters = {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+            }
+        return {
+            **counters,
+            "circuit": self.breaker.stats(),
+            "latency": self.latency.snapshot(),
+        }
+
+
+razorpay_client = UpstreamClient(
+    "razorpay",
+    "https://api.razorpay.com/v1/",
+    read_timeout=settings.RAZORPAY_READ_TIMEOUT,
+)
+mapbox_client = UpstreamClient(
+    "mapbox",
+    "https://api.mapbox.com/",
+    read_timeout=settings.MAPBOX_READ_TIMEOUT,
+)
@@ -0,0 +1,88 @@
+"""
+Pillow pipeline for user photos (avatars and plantation proofs).
+
+``process_image`` takes the raw upload and returns WebP and JPEG renditions:
+
+- rotated upright from the EXIF orientation tag,
+- downscaled so the longest side is at most ``max_dimension``,
+- stripped of EXIF/XMP metadata (GPS, camera serials); the ICC colour profile
+  is kept so colours do not shift.
+
+Large JPEGs are decoded at a reduced scale (``Image.draft``), so a 12 MP phone
+photo bound for a 512 px avatar is never fully decoded.
+"""
+
+from collections import namedtuple
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Formats accepted from clients; MPO is the multi-picture JPEG many phones write.
+ACCEPTED_FORMATS = {"JPEG", "MPO", "PNG", "WEBP", "GIF", "BMP", "TIFF"}
+
+ProcessedImage = namedtuple("ProcessedImage", ["webp", "jpeg", "width", "height"])
+
+
+class ImageProcessingError(ValueError):
+    pass
+
+
+def identify_image(fileobj):
+    """Check that ``fileobj`` is an accepted image (header only); returns its format."""
+    try:
+        with Image.open(fileobj) as image:
+            image_format = image.format
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ImageProcessingError("File is not a supported image")
+    finally:
+        fileobj.seek(0)
+    if image_format not in ACCEPTED_FORMATS:
+        raise ImageProcessingError("File is not a supported image")
+    return image_format
+
+
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA", "PA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def process_image(data, max_dimension):
+    """Return a ``ProcessedImage`` for the raw bytes; raises ``ImageProcessingError``."""
+    try:
+        with Image.open(BytesIO(data)) as source:
+            if source.format not in ACCEPTED_FORMATS:
+                raise ImageProcessingError(f"Unsupported image format: {source.format}")
+            source.draft("RGB", (max_dimension, max_dimension))
+            icc_profile = source.info.get("icc_profile")
+            image = ImageOps.exif_transpose(source)
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        raise ImageProcessingError(f"Unable to read image: {exc}")
+
+    if _has_alpha(image):
+        webp_source = image.convert("RGBA")
+        jpeg_source = Image.new("RGB", image.size, (255, 255, 255))
+        jpeg_source.paste(webp_source, mask=webp_source.getchannel("A"))
+    else:
+        webp_source = jpeg_source = image.convert("RGB")
+
+    webp = BytesIO()
+    webp_source.save(
+        webp,
+        "WEBP",
+        quality=settings.IMAGE_WEBP_QUALITY,
+        method=4,
+        icc_profile=icc_profile,
+    )
+    jpeg = BytesIO()
+    jpeg_source.save(
+        jpeg,
+        "JPEG",
+        quality=settings.IMAGE_JPEG_QUALITY,
+        optimize=True,
+        progressive=True,
+        icc_profile=icc_profile,
+    )
+    return ProcessedImage(webp.getvalue(), jpeg.getvalue(), *image.size)
@@ -0,0 +1,73 @@
+"""
+Upload targets for processed images.
+
+``get_uploader(folder)`` returns an object whose ``upload(name, fileobj)``
+returns ``(stored_value, urls)``: the value to keep in the ``CloudinaryField``
+and its ``image_urls`` entry (see ``GoGreen/image_urls.py``).
+
+``IMAGE_UPLOAD_BACKEND=cloudinary`` (the default) uploads to Cloudinary;
+``local`` copies into ``MEDIA_ROOT`` so development works without
+credentials. Local URLs live in ``image_urls`` only, so a later full save of
+the row (which rebuilds them as Cloudinary URLs) breaks the local preview.
+"""
+
+import shutil
+import uuid
+from io import BytesIO
+from pathlib import Path, PurePosixPath
+
+from cloudinary import uploader as cloudinary_uploader
+from django.conf import settings
+
+from .image_urls import IMAGE_VARIANTS, resolve_image_urls
+
+
+class CloudinaryUploader:
+    def __init__(self, folder):
+        self.folder = folder
+
+    def upload(self, name, fileobj):
+        resource = cloudinary_uploader.upload_resource(
+            fileobj,
+            folder=self.folder,
+            type="upload",
+            resource_type="image",
+        )
+        return resource.get_prep_value(), resolve_image_urls(resource)
+
+
+class LocalUploader:
+    def __init__(self, folder, root=None, base_url=None):
+        self.folder = folder
+        self.root = Path(root or settings.MEDIA_ROOT)
+        self.base_url = base_url or settings.MEDIA_URL
+
+    def upload(self, name, fileobj):
+        relative = f"{self.folder}/{uuid.uuid4().hex}{PurePosixPath(name).suffix.lower()}"
+        target = self.root / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as output:
+            shutil.copyfileobj(fileobj, output)
+        url = f"{self.base_url}{relative}"
+        return relative, dict.fromkeys(("url", *IMAGE_VARIANTS), url)
+
+
+def get_uploader(folder, backend=None):
+    backend = backend or settings.IMAGE_UPLOAD_BACKEND
+    if backend == "cloudinary":
+        return CloudinaryUploader(folder)
+    if backend == "local":
+        return LocalUploader(folder)
+    raise ValueError(f"Unknown image upload backend: {backend}")
+
+
+def upload_renditions(uploader, stem, processed):
+    """
+    Upload a ``ProcessedImage``; returns ``(stored_value, image_urls_entry)``.
+
+    The WebP is what the field stores and what ``url``/variants point at; the
+    JPEG fallback URL sits under ``"jpeg"``.
+    """
+    webp_value, webp_urls = uploader.upload(f"{stem}.webp", BytesIO(processed.webp))
+    _, jpeg_urls = uploader.upload(f"{stem}.jpg", BytesIO(processed.jpeg))
+    return webp_value, {**webp_urls, "jpeg": jpeg_urls["url"]}
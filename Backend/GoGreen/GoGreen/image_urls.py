@@ -0,0 +1,83 @@
+"""
+Stored Cloudinary URLs for image fields.
+
+Models that hold ``CloudinaryField`` images keep an ``image_urls`` JSON column
+of the form ``{"<field>": {"url": ..., "thumbnail": ..., "medium": ...}}``. It
+is filled once after an image is saved (see the app ``signals`` modules), so
+serializers read plain strings instead of asking the Cloudinary SDK to build
+URLs for every row on every request.
+"""
+
+import logging
+
+from cloudinary import CloudinaryResource
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS = {
+    "thumbnail": {
+        "width": 160,
+        "height": 160,
+        "crop": "fill",
+        "gravity": "auto",
+        "quality": "auto",
+        "fetch_format": "auto",
+    },
+    "medium": {
+        "width": 720,
+        "crop": "limit",
+        "quality": "auto",
+        "fetch_format": "auto",
+    },
+}
+
+
+def resolve_image_urls(image):
+    """Build the public URL and every variant for one image value (or ``None``)."""
+    if not image:
+        return None
+    if not isinstance(image, CloudinaryResource):
+        # Legacy plain-string values: serve the original everywhere.
+        return dict.fromkeys(("url", *IMAGE_VARIANTS), str(image))
+    try:
+        urls = {"url": image.url}
+        for variant, options in IMAGE_VARIANTS.items():
+            urls[variant] = image.build_url(secure=True, **options)
+        return urls
+    except Exception:
+        logger.exception("Unable to build Cloudinary URLs for %s", image)
+        return dict.fromkeys(("url", *IMAGE_VARIANTS), str(image))
+
+
+def sync_image_urls(instance, field_names):
+    """
+    Refresh ``instance.image_urls`` for ``field_names`` and persist it if it changed.
+
+    Runs after the row is saved because ``CloudinaryField`` uploads inside
+    ``pre_save``; the write is a single-column ``UPDATE`` that fires no signals.
+    """
+    image_urls = dict(instance.image_urls or {})
+    for field_name in field_names:
+        field = instance._meta.get_field(field_name)
+        image = getattr(instance, field_name)
+        urls = resolve_image_urls(field.to_python(image) if image else image)
+        current = image_urls.get(field_name)
+        if urls and current and current.get("url") == urls["url"]:
+            # Same image; keep extra keys such as the processed "jpeg" fallback.
+            continue
+        image_urls[field_name] = urls
+    if image_urls == (instance.image_urls or {}):
+        return
+    instance.image_urls = image_urls
+    type(instance).objects.filter(pk=instance.pk).update(image_urls=image_urls)
+
+
+def stored_image_url(instance, field_name, variant="url"):
+    """Read a stored URL, resolving on the fly for rows saved before ``image_urls``."""
+    image = getattr(instance, field_name)
+    if not image:
+        return None
+    urls = (instance.image_urls or {}).get(field_name)
+    if urls is None:
+        urls = resolve_image_urls(image)
+    return urls.get(variant) if urls else None
@@ -0,0 +1,150 @@
+"""
+Token-bucket rate limiting for unauthenticated endpoints.
+
+``rate_limit(scope)`` wraps a function view. Limits come from
+``settings.RATE_LIMITS[scope]``, one bucket per client IP (``"ip"``) and, when
+the request names an account, one per normalized email (``"email"``). A limit
+is written ``"<requests>/<period>"`` with the period ``s``, ``m``, ``h`` or
+``d``, optionally multiplied (``"5/10m"``). The bucket holds that many
+requests and refills at the same pace; an empty value turns it off.
+
+Each bucket is a single cache key holding its "theoretical arrival time" in
+milliseconds (GCRA). A request adds one refill interval with ``cache.incr``,
+which is atomic in Redis and local memory, and is refused when that pushes
+the key more than a full bucket ahead of now. A refused request gives its
+interval back and gets ``429`` with ``Retry-After``. With the default
+local-memory cache every worker counts on its own; set ``REDIS_URL`` to share
+the buckets.
+"""
+
+import json
+import logging
+import math
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+_PERIOD_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_RATE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([smhd])[a-z]*\s*$", re.IGNORECASE)
+
+
+def parse_rate(rate):
+    """``"10/5m"`` -> ``(10, 300)``; ``None`` for an empty rate. Raises ``ValueError``."""
+    if not rate:
+        return None
+    match = _RATE_PATTERN.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate limit {rate!r}; expected e.g. '10/m' or '5/15m'")
+    requests = int(match.group(1))
+    period = int(match.group(2) or 1) * _PERIOD_SECONDS[match.group(3).lower()]
+    if requests <= 0:
+        return None
+    return requests, period
+
+
+def client_ip(request):
+    """
+    The caller's address.
+
+    With ``RATE_LIMIT_PROXY_COUNT`` reverse proxies in front (Render adds
+    one), the client is that many entries from the right of
+    ``X-Forwarded-For``; anything further left was supplied by the client.
+    """
+    proxies = settings.RATE_LIMIT_PROXY_COUNT
+    forwarded = [
+        part.strip()
+        for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+        if part.strip()
+    ]
+    if proxies > 0 and forwarded:
+        return forwarded[-min(proxies, len(forwarded))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def request_email(request):
+    """Normalized ``email`` from a form or JSON body, or ``""``."""
+    if request.method != "POST":
+        return ""
+    if request.content_type in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        email = request.POST.get("email")
+    else:
+        try:
+            payload = json.loads(request.body or "{}")
+        except (ValueError, UnicodeDecodeError):
+            return ""
+        email = payload.get("email") if isinstance(payload, dict) else None
+    return (email if isinstance(email, str) else "").strip().lower()
+
+
+def take_token(bucket, rate):
+    """
+    Take one request from ``bucket``; returns ``0`` or the seconds to wait.
+
+    ``rate`` is a ``(requests, period_seconds)`` pair from ``parse_rate``.
+    """
+    requests, period = rate
+    interval = max(1, period * 1000 // requests)
+    burst = requests * interval
+    timeout = max(3600, 2 * period)
+    key = f"ratelimit:{bucket}"
+    now = int(time.time() * 1000)
+
+    cache.add(key, now, timeout=timeout)
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:
+        # Evicted between add() and incr(); start a full bucket.
+        cache.set(key, now + interval, timeout=timeout)
+        return 0
+    if tat < now + interval:
+        # The bucket refilled completely while idle; restart it from now.
+        tat = now + interval
+        cache.set(key, tat, timeout=timeout)
+    if tat - now <= burst:
+        return 0
+    cache.decr(key, interval)
+    return math.ceil((tat - now - burst) / 1000)
+
+
+def _limited(retry_after):
+    response = JsonResponse(
+        {"error": "Too many requests. Please try again later.", "retry_after": retry_after},
+        status=429,
+    )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def rate_limit(scope):
+    """Decorate a view with the per-IP / per-email buckets configured for ``scope``."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limits = settings.RATE_LIMITS.get(scope) or {}
+            buckets = []
+            ip_rate = parse_rate(limits.get("ip"))
+            if ip_rate:
+                buckets.append(("ip", client_ip(request), ip_rate))
+            email_rate = parse_rate(limits.get("email"))
+            if email_rate:
+                email = request_email(request)
+                if email:
+                    buckets.append(("email", email, email_rate))
+
+            for kind, value, rate in buckets:
+                retry_after = take_token(f"{scope}:{kind}:{value}", rate)
+                if retry_after:
+                    logger.warning("Rate limit hit for %s (per %s)", scope, kind)
+                    return _limited(retry_after)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,119 @@
+"""
+Stale-while-revalidate caching for public, read-heavy payloads.
+
+Entries live in the default Django cache. Once an entry is older than its soft
+TTL it is still served, while a single background thread recomputes it. The
+refresh lock is taken with ``cache.add`` so only one worker sharing the cache
+recomputes at a time; a cold miss waits briefly for that worker instead of
+hitting the database in parallel.
+
+Each namespace carries a version stamp. ``invalidate(namespace)`` replaces the
+stamp, which orphans every cached variant of that namespace at once. Without a
+shared cache (``is_shared()``) the stamp is per worker, so it must not be used
+where workers have to agree, such as ETags.
+"""
+
+import logging
+import time
+from threading import Thread
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_WAIT_STEP_SECONDS = 0.05
+
+
+def _version_key(namespace):
+    return f"swr:{namespace}:version"
+
+
+def is_shared():
+    """True when all workers see one default cache (not per-process local memory)."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def namespace_version(namespace):
+    """Current version stamp of ``namespace``; changes on every ``invalidate``."""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(namespace), 0)
+    return version
+
+
+def _store(key, builder, soft_ttl, hard_ttl):
+    payload = builder()
+    cache.set(
+        key,
+        {"payload": payload, "fresh_until": time.time() + soft_ttl},
+        timeout=hard_ttl,
+    )
+    return payload
+
+
+def _refresh_in_background(key, lock_key, builder, soft_ttl, hard_ttl):
+    def _runner():
+        try:
+            _store(key, builder, soft_ttl, hard_ttl)
+        except Exception:
+            logger.exception("Background refresh failed for cache key %s", key)
+        finally:
+            cache.delete(lock_key)
+            close_old_connections()
+
+    Thread(target=_runner, daemon=True).start()
+
+
+def get_or_refresh(namespace, builder, variant="", soft_ttl=None, hard_ttl=None):
+    """
+    Return ``builder()`` output for ``namespace``/``variant`` through the cache.
+
+    ``builder`` must return a JSON-serialisable payload. Exceptions raised on a
+    cold miss propagate to the caller; failures in a background refresh are
+    logged and the stale entry keeps being served until its hard TTL.
+    """
+    soft_ttl = settings.PUBLIC_CACHE_SOFT_TTL if soft_ttl is None else soft_ttl
+    hard_ttl = settings.PUBLIC_CACHE_HARD_TTL if hard_ttl is None else hard_ttl
+    key = f"swr:{namespace}:{namespace_version(namespace)}:{variant}"
+    lock_key = f"{key}:lock"
+    lock_ttl = settings.PUBLIC_CACHE_LOCK_TTL
+
+    entry = cache.get(key)
+    if entry is not None:
+        if entry["fresh_until"] <= time.time() and cache.add(lock_key, 1, timeout=lock_ttl):
+            _refresh_in_background(key, lock_key, builder, soft_ttl, hard_ttl)
+        return entry["payload"]
+
+    if cache.add(lock_key, 1, timeout=lock_ttl):
+        try:
+            return _store(key, builder, soft_ttl, hard_ttl)
+        finally:
+            cache.delete(lock_key)
+
+    # Another worker is already computing this entry; give it a moment.
+    deadline = time.monotonic() + settings.PUBLIC_CACHE_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(_WAIT_STEP_SECONDS)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["payload"]
+    return builder()
+
+
+def invalidate(namespace):
+    """Drop every cached variant of ``namespace``."""
+    cache.set(_version_key(namespace), time.time_ns(), timeout=None)
+
+
+def invalidate_on_commit(*namespaces):
+    """Invalidate once the current transaction commits (immediately outside one)."""
+
+    def _invalidate():
+        for namespace in namespaces:
+            invalidate(namespace)
+
+    transaction.on_commit(_invalidate)
@@ -2,6 +2,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv()
@@ -70,6 +71,46 @@ DATABASES = {
     )
 }
 
+# ==========================================================
+# CACHE
+# ==========================================================
+
+# Local memory by default; set REDIS_URL so every gunicorn worker shares one
+# cache (needed for cross-worker single-flight refreshes).
+# The "otp" alias must be shared by all workers even without Redis, so it falls
+# back to files under OTP_CACHE_DIR (one host only; use Redis when scaling out).
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+        "otp": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "otp",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "gogreen-default",
+        },
+        "otp": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("OTP_CACHE_DIR", str(BASE_DIR / ".otp_cache")),
+        },
+    }
+
+# Public endpoint cache (see GoGreen/response_cache.py)
+PUBLIC_CACHE_SOFT_TTL = int(os.getenv("PUBLIC_CACHE_SOFT_TTL", 30))
+PUBLIC_CACHE_HARD_TTL = int(os.getenv("PUBLIC_CACHE_HARD_TTL", 600))
+PUBLIC_CACHE_LOCK_TTL = int(os.getenv("PUBLIC_CACHE_LOCK_TTL", 30))
+PUBLIC_CACHE_WAIT_SECONDS = float(os.getenv("PUBLIC_CACHE_WAIT_SECONDS", 2))
+
 # ==========================================================
 # TEMPLATES
 # ==========================================================
@@ -119,6 +160,7 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 CSRF_TRUSTED_ORIGINS = _split_csv_env("CSRF_TRUSTED_ORIGINS", FRONTEND_URL)
 if FRONTEND_URL and FRONTEND_URL not in CSRF_TRUSTED_ORIGINS:
@@ -151,6 +193,44 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# Email OTPs (see Users/otp.py): lifetime in seconds and wrong guesses allowed per code
+OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", 600))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", 5))
+
+# Token-bucket rate limits per client IP / email (see GoGreen/rate_limit.py).
+# "<requests>/<period>" with s, m, h or d (e.g. "5/10m"); empty disables a bucket.
+RATE_LIMITS = {
+    "register": {
+        "ip": os.getenv("RATE_LIMIT_REGISTER_IP", "10/h"),
+        "email": os.getenv("RATE_LIMIT_REGISTER_EMAIL", "5/h"),
+    },
+    "verify_otp": {
+        "ip": os.getenv("RATE_LIMIT_VERIFY_OTP_IP", "30/10m"),
+        "email": os.getenv("RATE_LIMIT_VERIFY_OTP_EMAIL", "10/10m"),
+    },
+    "resend_otp": {
+        "ip": os.getenv("RATE_LIMIT_RESEND_OTP_IP", "20/h"),
+        "email": os.getenv("RATE_LIMIT_RESEND_OTP_EMAIL", "3/10m"),
+    },
+    "login": {
+        "ip": os.getenv("RATE_LIMIT_LOGIN_IP", "20/m"),
+        "email": os.getenv("RATE_LIMIT_LOGIN_EMAIL", "10/10m"),
+    },
+    "geocode": {
+        "ip": os.getenv("RATE_LIMIT_GEOCODE_IP", "60/m"),
+    },
+}
+# Reverse proxies in front of Django that append to X-Forwarded-For (Render: 1)
+RATE_LIMIT_PROXY_COUNT = int(os.getenv("RATE_LIMIT_PROXY_COUNT", 1))
+
+# Signed API tokens (see GoGreen/auth_tokens.py), lifetimes in seconds
+AUTH_ACCESS_TOKEN_TTL = int(os.getenv("AUTH_ACCESS_TOKEN_TTL", 900))
+AUTH_REFRESH_TOKEN_TTL = int(os.getenv("AUTH_REFRESH_TOKEN_TTL", 14 * 24 * 3600))
+
+# Per-process cache of compact user records (see Users/user_cache.py)
+VERIFIED_USER_CACHE_TTL = int(os.getenv("VERIFIED_USER_CACHE_TTL", 60))
+VERIFIED_USER_CACHE_MAX_ENTRIES = int(os.getenv("VERIFIED_USER_CACHE_MAX_ENTRIES", 5000))
+
 # ==========================================================
 # EMAIL (OTP)
 # ==========================================================
@@ -163,6 +243,27 @@ EMAIL_HOST_PASSWORD = os.getenv("SMTP_PASS")
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = os.getenv("SMTP_ADMIN", EMAIL_HOST_USER)
 
+# Email outbox (see Users/outbox.py, delivered by `manage.py send_outbox_emails`)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", 2))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 6))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_RETRY_BASE_SECONDS", 30))
+EMAIL_OUTBOX_RETRY_CAP_SECONDS = int(os.getenv("EMAIL_OUTBOX_RETRY_CAP_SECONDS", 3600))
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", 300))
+# Sent rows (bodies include tracking links and personal data) are deleted after this many days
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", 7))
+
+# Photo processing queue (see Users/image_queue.py); run `manage.py process_images` as a worker
+IMAGE_QUEUE_BATCH_SIZE = int(os.getenv("IMAGE_QUEUE_BATCH_SIZE", 20))
+IMAGE_QUEUE_POLL_SECONDS = float(os.getenv("IMAGE_QUEUE_POLL_SECONDS", 5))
+IMAGE_QUEUE_MAX_ATTEMPTS = int(os.getenv("IMAGE_QUEUE_MAX_ATTEMPTS", 5))
+IMAGE_QUEUE_LEASE_SECONDS = int(os.getenv("IMAGE_QUEUE_LEASE_SECONDS", 300))
+# Raw uploads wait here for the worker; web and worker must see the same storage
+IMAGE_QUEUE_STORAGE_BACKEND = os.getenv(
+    "IMAGE_QUEUE_STORAGE_BACKEND", "django.core.files.storage.FileSystemStorage"
+)
+IMAGE_QUEUE_SPOOL_DIR = os.getenv("IMAGE_QUEUE_SPOOL_DIR", str(BASE_DIR / "image_spool"))
+
 # ==========================================================
 # CLOUDINARY
 # ==========================================================
@@ -175,15 +276,66 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
+# Processed photo uploads (see GoGreen/image_storage.py): "cloudinary", or "local" to write under MEDIA_ROOT
+IMAGE_UPLOAD_BACKEND = os.getenv("IMAGE_UPLOAD_BACKEND", "cloudinary")
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", 80))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", 82))
+AVATAR_MAX_DIMENSION = int(os.getenv("AVATAR_MAX_DIMENSION", 512))
+PROOF_IMAGE_MAX_DIMENSION = int(os.getenv("PROOF_IMAGE_MAX_DIMENSION", 1600))
+# Bulk proof import (see Tress/proof_import.py)
+PROOF_UPLOAD_WORKERS = int(os.getenv("PROOF_UPLOAD_WORKERS", 8))
+
 # ==========================================================
 # OTHER SETTINGS
 # ==========================================================
 
 RAZORPAY_KEY_ID = os.getenv("RAZOR_PAY_API_KEY", "")
 RAZORPAY_KEY_SECRET = os.getenv("RAZOR_PAY_SECRET_kEY", "")
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
 MAPBOX_ACCESS_TOKEN = os.getenv("MAPBOX_ACCESS_TOKEN", "")
 
 TREE_PRICE_INR = int(os.getenv("TREE_PRICE_INR", 99))
+CARBON_OFFSET_PER_TREE_KG_PER_YEAR = float(
+    os.getenv("CARBON_OFFSET_PER_TREE_KG_PER_YEAR", 21)
+)
+ADMIN_NOTIFICATION_EMAIL = os.getenv("ADMIN_NOTIFICATION_EMAIL", "")
+SUPPORT_EMAIL = os.getenv("SUPPORT_EMAIL", "")
+SUPPORT_WHATSAPP_NUMBER = os.getenv("SUPPORT_WHATSAPP_NUMBER", "000000000")
+
+# Geocoding result cache (see Tress/geocoding.py)
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 86400))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", 2000))
+
+# Local place autocomplete index (see Tress/place_index.py)
+PLACE_INDEX_RELOAD_SECONDS = int(os.getenv("PLACE_INDEX_RELOAD_SECONDS", 300))
+# Defaults to GEOCODE_RESULT_LIMIT; fewer local matches are topped up from Mapbox.
+PLACE_INDEX_MIN_RESULTS = int(os.getenv("PLACE_INDEX_MIN_RESULTS", 5))
+
+# Pooled Razorpay/Mapbox HTTP clients (see GoGreen/http_client.py)
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", 3.05))
+RAZORPAY_READ_TIMEOUT = float(os.getenv("RAZORPAY_READ_TIMEOUT", 10))
+MAPBOX_READ_TIMEOUT = float(os.getenv("MAPBOX_READ_TIMEOUT", 5))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", 2))
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", 10))
+CIRCUIT_BREAKER_WINDOW = int(os.getenv("CIRCUIT_BREAKER_WINDOW", 20))
+CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", 10))
+CIRCUIT_BREAKER_FAILURE_RATIO = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATIO", 0.5))
+CIRCUIT_BREAKER_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", 30))
+
+# Idempotency-Key handling for create-order/verify-payment (see Tress/idempotency.py)
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 86400))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 10))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+
+# Public impact rollup (see Tress/impact.py)
+IMPACT_ROLLUP_CHUNK_SIZE = int(os.getenv("IMPACT_ROLLUP_CHUNK_SIZE", 2000))
+
+# Admin bulk actions (see Tress/admin.py) and large changelists (see GoGreen/admin_pagination.py)
+ADMIN_BULK_ACTION_CHUNK_SIZE = int(os.getenv("ADMIN_BULK_ACTION_CHUNK_SIZE", 500))
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", 100000))
+
+# Donation CSV/JSONL export (see Tress/export.py)
+DONATION_EXPORT_CHUNK_SIZE = int(os.getenv("DONATION_EXPORT_CHUNK_SIZE", 2000))
 
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
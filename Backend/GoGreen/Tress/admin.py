@@ -1,16 +1,56 @@
+import io
+import logging
+import zipfile
+
+from django import forms
 from django.contrib import admin
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.db.utils import OperationalError, ProgrammingError
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils import timezone
 from urllib.parse import quote
 
-from .models import TreeDonation
+from GoGreen.admin_pagination import EstimatedCountPaginator
+from GoGreen.image_urls import stored_image_url
+from GoGreen.response_cache import invalidate_on_commit
+
+from Users.image_queue import queue_image
+from Users.outbox import enqueue_email, enqueue_emails
+
+from .export import streaming_export_response
+from .impact import apply_impact_change, apply_impact_changes, impact_contribution
+from .models import RazorpayWebhookEvent, TreeDonation
+from .proof_import import ImageSource, import_plantation_proofs
+
+logger = logging.getLogger(__name__)
+
+# Per-row import problems shown as admin messages; the rest are summarised.
+IMPORT_ERRORS_SHOWN = 20
+
+
+class ProofImportForm(forms.Form):
+    csv_file = forms.FileField(label="CSV file")
+    images_zip = forms.FileField(label="Images (.zip)", required=False)
+    dry_run = forms.BooleanField(label="Validate only", required=False)
 
 
 @admin.register(TreeDonation)
 class TreeDonationAdmin(admin.ModelAdmin):
-    actions = ("mark_approved", "mark_rejected", "restore_user_deleted")
+    actions = (
+        "mark_approved",
+        "mark_rejected",
+        "restore_user_deleted",
+        "export_csv",
+        "export_jsonl",
+    )
     list_display = (
         "id",
         "full_name",
@@ -22,8 +62,12 @@ class TreeDonationAdmin(admin.ModelAdmin):
         "is_user_deleted",
         "created_at",
     )
-    list_filter = ("payment_status", "approval_status", "is_user_deleted", "created_at")
+    list_filter = ("payment_status", "approval_status", "is_user_deleted")
     search_fields = ("full_name", "email", "phone", "razorpay_order_id")
+    date_hierarchy = "created_at"
+    autocomplete_fields = ("user",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = (
         "created_at",
         "paid_at",
@@ -103,58 +147,174 @@ class TreeDonationAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_urls(self):
+        return [
+            path(
+                "import-proofs/",
+                self.admin_site.admin_view(self.import_proofs_view),
+                name="Tress_treedonation_import_proofs",
+            ),
+            *super().get_urls(),
+        ]
+
+    def import_proofs_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        form = ProofImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            dry_run = form.cleaned_data["dry_run"]
+            try:
+                images = ImageSource(form.cleaned_data["images_zip"])
+                try:
+                    csv_text = form.cleaned_data["csv_file"].read().decode("utf-8-sig")
+                    result = import_plantation_proofs(
+                        io.StringIO(csv_text, newline=""), images, dry_run=dry_run
+                    )
+                finally:
+                    images.close()
+            except (ValueError, zipfile.BadZipFile) as exc:
+                form.add_error(None, str(exc))
+            else:
+                verb = "Would update" if dry_run else "Updated"
+                self.message_user(
+                    request,
+                    f"{verb} {result.updated} order(s), {result.images_uploaded} image(s) "
+                    f"uploaded, {len(result.errors)} row(s) skipped.",
+                    level=messages.WARNING if result.errors else messages.SUCCESS,
+                )
+                for error in result.errors[:IMPORT_ERRORS_SHOWN]:
+                    self.message_user(request, error, level=messages.WARNING)
+                if len(result.errors) > IMPORT_ERRORS_SHOWN:
+                    self.message_user(
+                        request,
+                        f"...and {len(result.errors) - IMPORT_ERRORS_SHOWN} more skipped row(s).",
+                        level=messages.WARNING,
+                    )
+                if dry_run:
+                    return redirect("admin:Tress_treedonation_import_proofs")
+                return redirect("admin:Tress_treedonation_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "form": form,
+            "title": "Import plantation proofs",
+        }
+        return TemplateResponse(request, "admin/Tress/treedonation/import_proofs.html", context)
+
     @admin.action(description="Mark selected orders as approved")
     def mark_approved(self, request, queryset):
+        donation_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+        chunk_size = settings.ADMIN_BULK_ACTION_CHUNK_SIZE
         approved_count = 0
-        emailed_count = 0
-        failed_emails = 0
-
-        for donation in queryset:
-            already_approved = donation.approval_status == "approved"
-            donation.approval_status = "approved"
-            if not donation.approved_at:
-                donation.approved_at = timezone.now()
-            if not donation.trees_planted_count:
-                donation.trees_planted_count = donation.number_of_trees
-            if not donation.planted_location:
-                donation.planted_location = donation.planting_location
-            if donation.planted_latitude is None and donation.latitude is not None:
-                donation.planted_latitude = donation.latitude
-            if donation.planted_longitude is None and donation.longitude is not None:
-                donation.planted_longitude = donation.longitude
-            donation.save()
-            approved_count += 1
-
-            if not already_approved:
-                try:
-                    self._send_approval_email(donation)
-                    emailed_count += 1
-                except Exception:
-                    failed_emails += 1
+        queued_emails = 0
+
+        for offset in range(0, len(donation_ids), chunk_size):
+            try:
+                approved, queued = self._approve_chunk(donation_ids[offset : offset + chunk_size])
+            except (OperationalError, ProgrammingError):
+                logger.exception("Bulk approval stopped after %s order(s)", approved_count)
+                self.message_user(
+                    request,
+                    f"Approval stopped after {approved_count} of {len(donation_ids)} order(s) "
+                    f"(approval emails queued: {queued_emails}). Run the action again to "
+                    "finish the rest.",
+                    level=messages.ERROR,
+                )
+                return
+            approved_count += approved
+            queued_emails += queued
 
         if approved_count:
             self.message_user(
                 request,
-                f"{approved_count} order(s) approved. "
-                f"Emails sent: {emailed_count}, failed: {failed_emails}.",
-                level=messages.SUCCESS if failed_emails == 0 else messages.WARNING,
+                f"{approved_count} order(s) approved. Approval emails queued: {queued_emails}.",
+                level=messages.SUCCESS,
+            )
+
+    def _approve_chunk(self, donation_ids):
+        """Approve one chunk in a single transaction; returns ``(approved, emails_queued)``."""
+        now = timezone.now()
+        with transaction.atomic():
+            locked = list(
+                TreeDonation.objects.select_for_update()
+                .filter(pk__in=donation_ids)
+                .order_by("pk")
+            )
+            impact_before = {donation.pk: impact_contribution(donation) for donation in locked}
+            newly_approved = {
+                donation.pk for donation in locked if donation.approval_status != "approved"
+            }
+            # Same defaults as save_model, computed by the database for the whole chunk.
+            TreeDonation.objects.filter(pk__in=impact_before).update(
+                approval_status="approved",
+                approved_at=Coalesce("approved_at", Value(now)),
+                trees_planted_count=Case(
+                    When(
+                        Q(trees_planted_count__isnull=True) | Q(trees_planted_count=0),
+                        then=F("number_of_trees"),
+                    ),
+                    default=F("trees_planted_count"),
+                ),
+                planted_location=Case(
+                    When(planted_location="", then=F("planting_location")),
+                    default=F("planted_location"),
+                ),
+                planted_latitude=Coalesce("planted_latitude", "latitude"),
+                planted_longitude=Coalesce("planted_longitude", "longitude"),
+                updated_at=now,
+            )
+            donations = list(TreeDonation.objects.filter(pk__in=impact_before).order_by("pk"))
+            apply_impact_changes(
+                (impact_before[donation.pk], impact_contribution(donation))
+                for donation in donations
+            )
+            queued = enqueue_emails(
+                message
+                for message in map(
+                    self._approval_email_message,
+                    (donation for donation in donations if donation.pk in newly_approved),
+                )
+                if message
             )
+            # update() skips post_save, so the signal handler never runs.
+            invalidate_on_commit("public_impact")
+        return len(donations), queued
 
     @admin.action(description="Mark selected orders as rejected")
     def mark_rejected(self, request, queryset):
-        queryset.update(approval_status="rejected", approved_at=None)
+        with transaction.atomic():
+            approved = list(queryset.filter(approval_status="approved"))
+            queryset.update(
+                approval_status="rejected", approved_at=None, updated_at=timezone.now()
+            )
+            changes = []
+            for donation in approved:
+                impact_before = impact_contribution(donation)
+                donation.approval_status = "rejected"
+                donation.approved_at = None
+                changes.append((impact_before, impact_contribution(donation)))
+            apply_impact_changes(changes)
+            # queryset.update() skips post_save, so the signal handler never runs.
+            invalidate_on_commit("public_impact")
 
     @admin.action(description="Restore user-deleted orders")
     def restore_user_deleted(self, request, queryset):
-        queryset.update(is_user_deleted=False, user_deleted_at=None)
+        queryset.update(
+            is_user_deleted=False, user_deleted_at=None, updated_at=timezone.now()
+        )
 
-    def _proof_url(self, image_field):
-        if not image_field:
-            return "-"
-        try:
-            return image_field.url
-        except Exception:
-            return str(image_field)
+    @admin.action(description="Export selected orders as CSV")
+    def export_csv(self, request, queryset):
+        return streaming_export_response(queryset, "csv")
+
+    @admin.action(description="Export selected orders as JSON Lines")
+    def export_jsonl(self, request, queryset):
+        return streaming_export_response(queryset, "jsonl")
+
+    def _proof_url(self, donation, field_name):
+        return stored_image_url(donation, field_name) or "-"
 
     def _mapbox_search_url(self, latitude, longitude, location_text):
         live_url = self._mapbox_live_map_url(latitude, longitude)
@@ -188,9 +348,16 @@ class TreeDonationAdmin(admin.ModelAdmin):
             f"?access_token={token}"
         )
 
-    def _send_approval_email(self, donation):
+    def _queue_approval_email(self, donation):
+        message = self._approval_email_message(donation)
+        if message is None:
+            return None
+        return enqueue_email(*message)
+
+    def _approval_email_message(self, donation):
+        """Build ``(subject, body, recipients)`` for the approval email, or ``None``."""
         if not donation.email:
-            return
+            return None
 
         frontend_url = (getattr(settings, "FRONTEND_URL", "") or "").rstrip("/")
         tracking_url = (
@@ -218,8 +385,8 @@ class TreeDonationAdmin(admin.ModelAdmin):
             donation.planted_longitude,
         )
 
-        proof_1 = self._proof_url(donation.proof_image_1)
-        proof_2 = self._proof_url(donation.proof_image_2)
+        proof_1 = self._proof_url(donation, "proof_image_1")
+        proof_2 = self._proof_url(donation, "proof_image_2")
         message_lines = [
             f"Hi {donation.full_name},",
             "",
@@ -256,16 +423,15 @@ class TreeDonationAdmin(admin.ModelAdmin):
             "Green Campus Tracker Team",
         ]
 
-        send_mail(
-            subject=f"Your Tree Order #{donation.id} Has Been Approved",
-            message="\n".join(message_lines),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[donation.email],
-            fail_silently=False,
+        return (
+            f"Your Tree Order #{donation.id} Has Been Approved",
+            "\n".join(message_lines),
+            [donation.email],
         )
 
     def save_model(self, request, obj, form, change):
         previous_status = None
+        old = None
         if change and obj.pk:
             old = TreeDonation.objects.filter(pk=obj.pk).first()
             previous_status = old.approval_status if old else None
@@ -284,20 +450,67 @@ class TreeDonationAdmin(admin.ModelAdmin):
         if obj.approval_status != "approved":
             obj.approved_at = None
 
-        super().save_model(request, obj, form, change)
+        # New proof photos go through the image queue instead of uploading here.
+        new_proofs = {}
+        for field_name in TreeDonation.PROOF_IMAGE_FIELDS:
+            value = getattr(obj, field_name)
+            if isinstance(value, UploadedFile):
+                new_proofs[field_name] = value
+                setattr(obj, field_name, getattr(old, field_name) if old else None)
 
         status_just_approved = obj.approval_status == "approved" and previous_status != "approved"
-        if status_just_approved:
-            try:
-                self._send_approval_email(obj)
-                self.message_user(
-                    request,
-                    "Approval saved and thank-you email sent to user.",
-                    level=messages.SUCCESS,
-                )
-            except Exception as exc:
-                self.message_user(
-                    request,
-                    f"Order approved, but email sending failed: {exc}",
-                    level=messages.WARNING,
-                )
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            apply_impact_change(impact_contribution(old), impact_contribution(obj))
+            for field_name, upload in new_proofs.items():
+                queue_image(obj, field_name, upload)
+            queued = status_just_approved and self._queue_approval_email(obj)
+
+        if new_proofs:
+            self.message_user(
+                request,
+                f"{len(new_proofs)} proof image(s) queued; they appear once process_images has run.",
+                level=messages.INFO,
+            )
+
+        if queued:
+            self.message_user(
+                request,
+                "Approval saved and thank-you email queued for the user.",
+                level=messages.SUCCESS,
+            )
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            impact_before = impact_contribution(obj)
+            super().delete_model(request, obj)
+            apply_impact_change(impact_before, None)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            removed = [
+                impact_contribution(donation)
+                for donation in queryset.filter(payment_status="paid")
+            ]
+            super().delete_queryset(request, queryset)
+            apply_impact_changes((impact_before, None) for impact_before in removed)
+
+
+@admin.register(RazorpayWebhookEvent)
+class RazorpayWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "event", "razorpay_order_id", "razorpay_payment_id", "received_at")
+    search_fields = ("event_id", "razorpay_order_id", "razorpay_payment_id")
+    list_filter = ("event",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = (
+        "event_id",
+        "event",
+        "razorpay_order_id",
+        "razorpay_payment_id",
+        "payload",
+        "received_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TressConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "Tress"
+
+    def ready(self):
+        from . import signals  # noqa: F401
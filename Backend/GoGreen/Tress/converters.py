@@ -0,0 +1,20 @@
+import uuid
+
+
+class TrackingTokenConverter:
+    """
+    Match a UUID tracking token (hyphenated or plain hex, any case).
+
+    Malformed tokens never match, so they are rejected by the URL resolver
+    instead of reaching the database.
+    """
+
+    regex = (
+        "[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}"
+    )
+
+    def to_python(self, value):
+        return uuid.UUID(value)
+
+    def to_url(self, value):
+        return str(value)
@@ -0,0 +1,79 @@
+"""
+Donation value helpers shared by the API serializers, the paid-order admin
+email and the CSV/JSONL export: public tracking links, Mapbox map URLs and the
+carbon offset estimate.
+"""
+
+from collections import namedtuple
+from urllib.parse import quote
+
+from django.conf import settings
+
+
+def tracking_url(token):
+    return f"{settings.FRONTEND_URL}/track/{token}"
+
+
+def certificate_url(token):
+    return f"{settings.FRONTEND_URL}/certificate/{token}"
+
+
+# Mapbox URL pieces that embed the access token, built once per response.
+MapUrlTemplates = namedtuple("MapUrlTemplates", ["live_prefix", "static_suffix"])
+
+
+def map_url_templates():
+    token = settings.MAPBOX_ACCESS_TOKEN
+    if not token:
+        return MapUrlTemplates(None, None)
+    return MapUrlTemplates(
+        live_prefix=(
+            "https://api.mapbox.com/styles/v1/mapbox/streets-v12.html"
+            f"?title=false&zoomwheel=true&access_token={quote(token)}"
+        ),
+        static_suffix=f"?access_token={token}",
+    )
+
+
+def mapbox_live_map_url(latitude, longitude, templates=None):
+    if latitude is None or longitude is None:
+        return None
+    templates = templates or map_url_templates()
+    if not templates.live_prefix:
+        return None
+    return f"{templates.live_prefix}#14/{latitude}/{longitude}"
+
+
+def mapbox_search_url(latitude, longitude, location_text, templates=None):
+    live_map = mapbox_live_map_url(latitude, longitude, templates)
+    if live_map:
+        return live_map
+    if location_text:
+        return f"https://www.mapbox.com/search?query={quote(location_text)}"
+    return None
+
+
+def mapbox_static_map_url(latitude, longitude, templates=None):
+    if latitude is None or longitude is None:
+        return None
+    templates = templates or map_url_templates()
+    if not templates.static_suffix:
+        return None
+    return (
+        "https://api.mapbox.com/styles/v1/mapbox/streets-v12/static/"
+        f"pin-s+0f766e({longitude},{latitude})/{longitude},{latitude},13,0/720x360"
+        f"{templates.static_suffix}"
+    )
+
+
+def carbon_offset_kg_per_year(tree_count):
+    value = (tree_count or 0) * settings.CARBON_OFFSET_PER_TREE_KG_PER_YEAR
+    return round(value, 2)
+
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
+
+def planted_tree_count(donation):
+    return donation.trees_planted_count or donation.number_of_trees or 0
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+
+from GoGreen.http_client import mapbox_client
+
+MAPBOX_GEOCODING_PATH = "geocoding/v5/mapbox.places/"
+GEOCODE_RESULT_LIMIT = 5
+
+
+def normalize_geocode_key(query, country=""):
+    """Case-fold and collapse whitespace so equivalent lookups share one entry."""
+    return (" ".join((query or "").casefold().split()), (country or "").strip().lower())
+
+
+def fetch_mapbox_places(query, country=""):
+    """Ask Mapbox for place suggestions; raises ``requests.RequestException``."""
+    params = {
+        "access_token": settings.MAPBOX_ACCESS_TOKEN,
+        "autocomplete": "true",
+        "limit": GEOCODE_RESULT_LIMIT,
+        "types": "place,locality,neighborhood,address",
+        "language": "en",
+    }
+    if country:
+        params["country"] = country.lower()
+    response = mapbox_client.get(f"{MAPBOX_GEOCODING_PATH}{quote(query)}.json", params=params)
+    response.raise_for_status()
+    payload = response.json()
+
+    results = []
+    for feature in payload.get("features", []):
+        center = feature.get("center") or [None, None]
+        results.append(
+            {
+                "place_name": feature.get("place_name"),
+                "latitude": center[1],
+                "longitude": center[0],
+            }
+        )
+    return results
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class GeocodeCache:
+    """
+    Process-wide TTL + LRU cache of geocoding results.
+
+    Concurrent lookups for the same normalized key are coalesced: the first
+    caller fetches from upstream while the others wait for its result (or its
+    exception). Errors are never cached.
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def lookup(self, query, country, fetch):
+        """Return ``(results, status)`` where status is hit, miss or coalesced."""
+        key = normalize_geocode_key(query, country)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], "hit"
+            if entry is not None:
+                del self._entries[key]
+
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            in_flight.done.wait(mapbox_client.max_duration())
+            if in_flight.error is not None:
+                raise in_flight.error
+            if in_flight.results is None:
+                raise requests.Timeout("Timed out waiting for an identical geocode lookup")
+            return in_flight.results, "coalesced"
+
+        try:
+            in_flight.results = fetch(query, country)
+        except Exception as exc:
+            in_flight.error = exc
+            raise
+        else:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, in_flight.results)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return in_flight.results, "miss"
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.coalesced = 0
+
+
+geocode_cache = GeocodeCache(
+    max_entries=settings.GEOCODE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.GEOCODE_CACHE_TTL,
+)
@@ -0,0 +1,166 @@
+"""
+``Idempotency-Key`` support for payment endpoints.
+
+A client sends the same ``Idempotency-Key`` header when it retries a request.
+The first request claims the key by inserting an ``IdempotencyKey`` row and
+stores its response once done. Later requests with that key get the stored
+response back (marked with ``Idempotent-Replayed: true``) without running the
+view again. A duplicate that arrives while the first one is still running
+waits for it instead of racing it.
+
+Responses with a 5xx status are not stored. The key is released so the client
+can retry once the upstream recovers.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+_POLL_SECONDS = 0.1
+_PURGE_PROBABILITY = 0.01
+_PURGE_BATCH_SIZE = 500
+
+
+def _request_hash(request):
+    digest = hashlib.sha256()
+    digest.update(request.method.encode("utf-8"))
+    digest.update(request.path.encode("utf-8"))
+    digest.update(request.body or b"")
+    return digest.hexdigest()
+
+
+def _purge_expired():
+    expired_ids = list(
+        IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).values_list(
+            "pk", flat=True
+        )[:_PURGE_BATCH_SIZE]
+    )
+    if expired_ids:
+        IdempotencyKey.objects.filter(pk__in=expired_ids).delete()
+
+
+def _claim(scope, key, request_hash):
+    """Insert the key row; returns ``(row, created)``."""
+    now = timezone.now()
+    try:
+        row = IdempotencyKey.objects.create(
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            locked_at=now,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+        )
+        return row, True
+    except IntegrityError:
+        pass
+
+    row = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if row is None:
+        # The holder released it between our insert and read; try once more.
+        return _claim(scope, key, request_hash)
+    if row.expires_at <= now or (
+        row.status_code is None
+        and row.locked_at <= now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    ):
+        # Expired, or abandoned by a worker that died mid-request: take it over.
+        taken = IdempotencyKey.objects.filter(pk=row.pk, locked_at=row.locked_at).update(
+            request_hash=request_hash,
+            status_code=None,
+            response_body=None,
+            locked_at=now,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+        )
+        if taken:
+            row.request_hash = request_hash
+            return row, True
+    return row, False
+
+
+def _replay(row):
+    response = JsonResponse(row.response_body, status=row.status_code, safe=False)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _wait_for_result(row):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(_POLL_SECONDS)
+        current = IdempotencyKey.objects.filter(pk=row.pk).first()
+        if current is None:
+            return None
+        if current.status_code is not None:
+            return current
+    return None
+
+
+def idempotent(scope):
+    """Decorate a JSON view so requests carrying ``Idempotency-Key`` run at most once."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = (request.headers.get(IDEMPOTENCY_HEADER) or "").strip()
+            if not key:
+                return view(request, *args, **kwargs)
+            if len(key) > 255:
+                return JsonResponse({"error": "Idempotency-Key is too long"}, status=400)
+
+            if random.random() < _PURGE_PROBABILITY:
+                _purge_expired()
+
+            request_hash = _request_hash(request)
+            row, claimed = _claim(scope, key, request_hash)
+            if not claimed:
+                if row.request_hash != request_hash:
+                    return JsonResponse(
+                        {"error": "Idempotency-Key was already used for a different request"},
+                        status=422,
+                    )
+                if row.status_code is None:
+                    row = _wait_for_result(row)
+                    if row is None:
+                        return JsonResponse(
+                            {"error": "A request with this Idempotency-Key is still in progress"},
+                            status=409,
+                        )
+                return _replay(row)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                IdempotencyKey.objects.filter(pk=row.pk).delete()
+                raise
+
+            if response.status_code >= 500:
+                IdempotencyKey.objects.filter(pk=row.pk).delete()
+                return response
+            try:
+                body = json.loads(response.content)
+            except ValueError:
+                logger.warning("Not storing non-JSON response for idempotency key %s", key)
+                IdempotencyKey.objects.filter(pk=row.pk).delete()
+                return response
+            IdempotencyKey.objects.filter(pk=row.pk).update(
+                status_code=response.status_code,
+                response_body=body,
+            )
+            return response
+
+        return wrapper
+
+    return decorator
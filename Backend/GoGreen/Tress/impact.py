@@ -0,0 +1,408 @@
+import logging
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateField, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import (
+    Coalesce,
+    NullIf,
+    TruncDate,
+    TruncDay,
+    TruncMonth,
+    TruncWeek,
+)
+from django.db.utils import OperationalError, ProgrammingError
+from django.utils import timezone
+
+from .models import ImpactDonorRollup, ImpactMonthlyRollup, ImpactRollup, TreeDonation
+
+logger = logging.getLogger(__name__)
+
+# What a single donation adds to the public impact rollup. Unpaid orders add nothing.
+ImpactContribution = namedtuple(
+    "ImpactContribution",
+    ["email", "trees", "approved", "amount_paise", "month"],
+)
+
+ROLLUP_FIELDS = (
+    "trees_total",
+    "approved_trees_total",
+    "total_projects",
+    "approved_projects",
+    "donation_amount_paise",
+    "active_donors",
+)
+
+GROWTH_GRANULARITIES = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+GROWTH_WINDOW_LIMITS = {"day": 90, "week": 52, "month": 36}
+DEFAULT_GROWTH_WINDOW = 6
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _growth_date(plantation_date, paid_at, approved_at, created_at):
+    if plantation_date:
+        return plantation_date
+    for moment in (paid_at, approved_at, created_at):
+        if moment:
+            return moment.date()
+    return None
+
+
+# SQL twins of ``_growth_date`` and of the ``trees`` rule in
+# ``_contribution_from_values``; keep the three in step. Timestamps are stored
+# in UTC and ``moment.date()`` reads them there, so the dates are taken in UTC.
+GROWTH_DATE = Coalesce(
+    "plantation_date",
+    TruncDate("paid_at", tzinfo=dt_timezone.utc),
+    TruncDate("approved_at", tzinfo=dt_timezone.utc),
+    TruncDate("created_at", tzinfo=dt_timezone.utc),
+    output_field=DateField(),
+)
+CONTRIBUTED_TREES = Coalesce(
+    NullIf("trees_planted_count", Value(0)),
+    "number_of_trees",
+    Value(0),
+    output_field=IntegerField(),
+)
+
+
+def _contribution_from_values(values):
+    if values["payment_status"] != "paid":
+        return None
+    growth_date = _growth_date(
+        values["plantation_date"],
+        values["paid_at"],
+        values["approved_at"],
+        values["created_at"],
+    )
+    return ImpactContribution(
+        email=values["email"],
+        trees=int(values["trees_planted_count"] or values["number_of_trees"] or 0),
+        approved=values["approval_status"] == "approved",
+        amount_paise=int(values["amount_paise"] or 0),
+        month=_month_start(growth_date) if growth_date else None,
+    )
+
+
+_CONTRIBUTION_FIELDS = (
+    "email",
+    "payment_status",
+    "approval_status",
+    "trees_planted_count",
+    "number_of_trees",
+    "amount_paise",
+    "plantation_date",
+    "paid_at",
+    "approved_at",
+    "created_at",
+)
+
+
+def impact_contribution(donation):
+    """Snapshot what ``donation`` currently adds to the rollup (``None`` if unpaid)."""
+    if donation is None:
+        return None
+    return _contribution_from_values(
+        {field: getattr(donation, field) for field in _CONTRIBUTION_FIELDS}
+    )
+
+
+def _adjust_donor(email, step):
+    donor, _ = ImpactDonorRollup.objects.select_for_update().get_or_create(email=email)
+    was_active = donor.paid_orders > 0
+    donor.paid_orders = max(donor.paid_orders + step, 0)
+    donor.save(update_fields=["paid_orders"])
+    return was_active != (donor.paid_orders > 0)
+
+
+def _adjust_month(month, trees, orders):
+    if month is None or (not trees and not orders):
+        return
+    ImpactMonthlyRollup.objects.get_or_create(month=month)
+    ImpactMonthlyRollup.objects.filter(month=month).update(
+        trees=F("trees") + trees,
+        orders=F("orders") + orders,
+    )
+
+
+def apply_impact_change(before, after):
+    """
+    Move the rollup from ``before`` to ``after`` for one donation.
+
+    Both arguments come from ``impact_contribution`` and are taken around the
+    write that changed the donation. Failures are logged instead of raised so a
+    missing rollup never blocks a payment or an approval; run
+    ``python manage.py rebuild_impact_rollup`` to repair drift.
+    """
+    apply_impact_changes([(before, after)])
+
+
+def apply_impact_changes(changes):
+    """
+    Apply many ``(before, after)`` pairs in one pass.
+
+    Deltas are summed first, so a batch costs one write per touched month and
+    donor plus one for the global row, however many donations it holds.
+    """
+    deltas = dict.fromkeys(ROLLUP_FIELDS, 0)
+    month_deltas = {}
+    donor_steps = {}
+
+    def _add_month(month, trees, orders):
+        if month is None:
+            return
+        current = month_deltas.get(month, (0, 0))
+        month_deltas[month] = (current[0] + trees, current[1] + orders)
+
+    for before, after in changes:
+        if before == after:
+            continue
+        for contribution, sign in ((before, -1), (after, 1)):
+            if contribution is None:
+                continue
+            deltas["trees_total"] += sign * contribution.trees
+            deltas["total_projects"] += sign
+            deltas["donation_amount_paise"] += sign * contribution.amount_paise
+            if contribution.approved:
+                deltas["approved_trees_total"] += sign * contribution.trees
+                deltas["approved_projects"] += sign
+
+        before_email = before.email if before else None
+        after_email = after.email if after else None
+        if before_email != after_email:
+            if before_email:
+                donor_steps[before_email] = donor_steps.get(before_email, 0) - 1
+            if after_email:
+                donor_steps[after_email] = donor_steps.get(after_email, 0) + 1
+
+        if before and after and before.month == after.month:
+            _add_month(after.month, after.trees - before.trees, 0)
+        else:
+            if before:
+                _add_month(before.month, -before.trees, -1)
+            if after:
+                _add_month(after.month, after.trees, 1)
+
+    if not any(deltas.values()) and not any(donor_steps.values()) and not any(
+        trees or orders for trees, orders in month_deltas.values()
+    ):
+        return
+
+    try:
+        with transaction.atomic():
+            # Sorted so concurrent batches lock donor rows in the same order.
+            for email in sorted(donor_steps):
+                step = donor_steps[email]
+                if step and _adjust_donor(email, step):
+                    deltas["active_donors"] += 1 if step > 0 else -1
+
+            for month in sorted(month_deltas):
+                _adjust_month(month, *month_deltas[month])
+
+            ImpactRollup.objects.get_or_create(pk=ImpactRollup.GLOBAL_ID)
+            ImpactRollup.objects.filter(pk=ImpactRollup.GLOBAL_ID).update(
+                updated_at=timezone.now(),
+                **{
+                    field: F(field) + delta
+                    for field, delta in deltas.items()
+                    if delta
+                },
+            )
+    except (OperationalError, ProgrammingError):
+        logger.exception(
+            "Impact rollup update failed. Run rebuild_impact_rollup to resync."
+        )
+
+
+def paid_donations_after(donations, last_pk=None):
+    """Contribution values of paid donations past ``last_pk``, in primary-key order."""
+    paid = donations.filter(payment_status="paid").order_by("pk")
+    if last_pk is not None:
+        paid = paid.filter(pk__gt=last_pk)
+    return paid.values("pk", *_CONTRIBUTION_FIELDS)
+
+
+def compute_impact_rollup(donations=None, chunk_size=None):
+    """
+    Recompute rollup state from source rows, walking primary keys in chunks.
+
+    Returns ``(totals, months, donors)`` where ``months`` maps a month start to
+    ``{"trees", "orders"}`` and ``donors`` maps email to paid order count.
+    """
+    if donations is None:
+        donations = TreeDonation.objects.all()
+    chunk_size = chunk_size or settings.IMPACT_ROLLUP_CHUNK_SIZE
+
+    totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+    months = {}
+    donors = {}
+    last_pk = None
+    while True:
+        rows = list(paid_donations_after(donations, last_pk)[:chunk_size])
+        if not rows:
+            break
+        last_pk = rows[-1]["pk"]
+
+        for row in rows:
+            contribution = _contribution_from_values(row)
+            totals["trees_total"] += contribution.trees
+            totals["total_projects"] += 1
+            totals["donation_amount_paise"] += contribution.amount_paise
+            if contribution.approved:
+                totals["approved_trees_total"] += contribution.trees
+                totals["approved_projects"] += 1
+            donors[contribution.email] = donors.get(contribution.email, 0) + 1
+            if contribution.month:
+                bucket = months.setdefault(contribution.month, {"trees": 0, "orders": 0})
+                bucket["trees"] += contribution.trees
+                bucket["orders"] += 1
+
+    totals["active_donors"] = len(donors)
+    return totals, months, donors
+
+
+def store_impact_rollup(totals, months, donors, batch_size=None, rollup_models=None):
+    """
+    Replace the stored rollup with freshly computed state.
+
+    ``rollup_models`` lets migrations pass historical
+    ``(ImpactRollup, ImpactMonthlyRollup, ImpactDonorRollup)`` classes.
+    """
+    rollup_model, monthly_model, donor_model = rollup_models or (
+        ImpactRollup,
+        ImpactMonthlyRollup,
+        ImpactDonorRollup,
+    )
+    batch_size = batch_size or settings.IMPACT_ROLLUP_CHUNK_SIZE
+    with transaction.atomic():
+        rollup_model.objects.update_or_create(
+            pk=ImpactRollup.GLOBAL_ID,
+            defaults={**totals, "updated_at": timezone.now()},
+        )
+        monthly_model.objects.all().delete()
+        monthly_model.objects.bulk_create(
+            [
+                monthly_model(month=month, **bucket)
+                for month, bucket in sorted(months.items())
+            ],
+            batch_size=batch_size,
+        )
+        donor_model.objects.all().delete()
+        donor_model.objects.bulk_create(
+            [
+                donor_model(email=email, paid_orders=count)
+                for email, count in donors.items()
+            ],
+            batch_size=batch_size,
+        )
+
+
+def diff_impact_rollup(totals, months, donors):
+    """List human readable mismatches between stored and recomputed state."""
+    problems = []
+    stored = ImpactRollup.objects.filter(pk=ImpactRollup.GLOBAL_ID).first()
+    for field in ROLLUP_FIELDS:
+        stored_value = getattr(stored, field) if stored else None
+        if stored_value != totals[field]:
+            problems.append(f"{field}: stored={stored_value} expected={totals[field]}")
+
+    stored_months = {
+        row.month: {"trees": row.trees, "orders": row.orders}
+        for row in ImpactMonthlyRollup.objects.all()
+        if row.trees or row.orders
+    }
+    for month in sorted(set(stored_months) | set(months)):
+        if stored_months.get(month) != months.get(month):
+            problems.append(
+                f"month {month:%Y-%m}: stored={stored_months.get(month)} "
+                f"expected={months.get(month)}"
+            )
+
+    stored_donors = {
+        email: count
+        for email, count in ImpactDonorRollup.objects.filter(paid_orders__gt=0).values_list(
+            "email", "paid_orders"
+        )
+    }
+    if stored_donors != donors:
+        mismatched = len(set(stored_donors.items()) ^ set(donors.items()))
+        problems.append(f"donor counts differ for {mismatched} entr(y/ies)")
+    return problems
+
+
+def read_impact_rollup():
+    """Return the stored global totals (zeros before the first paid order)."""
+    rollup = ImpactRollup.objects.filter(pk=ImpactRollup.GLOBAL_ID).first()
+    return {
+        field: (getattr(rollup, field) if rollup else 0) for field in ROLLUP_FIELDS
+    }
+
+
+def growth_periods(granularity, window, today=None):
+    """Start dates of the last ``window`` periods, oldest first, ending with today's."""
+    today = today or timezone.localdate()
+    if granularity == "day":
+        return [today - timedelta(days=offset) for offset in range(window - 1, -1, -1)]
+    if granularity == "week":
+        this_week = today - timedelta(days=today.weekday())
+        return [this_week - timedelta(weeks=offset) for offset in range(window - 1, -1, -1)]
+
+    periods = []
+    for offset in range(window - 1, -1, -1):
+        month = today.month - offset
+        year = today.year
+        while month <= 0:
+            month += 12
+            year -= 1
+        periods.append(date(year, month, 1))
+    return periods
+
+
+def growth_bucket_totals(granularity, since):
+    """``(period_start, trees)`` rows for paid donations grown on or after ``since``."""
+    # A growth date on or after ``since`` needs one of its source columns there
+    # too. That superset is found through an index on each column (a bitmap OR
+    # on Postgres) and then narrowed by the exact expression.
+    moment = datetime.combine(since, time.min, tzinfo=dt_timezone.utc)
+    candidates = (
+        Q(plantation_date__gte=since)
+        | Q(paid_at__gte=moment)
+        | Q(approved_at__gte=moment)
+        | Q(created_at__gte=moment)
+    )
+    return (
+        TreeDonation.objects.filter(candidates, payment_status="paid")
+        .annotate(growth_date=GROWTH_DATE)
+        .filter(growth_date__gte=since)
+        .annotate(period=GROWTH_GRANULARITIES[granularity]("growth_date"))
+        .order_by()
+        .values("period")
+        .annotate(trees=Sum(CONTRIBUTED_TREES))
+        .values_list("period", "trees")
+    )
+
+
+def read_growth_buckets(granularity="month", window=DEFAULT_GROWTH_WINDOW):
+    """
+    Return ``[(period_start, trees), ...]`` for the last ``window`` periods.
+
+    Monthly buckets come straight from ``ImpactMonthlyRollup``. Weekly and daily
+    buckets are grouped in SQL over paid donations inside the window, using the
+    same plantation/paid/approved/created date fallback as the rollup.
+    """
+    periods = growth_periods(granularity, window)
+    if granularity == "month":
+        stored = dict(
+            ImpactMonthlyRollup.objects.filter(month__gte=periods[0]).values_list(
+                "month", "trees"
+            )
+        )
+    else:
+        stored = dict(growth_bucket_totals(granularity, periods[0]))
+    return [(period, stored.get(period) or 0) for period in periods]
@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from GoGreen.http_client import CircuitBreaker, UpstreamClient
+
+
+class _FakeUpstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency_ms, failure_rate):
+        super().__init__(("127.0.0.1", 0), _FakeUpstreamHandler)
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class _FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle + delayed-ACK stalls.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(self.server.latency_ms / 1000)
+        failed = random.random() < self.server.failure_rate
+        body = b'{"error": "unavailable"}' if failed else b'{"status": "captured"}'
+        self.send_response(503 if failed else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark bare requests calls against the pooled UpstreamClient using a "
+        "local fake upstream with configurable latency and failure rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Calls per run.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Worker threads.")
+        parser.add_argument("--latency-ms", type=float, default=20, help="Fake upstream delay.")
+        parser.add_argument(
+            "--failure-rate",
+            type=float,
+            default=0.0,
+            help="Share of fake upstream responses that are 503 (0-1).",
+        )
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+        concurrency = options["concurrency"]
+        failure_rate = options["failure_rate"]
+        if total <= 0 or concurrency <= 0:
+            raise CommandError("--requests and --concurrency must be greater than 0")
+        if not 0 <= failure_rate <= 1:
+            raise CommandError("--failure-rate must be between 0 and 1")
+
+        server = _FakeUpstream(options["latency_ms"], failure_rate)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+        try:
+            self._run(
+                "bare requests.get",
+                server,
+                total,
+                concurrency,
+                lambda: requests.get(f"{base_url}payments/pay_x", timeout=(3.05, 10)),
+            )
+            client = UpstreamClient(
+                "benchmark",
+                base_url,
+                read_timeout=10,
+                pool_size=concurrency,
+                breaker=CircuitBreaker(window=20, min_calls=10, failure_ratio=0.5, cooldown=5),
+            )
+            self._run(
+                "pooled UpstreamClient",
+                server,
+                total,
+                concurrency,
+                lambda: client.get("payments/pay_x"),
+            )
+            stats = client.stats()
+            self.stdout.write(
+                f"  client: retries={stats['retries']} short_circuited={stats['short_circuited']} "
+                f"circuit={stats['circuit']['state']} latency={stats['latency']}"
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, label, server, total, concurrency, call):
+        server.connections = 0
+        latencies = []
+        outcomes = {"ok": 0, "error_status": 0, "exception": 0}
+        lock = threading.Lock()
+
+        def _one(_):
+            started = time.monotonic()
+            try:
+                response = call()
+                outcome = "ok" if response.status_code < 400 else "error_status"
+            except requests.RequestException:
+                outcome = "exception"
+            elapsed_ms = (time.monotonic() - started) * 1000
+            with lock:
+                latencies.append(elapsed_ms)
+                outcomes[outcome] += 1
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(_one, range(total)))
+        wall = time.monotonic() - started
+
+        latencies.sort()
+
+        def _pct(fraction):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+        self.stdout.write(
+            self.style.SUCCESS(label)
+            + f": {total / wall:.1f} req/s, p50={_pct(0.5):.1f}ms p95={_pct(0.95):.1f}ms "
+            f"p99={_pct(0.99):.1f}ms, connections={server.connections}, outcomes={outcomes}"
+        )
@@ -0,0 +1,106 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Tress.models import KnownPlace, TreeDonation
+from Tress.place_index import build_known_place
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed the local place autocomplete index from existing donation "
+        "locations and/or a gazetteer CSV (place_name,latitude,longitude[,country])."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from-donations",
+            action="store_true",
+            help="Index planting_location/planted_location values that have coordinates.",
+        )
+        parser.add_argument("--csv", dest="csv_path", help="Path to a gazetteer CSV file.")
+        parser.add_argument(
+            "--country",
+            default="",
+            help="Country code stored for donation places and CSV rows without one.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows inserted per query.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["from_donations"] and not options["csv_path"]:
+            raise CommandError("Pass --from-donations and/or --csv PATH")
+        batch_size = options["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be greater than 0")
+
+        self.batch = []
+        self.batch_size = batch_size
+        self.seen = 0
+        country = options["country"]
+
+        if options["from_donations"]:
+            for name_field, lat_field, lon_field in (
+                ("planting_location", "latitude", "longitude"),
+                ("planted_location", "planted_latitude", "planted_longitude"),
+            ):
+                rows = (
+                    TreeDonation.objects.exclude(**{name_field: ""})
+                    .filter(**{f"{lat_field}__isnull": False, f"{lon_field}__isnull": False})
+                    .order_by()
+                    .values_list(name_field, lat_field, lon_field)
+                    .distinct()
+                )
+                for place_name, latitude, longitude in rows.iterator(chunk_size=batch_size):
+                    self._queue(
+                        {"place_name": place_name, "latitude": latitude, "longitude": longitude},
+                        country,
+                        "donation",
+                    )
+
+        if options["csv_path"]:
+            try:
+                with open(options["csv_path"], newline="", encoding="utf-8") as handle:
+                    for row in csv.DictReader(handle):
+                        try:
+                            latitude = float(row.get("latitude"))
+                            longitude = float(row.get("longitude"))
+                        except (TypeError, ValueError):
+                            continue
+                        self._queue(
+                            {
+                                "place_name": row.get("place_name"),
+                                "latitude": latitude,
+                                "longitude": longitude,
+                            },
+                            (row.get("country") or country),
+                            "gazetteer",
+                        )
+            except OSError as exc:
+                raise CommandError(f"Unable to read {options['csv_path']}: {exc}")
+
+        self._flush()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {self.seen} place(s); index now holds "
+                f"{KnownPlace.objects.count()} place(s)."
+            )
+        )
+
+    def _queue(self, place, country, source):
+        known_place = build_known_place(place, country, source)
+        if known_place is None:
+            return
+        self.batch.append(known_place)
+        self.seen += 1
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self.batch:
+            KnownPlace.objects.bulk_create(self.batch, ignore_conflicts=True)
+            self.batch = []
@@ -0,0 +1,68 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Tress.export import EXPORT_FORMATS, export_chunks
+from Tress.models import TreeDonation
+
+
+def _parse_date(value, option):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"{option} must be a date in YYYY-MM-DD format")
+
+
+class Command(BaseCommand):
+    help = "Stream donations as CSV or JSON Lines for finance and audit."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=sorted(EXPORT_FORMATS), default="csv", help="Output format."
+        )
+        parser.add_argument("--output", help="Write to this file instead of stdout.")
+        parser.add_argument(
+            "--payment-status",
+            choices=[choice for choice, _ in TreeDonation.PAYMENT_STATUS_CHOICES],
+            help="Only orders with this payment status.",
+        )
+        parser.add_argument(
+            "--approval-status",
+            choices=[choice for choice, _ in TreeDonation.APPROVAL_STATUS_CHOICES],
+            help="Only orders with this approval status.",
+        )
+        parser.add_argument("--since", help="Orders created on or after this date (YYYY-MM-DD).")
+        parser.add_argument("--until", help="Orders created before this date (YYYY-MM-DD).")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Rows fetched per database round trip (default DONATION_EXPORT_CHUNK_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] is not None and options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size must be greater than 0")
+
+        queryset = TreeDonation.objects.all()
+        if options["payment_status"]:
+            queryset = queryset.filter(payment_status=options["payment_status"])
+        if options["approval_status"]:
+            queryset = queryset.filter(approval_status=options["approval_status"])
+        for option, lookup in (("since", "created_at__gte"), ("until", "created_at__lt")):
+            if options[option]:
+                day = _parse_date(options[option], f"--{option}")
+                queryset = queryset.filter(
+                    **{lookup: timezone.make_aware(datetime.combine(day, time.min))}
+                )
+
+        chunks = export_chunks(queryset, options["format"], options["chunk_size"])
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Export written to {options['output']}."))
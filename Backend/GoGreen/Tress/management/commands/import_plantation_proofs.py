@@ -0,0 +1,73 @@
+import zipfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from GoGreen.image_storage import get_uploader
+from Tress.proof_import import PROOF_FOLDER, ImageSource, import_plantation_proofs
+
+
+class Command(BaseCommand):
+    help = (
+        "Import plantation details and proof images for many orders from a CSV "
+        "keyed by tracking token (see Tress/proof_import.py for the columns)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="CSV file with one row per order.")
+        parser.add_argument(
+            "--images",
+            help="Folder or .zip holding the files named in proof_image_1/proof_image_2.",
+        )
+        parser.add_argument(
+            "--storage",
+            choices=("cloudinary", "local"),
+            default=settings.IMAGE_UPLOAD_BACKEND,
+            help="Where images go; local writes under MEDIA_ROOT.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PROOF_UPLOAD_WORKERS,
+            help="Images processed and uploaded in parallel.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.ADMIN_BULK_ACTION_CHUNK_SIZE,
+            help="Orders written per transaction.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validate only.")
+
+    def handle(self, *args, **options):
+        if options["workers"] <= 0 or options["batch_size"] <= 0:
+            raise CommandError("--workers and --batch-size must be greater than 0")
+
+        try:
+            images = ImageSource(options["images"])
+        except (OSError, ValueError, zipfile.BadZipFile) as exc:
+            raise CommandError(f"Unable to read images from {options['images']}: {exc}")
+        try:
+            with open(options["csv_path"], newline="", encoding="utf-8-sig") as csv_file:
+                result = import_plantation_proofs(
+                    csv_file,
+                    images,
+                    uploader=get_uploader(PROOF_FOLDER, options["storage"]),
+                    workers=options["workers"],
+                    chunk_size=options["batch_size"],
+                    dry_run=options["dry_run"],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        finally:
+            images.close()
+
+        for error in result.errors:
+            self.stderr.write(error)
+        verb = "Would update" if options["dry_run"] else "Updated"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {result.updated} order(s), {result.images_uploaded} image(s) uploaded, "
+                f"{len(result.errors)} row(s) skipped."
+            )
+        )
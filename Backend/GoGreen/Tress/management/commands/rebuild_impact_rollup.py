@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Tress.impact import compute_impact_rollup, diff_impact_rollup, store_impact_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or verify) the public impact rollup from paid TreeDonation rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.IMPACT_ROLLUP_CHUNK_SIZE,
+            help="Number of donation rows read per query.",
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the stored rollup with source rows; do not write.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be greater than 0")
+
+        totals, months, donors = compute_impact_rollup(chunk_size=chunk_size)
+
+        if options["verify"]:
+            problems = diff_impact_rollup(totals, months, donors)
+            if problems:
+                for problem in problems:
+                    self.stdout.write(self.style.WARNING(problem))
+                raise CommandError(f"Impact rollup is out of sync ({len(problems)} issue(s)).")
+            self.stdout.write(self.style.SUCCESS("Impact rollup matches source rows."))
+            return
+
+        store_impact_rollup(totals, months, donors, batch_size=chunk_size)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Impact rollup rebuilt: {totals['total_projects']} paid order(s), "
+                f"{totals['trees_total']} tree(s), {len(months)} month bucket(s), "
+                f"{totals['active_donors']} donor(s)."
+            )
+        )
@@ -0,0 +1,129 @@
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from GoGreen.http_client import UpstreamClient, razorpay_client
+from Tress.models import TreeDonation
+from Tress.payments import mark_donations_paid
+from Tress.reconciliation import (
+    fetch_order_payments,
+    plan_reconciliation,
+    stale_unpaid_donations,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Settle created/failed orders against Razorpay's payment list "
+        "(for checkouts whose browser closed before verify-payment ran)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="How far back to look.")
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Skip orders younger than this; their checkout may still be open.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Orders per batch.")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Parallel Razorpay list requests (one day slice each).",
+        )
+        parser.add_argument(
+            "--cursor-file",
+            help="Store the last settled order id here and resume from it on the next run.",
+        )
+        parser.add_argument("--after-id", type=int, help="Start after this order id.")
+        parser.add_argument(
+            "--fail-abandoned",
+            action="store_true",
+            help="Also mark created orders with no payment attempt as failed.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report without writing.")
+        parser.add_argument(
+            "--base-url",
+            help="Razorpay API base URL override, e.g. a local stub: http://127.0.0.1:8765/v1/",
+        )
+
+    def handle(self, *args, **options):
+        for name in ("days", "batch_size", "concurrency"):
+            if options[name] <= 0:
+                raise CommandError(f"--{name.replace('_', '-')} must be greater than 0")
+        if not options["base_url"] and not (
+            settings.RAZORPAY_KEY_ID and settings.RAZORPAY_KEY_SECRET
+        ):
+            raise CommandError("Razorpay credentials are missing on server")
+
+        cursor_file = Path(options["cursor_file"]) if options["cursor_file"] else None
+        after_id = options["after_id"]
+        if after_id is None and cursor_file and cursor_file.exists():
+            after_id = int(cursor_file.read_text().strip() or 0)
+            self.stdout.write(f"Resuming after order id {after_id}.")
+        after_id = after_id or 0
+
+        client = razorpay_client
+        if options["base_url"]:
+            client = UpstreamClient(
+                "razorpay-reconcile",
+                options["base_url"],
+                read_timeout=settings.RAZORPAY_READ_TIMEOUT,
+                pool_size=options["concurrency"],
+            )
+
+        started = time.monotonic()
+        now = timezone.now()
+        since = now - timedelta(days=options["days"])
+        try:
+            payments = fetch_order_payments(client, since, now, options["concurrency"])
+        except requests.RequestException as exc:
+            raise CommandError(f"Unable to list Razorpay payments: {exc}")
+        self.stdout.write(
+            f"Fetched payments for {len(payments)} order(s) in "
+            f"{time.monotonic() - started:.1f}s."
+        )
+
+        scanned = paid = failed = mismatched = 0
+        for batch in stale_unpaid_donations(
+            since,
+            now - timedelta(minutes=options["stale_minutes"]),
+            after_id=after_id,
+            batch_size=options["batch_size"],
+        ):
+            to_paid, to_failed, batch_mismatched = plan_reconciliation(
+                batch, payments, fail_abandoned=options["fail_abandoned"]
+            )
+            scanned += len(batch)
+            mismatched += len(batch_mismatched)
+            if options["dry_run"]:
+                paid += len(to_paid)
+                failed += len(to_failed)
+                continue
+
+            if to_paid:
+                paid += len(mark_donations_paid(to_paid))
+            if to_failed:
+                failed += TreeDonation.objects.filter(
+                    pk__in=to_failed, payment_status="created"
+                ).update(payment_status="failed", updated_at=timezone.now())
+            if cursor_file:
+                cursor_file.write_text(str(batch[-1].pk))
+
+        if cursor_file and not options["dry_run"] and cursor_file.exists():
+            cursor_file.unlink()
+
+        prefix = "[dry run] " if options["dry_run"] else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}Scanned {scanned} order(s): {paid} marked paid, {failed} marked failed, "
+                f"{mismatched} amount mismatch(es) in {time.monotonic() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,109 @@
+import json
+import random
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from Tress.models import TreeDonation
+
+
+class _StubGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/v1/payments":
+            self._send(404, {"error": {"description": "Not found"}})
+            return
+        query = parse_qs(url.query)
+        start = int(query.get("from", [0])[0])
+        end = int(query.get("to", [2**31])[0])
+        count = min(int(query.get("count", [10])[0]), 100)
+        skip = int(query.get("skip", [0])[0])
+        items = [
+            payment
+            for payment in self.server.payments
+            if start <= payment["created_at"] <= end
+        ][skip : skip + count]
+        self._send(200, {"entity": "collection", "count": len(items), "items": items})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local stand-in for Razorpay's GET /v1/payments list API, built "
+        "from unpaid orders in the database, for trying out reconcile_payments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--captured-ratio",
+            type=float,
+            default=0.3,
+            help="Share of unpaid orders that get a captured payment.",
+        )
+        parser.add_argument(
+            "--failed-ratio",
+            type=float,
+            default=0.3,
+            help="Share of unpaid orders that get a failed payment.",
+        )
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        payments = []
+        rows = (
+            TreeDonation.objects.exclude(payment_status="paid")
+            .order_by("pk")
+            .values_list("razorpay_order_id", "amount_paise", "created_at")
+        )
+        for order_id, amount_paise, created_at in rows.iterator():
+            roll = rng.random()
+            if roll < options["captured_ratio"]:
+                status = "captured"
+            elif roll < options["captured_ratio"] + options["failed_ratio"]:
+                status = "failed"
+            else:
+                continue
+            payments.append(
+                {
+                    "id": f"pay_stub{len(payments):08d}",
+                    "entity": "payment",
+                    "order_id": order_id,
+                    "amount": amount_paise,
+                    "currency": "INR",
+                    "status": status,
+                    "created_at": int((created_at + timedelta(minutes=1)).timestamp()),
+                }
+            )
+
+        server = ThreadingHTTPServer(("127.0.0.1", options["port"]), _StubGatewayHandler)
+        server.daemon_threads = True
+        server.payments = payments
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stub gateway with {len(payments)} payment(s) on "
+                f"http://127.0.0.1:{options['port']}/v1/ (Ctrl+C to stop)"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
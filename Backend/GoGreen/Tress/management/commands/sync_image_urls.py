@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from GoGreen.image_urls import sync_image_urls
+from Tress.models import TreeDonation
+from Users.models import User
+
+
+class Command(BaseCommand):
+    help = "Store resolved Cloudinary URLs and variants for proof images and avatars."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of rows read per query.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be greater than 0")
+
+        donations = TreeDonation.objects.exclude(
+            Q(proof_image_1__isnull=True) | Q(proof_image_1=""),
+            Q(proof_image_2__isnull=True) | Q(proof_image_2=""),
+        ).only("pk", "image_urls", *TreeDonation.PROOF_IMAGE_FIELDS)
+        for donation in donations.iterator(chunk_size=chunk_size):
+            sync_image_urls(donation, TreeDonation.PROOF_IMAGE_FIELDS)
+
+        users = (
+            User.objects.exclude(avatar__isnull=True)
+            .exclude(avatar="")
+            .only("pk", "image_urls", "avatar")
+        )
+        for user in users.iterator(chunk_size=chunk_size):
+            sync_image_urls(user, ("avatar",))
+
+        self.stdout.write(self.style.SUCCESS("Image URLs are up to date."))
@@ -0,0 +1,114 @@
+# Generated by Django 6.0.2 on 2026-10-17 00:26
+
+from datetime import date
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Frozen copy of the rollup rules at the time of this migration, so later
+# changes to Tress.impact cannot break a fresh migrate.
+def backfill_impact_rollup(apps, schema_editor):
+    TreeDonation = apps.get_model("Tress", "TreeDonation")
+    ImpactRollup = apps.get_model("Tress", "ImpactRollup")
+    ImpactMonthlyRollup = apps.get_model("Tress", "ImpactMonthlyRollup")
+    ImpactDonorRollup = apps.get_model("Tress", "ImpactDonorRollup")
+
+    totals = {
+        "trees_total": 0,
+        "approved_trees_total": 0,
+        "total_projects": 0,
+        "approved_projects": 0,
+        "donation_amount_paise": 0,
+    }
+    months = {}
+    donors = {}
+    rows = TreeDonation.objects.filter(payment_status="paid").values(
+        "email",
+        "approval_status",
+        "trees_planted_count",
+        "number_of_trees",
+        "amount_paise",
+        "plantation_date",
+        "paid_at",
+        "approved_at",
+        "created_at",
+    )
+    for row in rows.iterator(chunk_size=2000):
+        trees = int(row["trees_planted_count"] or row["number_of_trees"] or 0)
+        totals["trees_total"] += trees
+        totals["total_projects"] += 1
+        totals["donation_amount_paise"] += int(row["amount_paise"] or 0)
+        if row["approval_status"] == "approved":
+            totals["approved_trees_total"] += trees
+            totals["approved_projects"] += 1
+        donors[row["email"]] = donors.get(row["email"], 0) + 1
+
+        growth_date = row["plantation_date"]
+        if not growth_date:
+            for moment in (row["paid_at"], row["approved_at"], row["created_at"]):
+                if moment:
+                    growth_date = moment.date()
+                    break
+        if growth_date:
+            month = date(growth_date.year, growth_date.month, 1)
+            bucket = months.setdefault(month, {"trees": 0, "orders": 0})
+            bucket["trees"] += trees
+            bucket["orders"] += 1
+
+    ImpactRollup.objects.update_or_create(
+        pk=1,
+        defaults={**totals, "active_donors": len(donors), "updated_at": timezone.now()},
+    )
+    ImpactMonthlyRollup.objects.bulk_create(
+        [ImpactMonthlyRollup(month=month, **bucket) for month, bucket in sorted(months.items())],
+        batch_size=2000,
+    )
+    ImpactDonorRollup.objects.bulk_create(
+        [ImpactDonorRollup(email=email, paid_orders=count) for email, count in donors.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tress', '0004_treedonation_tracking_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImpactDonorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('paid_orders', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ImpactMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('trees', models.BigIntegerField(default=0)),
+                ('orders', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImpactRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trees_total', models.BigIntegerField(default=0)),
+                ('approved_trees_total', models.BigIntegerField(default=0)),
+                ('total_projects', models.BigIntegerField(default=0)),
+                ('approved_projects', models.BigIntegerField(default=0)),
+                ('donation_amount_paise', models.BigIntegerField(default=0)),
+                ('active_donors', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_impact_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tress', '0005_impact_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='treedonation',
+            name='image_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
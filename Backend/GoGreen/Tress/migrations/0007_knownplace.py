@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tress', '0006_treedonation_image_urls'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnownPlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('place_name', models.CharField(max_length=255)),
+                ('search_key', models.CharField(max_length=255)),
+                ('country', models.CharField(blank=True, max_length=8)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('source', models.CharField(choices=[('mapbox', 'Mapbox'), ('donation', 'Donation'), ('gazetteer', 'Gazetteer')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('search_key', 'country'), name='unique_known_place_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-17 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tress', '0007_knownplace'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RazorpayWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=64, unique=True)),
+                ('event', models.CharField(max_length=64)),
+                ('razorpay_order_id', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('razorpay_payment_id', models.CharField(blank=True, max_length=100)),
+                ('payload', models.JSONField(default=dict)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
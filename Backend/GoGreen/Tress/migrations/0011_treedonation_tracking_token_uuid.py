@@ -0,0 +1,68 @@
+import uuid
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def repair_tracking_tokens(apps, schema_editor):
+    """
+    Give every row a distinct, well-formed token before the column becomes a unique UUID.
+
+    0004 added the column with a callable default, which Django evaluates once,
+    so rows older than that migration share a single token.
+    """
+    TreeDonation = apps.get_model("Tress", "TreeDonation")
+    seen = set()
+    repaired = []
+    for donation in TreeDonation.objects.only("id", "tracking_token").order_by("id").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        try:
+            token = uuid.UUID(str(donation.tracking_token))
+        except ValueError:
+            token = None
+        if token is None or token in seen:
+            token = uuid.uuid4()
+            donation.tracking_token = str(token)
+            repaired.append(donation)
+        seen.add(token)
+    TreeDonation.objects.bulk_update(repaired, ["tracking_token"], batch_size=BATCH_SIZE)
+
+
+def normalize_tracking_tokens(apps, schema_editor):
+    """
+    Rewrite tokens in the backend's UUID storage format.
+
+    Backends without a native uuid type (SQLite) store 32 hex characters, but
+    the copied varchar values are still hyphenated. PostgreSQL casts in place.
+    """
+    if schema_editor.connection.features.has_native_uuid_field:
+        return
+    TreeDonation = apps.get_model("Tress", "TreeDonation")
+    batch = []
+    for donation in TreeDonation.objects.only("id", "tracking_token").order_by("id").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        batch.append(donation)
+        if len(batch) >= BATCH_SIZE:
+            TreeDonation.objects.bulk_update(batch, ["tracking_token"])
+            batch = []
+    TreeDonation.objects.bulk_update(batch, ["tracking_token"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tress', '0010_treedonation_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_tracking_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='treedonation',
+            name='tracking_token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.RunPython(normalize_tracking_tokens, migrations.RunPython.noop),
+    ]
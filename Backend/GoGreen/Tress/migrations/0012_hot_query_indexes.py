@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-17 00:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tress', '0011_treedonation_tracking_token_uuid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='treedonation',
+            index=models.Index(condition=models.Q(('is_user_deleted', False)), fields=['user', '-created_at', '-id'], name='donation_user_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treedonation',
+            index=models.Index(condition=models.Q(('payment_status', 'paid')), fields=['id'], name='donation_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treedonation',
+            index=models.Index(fields=['payment_status', 'approval_status', '-created_at', '-id'], name='donation_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treedonation',
+            index=models.Index(condition=models.Q(('payment_status__in', ['created', 'failed'])), fields=['created_at'], name='donation_unpaid_created_idx'),
+        ),
+    ]
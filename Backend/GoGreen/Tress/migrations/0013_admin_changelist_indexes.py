@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 00:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tress', '0012_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='treedonation',
+            index=models.Index(fields=['created_at', 'id'], name='donation_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-17 01:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tress', '0013_admin_changelist_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='treedonation',
+            index=models.Index(condition=models.Q(('payment_status', 'paid')), fields=['plantation_date'], name='donation_paid_planted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treedonation',
+            index=models.Index(condition=models.Q(('payment_status', 'paid')), fields=['paid_at'], name='donation_paid_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treedonation',
+            index=models.Index(condition=models.Q(('payment_status', 'paid')), fields=['approved_at'], name='donation_paid_approved_idx'),
+        ),
+    ]
@@ -49,14 +49,16 @@ class TreeDonation(models.Model):
     razorpay_order_id = models.CharField(max_length=100, unique=True)
     razorpay_payment_id = models.CharField(max_length=100, blank=True, null=True)
     razorpay_signature = models.CharField(max_length=255, blank=True, null=True)
-    tracking_token = models.CharField(
-        max_length=40,
+    tracking_token = models.UUIDField(
         default=uuid.uuid4,
         editable=False,
-        db_index=True,
+        unique=True,
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every write; queryset.update()/bulk_update() callers set it
+    # explicitly. Drives ETag/Last-Modified on order and tracking responses.
+    updated_at = models.DateTimeField(auto_now=True)
     paid_at = models.DateTimeField(null=True, blank=True)
     approved_at = models.DateTimeField(null=True, blank=True)
     is_user_deleted = models.BooleanField(default=False)
@@ -81,10 +83,153 @@ class TreeDonation(models.Model):
         blank=True,
         null=True,
     )
+    PROOF_IMAGE_FIELDS = ("proof_image_1", "proof_image_2")
     thank_you_note = models.TextField(blank=True)
+    # Resolved proof image URLs and variants (see GoGreen/image_urls.py)
+    image_urls = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # "My orders" list, its summary and the conditional GET validators.
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                condition=models.Q(is_user_deleted=False),
+                name="donation_user_visible_idx",
+            ),
+            # Impact rollup rebuild walks paid rows by primary key.
+            models.Index(
+                fields=["id"],
+                condition=models.Q(payment_status="paid"),
+                name="donation_paid_idx",
+            ),
+            # Day/week growth buckets find paid rows by each growth date source
+            # (created_at through donation_created_idx).
+            *(
+                models.Index(fields=[field], condition=models.Q(payment_status="paid"), name=name)
+                for field, name in (
+                    ("plantation_date", "donation_paid_planted_idx"),
+                    ("paid_at", "donation_paid_at_idx"),
+                    ("approved_at", "donation_paid_approved_idx"),
+                )
+            ),
+            # Admin changelist default ordering and date_hierarchy.
+            models.Index(fields=["created_at", "id"], name="donation_created_idx"),
+            # Admin changelist filters, newest first.
+            models.Index(
+                fields=["payment_status", "approval_status", "-created_at", "-id"],
+                name="donation_status_created_idx",
+            ),
+            # reconcile_payments scans unpaid orders by creation window.
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(payment_status__in=["created", "failed"]),
+                name="donation_unpaid_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.full_name} - {self.number_of_trees} trees ({self.payment_status})"
+
+
+class ImpactRollup(models.Model):
+    """Running public impact totals over paid donations (single global row)."""
+
+    GLOBAL_ID = 1
+
+    trees_total = models.BigIntegerField(default=0)
+    approved_trees_total = models.BigIntegerField(default=0)
+    total_projects = models.BigIntegerField(default=0)
+    approved_projects = models.BigIntegerField(default=0)
+    donation_amount_paise = models.BigIntegerField(default=0)
+    active_donors = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Impact rollup ({self.trees_total} trees)"
+
+
+class ImpactMonthlyRollup(models.Model):
+    """Paid trees bucketed by the month they were planted (or paid/created)."""
+
+    month = models.DateField(unique=True)
+    trees = models.BigIntegerField(default=0)
+    orders = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ["month"]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.trees} trees"
+
+
+class ImpactDonorRollup(models.Model):
+    """Paid order count per donor email, used to keep active_donors exact."""
+
+    email = models.EmailField(unique=True)
+    paid_orders = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.email} ({self.paid_orders} paid)"
+
+
+class KnownPlace(models.Model):
+    """Place names already resolved once, served by the local autocomplete index."""
+
+    SOURCE_CHOICES = (
+        ("mapbox", "Mapbox"),
+        ("donation", "Donation"),
+        ("gazetteer", "Gazetteer"),
+    )
+
+    place_name = models.CharField(max_length=255)
+    search_key = models.CharField(max_length=255)
+    country = models.CharField(max_length=8, blank=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["search_key", "country"], name="unique_known_place_key"
+            ),
+        ]
+
+    def __str__(self):
+        return self.place_name
+
+
+class RazorpayWebhookEvent(models.Model):
+    """Razorpay webhook deliveries, one row per event id (used for deduplication)."""
+
+    event_id = models.CharField(max_length=64, unique=True)
+    event = models.CharField(max_length=64)
+    razorpay_order_id = models.CharField(max_length=100, blank=True, db_index=True)
+    razorpay_payment_id = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event} ({self.event_id})"
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a request sent with an ``Idempotency-Key`` header."""
+
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    locked_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key"], name="unique_idempotency_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
@@ -0,0 +1,149 @@
+"""
+Settling paid orders.
+
+``verify_payment``, the Razorpay webhook and ``manage.py reconcile_payments``
+(see ``Tress/reconciliation.py``) all mark orders paid through
+``mark_donations_paid``, which also updates the impact rollup and queues the
+admin notification email.
+"""
+
+import logging
+from email.utils import parseaddr
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from GoGreen.response_cache import invalidate_on_commit
+from Users.outbox import enqueue_email
+
+from .formatting import (
+    carbon_offset_kg_per_year,
+    certificate_url,
+    mapbox_live_map_url,
+    mapbox_search_url,
+    mapbox_static_map_url,
+    tracking_url,
+)
+from .impact import apply_impact_changes, impact_contribution
+from .models import TreeDonation
+
+logger = logging.getLogger(__name__)
+
+
+def _admin_email():
+    candidate = (
+        settings.ADMIN_NOTIFICATION_EMAIL
+        or settings.EMAIL_HOST_USER
+        or settings.DEFAULT_FROM_EMAIL
+    )
+    parsed = parseaddr(candidate)[1]
+    return parsed or candidate
+
+
+def _build_admin_message(donation):
+    map_link = mapbox_live_map_url(donation.latitude, donation.longitude) or mapbox_search_url(
+        None,
+        None,
+        donation.planting_location,
+    )
+    if not map_link:
+        map_link = "-"
+    map_image = mapbox_static_map_url(donation.latitude, donation.longitude) or "-"
+    carbon_offset = carbon_offset_kg_per_year(
+        donation.trees_planted_count or donation.number_of_trees
+    )
+
+    lines = [
+        "A new tree donation has been paid successfully.",
+        "",
+        f"Donation ID: {donation.id}",
+        f"User Name: {donation.full_name}",
+        f"User Email: {donation.email}",
+        f"User Phone: {donation.phone}",
+        f"Trees Ordered: {donation.number_of_trees}",
+        f"Tree Species: {donation.tree_species or '-'}",
+        f"Objective: {donation.objective}",
+        f"Planting Location: {donation.planting_location}",
+        f"Latitude: {donation.latitude if donation.latitude is not None else '-'}",
+        f"Longitude: {donation.longitude if donation.longitude is not None else '-'}",
+        f"Mapbox Link: {map_link}",
+        f"Mapbox Static Preview: {map_image}",
+        f"Dedication: {donation.dedication_name or '-'}",
+        f"Notes: {donation.notes or '-'}",
+        f"Amount: {donation.amount_paise / 100:.2f} {donation.currency}",
+        f"Razorpay Order ID: {donation.razorpay_order_id}",
+        f"Razorpay Payment ID: {donation.razorpay_payment_id or '-'}",
+        f"Paid At: {donation.paid_at}",
+        f"Estimated Carbon Offset: {carbon_offset} kg/year",
+        f"Tracking URL: {tracking_url(donation.tracking_token)}",
+        f"Certificate URL: {certificate_url(donation.tracking_token)}",
+    ]
+    return "\n".join(lines)
+
+
+def _queue_admin_notification(donation):
+    recipient = _admin_email()
+    if not recipient:
+        logger.warning("Admin email is not configured. Skipping donation notification.")
+        return
+
+    enqueue_email(
+        f"New Tree Donation Paid (#{donation.id})",
+        _build_admin_message(donation),
+        [recipient],
+    )
+
+
+def mark_donations_paid(payments):
+    """
+    Mark donations paid exactly once; returns the ids this call changed.
+
+    ``payments`` maps donation id to ``(payment_id, signature)``. The
+    verify endpoint, the webhook and ``reconcile_payments`` all end up here,
+    possibly at the same time, so rows are re-read under a lock and only the
+    ones still unpaid are written (one ``bulk_update``), counted in the
+    impact rollup and announced to the admin.
+    """
+    with transaction.atomic():
+        donations = list(
+            TreeDonation.objects.select_for_update()
+            .filter(pk__in=list(payments))
+            .exclude(payment_status="paid")
+            .order_by("pk")
+        )
+        if not donations:
+            return []
+
+        paid_at = timezone.now()
+        impact_before = [impact_contribution(donation) for donation in donations]
+        for donation in donations:
+            payment_id, signature = payments[donation.pk]
+            donation.razorpay_payment_id = payment_id or donation.razorpay_payment_id
+            donation.razorpay_signature = signature or donation.razorpay_signature
+            donation.payment_status = "paid"
+            donation.paid_at = paid_at
+            donation.updated_at = paid_at
+        TreeDonation.objects.bulk_update(
+            donations,
+            [
+                "razorpay_payment_id",
+                "razorpay_signature",
+                "payment_status",
+                "paid_at",
+                "updated_at",
+            ],
+        )
+        apply_impact_changes(
+            (before, impact_contribution(donation))
+            for before, donation in zip(impact_before, donations)
+        )
+        for donation in donations:
+            _queue_admin_notification(donation)
+        # bulk_update() skips post_save, so the signal handler never runs.
+        invalidate_on_commit("public_impact")
+    return [donation.pk for donation in donations]
+
+
+def mark_donation_paid(donation, payment_id, signature=""):
+    return bool(mark_donations_paid({donation.pk: (payment_id, signature)}))
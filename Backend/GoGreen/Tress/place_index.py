@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.utils import OperationalError, ProgrammingError
+
+from .geocoding import normalize_geocode_key
+from .models import KnownPlace
+
+logger = logging.getLogger(__name__)
+
+
+def place_search_key(place_name):
+    return normalize_geocode_key(place_name)[0][:255]
+
+
+def build_known_place(place, country="", source="mapbox"):
+    """Turn a geocode result dict into an unsaved ``KnownPlace`` (or ``None``)."""
+    place_name = (place.get("place_name") or "").strip()
+    latitude = place.get("latitude")
+    longitude = place.get("longitude")
+    if not place_name or latitude is None or longitude is None:
+        return None
+    return KnownPlace(
+        place_name=place_name[:255],
+        search_key=place_search_key(place_name),
+        country=(country or "").strip().upper(),
+        latitude=latitude,
+        longitude=longitude,
+        source=source,
+    )
+
+
+class PlaceIndex:
+    """
+    In-memory sorted array of ``KnownPlace`` rows answering prefix lookups.
+
+    Entries are ``(search_key, country, place_name, latitude, longitude)``
+    tuples sorted by key, so a prefix query is one ``bisect`` plus a short
+    forward scan. The array is loaded lazily and reloaded every
+    ``PLACE_INDEX_RELOAD_SECONDS`` to pick up places added by other workers.
+    """
+
+    def __init__(self, reload_seconds):
+        self.reload_seconds = reload_seconds
+        self._entries = []
+        self._keys = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.reload_seconds:
+            return
+        try:
+            # Sorted in Python: database collations may not order by code point.
+            rows = sorted(
+                KnownPlace.objects.values_list(
+                    "search_key", "country", "place_name", "latitude", "longitude"
+                )
+            )
+        except (OperationalError, ProgrammingError):
+            logger.exception("Place index table is not ready. Falling back to Mapbox.")
+            rows = []
+        with self._lock:
+            self._entries = rows
+            self._keys = [row[0] for row in rows]
+            self._loaded_at = time.monotonic()
+
+    def search(self, query, country="", limit=5):
+        """Return up to ``limit`` known places whose name starts with ``query``."""
+        self._ensure_loaded()
+        prefix, country = normalize_geocode_key(query, country)
+        if not prefix:
+            return []
+
+        results = []
+        with self._lock:
+            position = bisect_left(self._keys, prefix)
+            while position < len(self._keys) and len(results) < limit:
+                key, place_country, place_name, latitude, longitude = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                if country and place_country.lower() != country:
+                    continue
+                results.append(
+                    {"place_name": place_name, "latitude": latitude, "longitude": longitude}
+                )
+        return results
+
+    def add(self, places, country="", source="mapbox"):
+        """Persist ``places`` (geocode result dicts) and add them to the local array."""
+        rows = {}
+        for place in places:
+            known_place = build_known_place(place, country, source)
+            if known_place is not None:
+                rows[known_place.search_key] = known_place
+        if not rows:
+            return 0
+
+        try:
+            KnownPlace.objects.bulk_create(rows.values(), ignore_conflicts=True)
+        except (OperationalError, ProgrammingError):
+            logger.exception("Unable to store known places.")
+            return 0
+
+        with self._lock:
+            for place in rows.values():
+                entry = (
+                    place.search_key,
+                    place.country,
+                    place.place_name,
+                    place.latitude,
+                    place.longitude,
+                )
+                position = bisect_left(self._entries, entry[:2])
+                if position < len(self._entries) and self._entries[position][:2] == entry[:2]:
+                    continue
+                insort(self._entries, entry)
+                insort(self._keys, entry[0])
+        return len(rows)
+
+
+place_index = PlaceIndex(reload_seconds=settings.PLACE_INDEX_RELOAD_SECONDS)
@@ -0,0 +1,267 @@
+"""
+Bulk import of plantation details and proof images from a field drive.
+
+Input is a CSV with one row per order, keyed by tracking token:
+
+    tracking_token,planted_latitude,planted_longitude,plantation_date,
+    trees_planted_count,planted_location,plantation_update,thank_you_note,
+    proof_image_1,proof_image_2
+
+Every column except ``tracking_token`` may be blank, which leaves the stored
+value alone. ``proof_image_*`` name files in an image folder or zip archive.
+
+Rows are validated first, then all referenced images are processed (see
+``GoGreen/image_processing.py``) and uploaded through a bounded thread pool,
+then the surviving rows are written with ``bulk_update`` in chunks (adjusting
+the impact rollup like any other edit). Approval stays a separate step: filter
+the imported orders in the admin and approve them there.
+
+Uploads go to Cloudinary (``IMAGE_UPLOAD_BACKEND=cloudinary``) or, for local
+work without credentials, to ``MEDIA_ROOT`` (``IMAGE_UPLOAD_BACKEND=local``).
+"""
+
+import csv
+import logging
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from GoGreen.image_processing import process_image
+from GoGreen.image_storage import get_uploader, upload_renditions
+from GoGreen.response_cache import invalidate_on_commit
+
+from .impact import apply_impact_changes, impact_contribution
+from .models import TreeDonation
+
+logger = logging.getLogger(__name__)
+
+PROOF_FOLDER = "tree_proofs"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+_TEXT_COLUMNS = ("planted_location", "plantation_update", "thank_you_note")
+_FLOAT_COLUMNS = ("planted_latitude", "planted_longitude")
+_UPDATE_FIELDS = (
+    *_FLOAT_COLUMNS,
+    "plantation_date",
+    "trees_planted_count",
+    *_TEXT_COLUMNS,
+    *TreeDonation.PROOF_IMAGE_FIELDS,
+    "image_urls",
+    "updated_at",
+)
+
+
+@dataclass
+class ImportResult:
+    updated: int = 0
+    images_uploaded: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.errors.append(f"line {line}: {message}")
+
+
+class ImageSource:
+    """Image files by base name, from a folder or a zip archive (path or file object)."""
+
+    def __init__(self, source=None):
+        self._zip = None
+        self._files = {}
+        if source is None:
+            return
+        if isinstance(source, (str, Path)) and Path(source).is_dir():
+            for path in Path(source).rglob("*"):
+                if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+                    self._files.setdefault(path.name, path)
+            return
+        self._zip = zipfile.ZipFile(source)
+        for info in self._zip.infolist():
+            name = PurePosixPath(info.filename).name
+            if not info.is_dir() and PurePosixPath(name).suffix.lower() in IMAGE_EXTENSIONS:
+                self._files.setdefault(name, info)
+
+    def __contains__(self, name):
+        return name in self._files
+
+    def open(self, name):
+        entry = self._files[name]
+        if self._zip is not None:
+            return self._zip.open(entry)
+        return open(entry, "rb")
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+def _parse_row(row):
+    """Turn one CSV row into ``{field: value}`` for non-blank cells; raises ``ValueError``."""
+    values = {}
+    for column in _FLOAT_COLUMNS:
+        if row.get(column):
+            values[column] = float(row[column])
+    if "planted_latitude" in values and not -90 <= values["planted_latitude"] <= 90:
+        raise ValueError("planted_latitude must be between -90 and 90")
+    if "planted_longitude" in values and not -180 <= values["planted_longitude"] <= 180:
+        raise ValueError("planted_longitude must be between -180 and 180")
+    if row.get("plantation_date"):
+        values["plantation_date"] = datetime.strptime(row["plantation_date"], "%Y-%m-%d").date()
+    if row.get("trees_planted_count"):
+        values["trees_planted_count"] = int(row["trees_planted_count"])
+        if values["trees_planted_count"] < 0:
+            raise ValueError("trees_planted_count must not be negative")
+    for column in _TEXT_COLUMNS:
+        if row.get(column):
+            values[column] = row[column]
+    return values
+
+
+def read_import_rows(csv_file, images, result):
+    """
+    Validate the CSV against the database and image source.
+
+    Returns ``{tracking_token: (line, values, {field: image_name})}``; problems
+    are recorded on ``result`` and the row is dropped.
+    """
+    reader = csv.DictReader(csv_file)
+    if not reader.fieldnames or "tracking_token" not in reader.fieldnames:
+        raise ValueError("CSV must have a tracking_token column")
+
+    parsed = {}
+    for line, raw in enumerate(reader, start=2):
+        row = {key: (value or "").strip() for key, value in raw.items() if key}
+        try:
+            token = uuid.UUID(row.get("tracking_token", ""))
+            values = _parse_row(row)
+        except ValueError as exc:
+            result.add_error(line, str(exc) or "invalid value")
+            continue
+        if token in parsed:
+            result.add_error(line, f"tracking token {token} repeats line {parsed[token][0]}")
+            continue
+        image_names = {
+            field_name: row[field_name]
+            for field_name in TreeDonation.PROOF_IMAGE_FIELDS
+            if row.get(field_name)
+        }
+        missing = [name for name in image_names.values() if name not in images]
+        if missing:
+            result.add_error(line, f"image not found: {', '.join(missing)}")
+            continue
+        parsed[token] = (line, values, image_names)
+
+    known = set(
+        TreeDonation.objects.filter(tracking_token__in=list(parsed)).values_list(
+            "tracking_token", flat=True
+        )
+    )
+    for token in [token for token in parsed if token not in known]:
+        result.add_error(parsed.pop(token)[0], f"no order with tracking token {token}")
+    return parsed
+
+
+def upload_images(parsed, images, uploader, workers, result):
+    """
+    Process and upload every referenced image with at most ``workers`` in flight.
+
+    Returns ``{(tracking_token, field): (stored_value, urls)}``. A row with a
+    failed upload is dropped from ``parsed`` so it is not half-applied.
+    """
+    jobs = [
+        (token, field_name, name)
+        for token, (_, _, image_names) in parsed.items()
+        for field_name, name in image_names.items()
+    ]
+
+    def _upload(job):
+        token, field_name, name = job
+        with images.open(name) as fileobj:
+            data = fileobj.read()
+        processed = process_image(data, settings.PROOF_IMAGE_MAX_DIMENSION)
+        return upload_renditions(uploader, PurePosixPath(name).stem, processed)
+
+    uploaded = {}
+    failed = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_upload, job): job for job in jobs}
+        for future, (token, field_name, name) in futures.items():
+            try:
+                uploaded[(token, field_name)] = future.result()
+            except Exception as exc:
+                logger.exception("Proof image upload failed for %s", name)
+                if token not in failed:
+                    failed.add(token)
+                    result.add_error(parsed[token][0], f"upload of {name} failed: {exc}")
+    for token in failed:
+        parsed.pop(token)
+    result.images_uploaded = sum(1 for token, _ in uploaded if token not in failed)
+    return uploaded
+
+
+def apply_import(parsed, uploaded, chunk_size, result):
+    tokens = list(parsed)
+    for offset in range(0, len(tokens), chunk_size):
+        chunk = tokens[offset : offset + chunk_size]
+        now = timezone.now()
+        with transaction.atomic():
+            donations = list(
+                TreeDonation.objects.select_for_update()
+                .filter(tracking_token__in=chunk)
+                .order_by("pk")
+            )
+            impact_before = [impact_contribution(donation) for donation in donations]
+            for donation in donations:
+                _, values, image_names = parsed[donation.tracking_token]
+                for field_name, value in values.items():
+                    setattr(donation, field_name, value)
+                image_urls = dict(donation.image_urls or {})
+                for field_name in image_names:
+                    stored, urls = uploaded[(donation.tracking_token, field_name)]
+                    setattr(donation, field_name, stored)
+                    image_urls[field_name] = urls
+                donation.image_urls = image_urls
+                donation.updated_at = now
+            TreeDonation.objects.bulk_update(donations, _UPDATE_FIELDS)
+            apply_impact_changes(
+                (before, impact_contribution(donation))
+                for before, donation in zip(impact_before, donations)
+            )
+            # bulk_update() skips post_save, so the signal handlers never run.
+            invalidate_on_commit("public_impact")
+        result.updated += len(donations)
+
+
+def import_plantation_proofs(
+    csv_file, images, uploader=None, workers=None, chunk_size=None, dry_run=False
+):
+    """
+    Run a full import; returns an ``ImportResult``. ``csv_file`` is a text stream.
+
+    With ``dry_run`` only validation runs and ``updated`` counts the rows that
+    would be written.
+    """
+    result = ImportResult()
+    parsed = read_import_rows(csv_file, images, result)
+    if dry_run:
+        result.updated = len(parsed)
+        return result
+    if not parsed:
+        return result
+    uploaded = upload_images(
+        parsed,
+        images,
+        uploader or get_uploader(PROOF_FOLDER),
+        workers or settings.PROOF_UPLOAD_WORKERS,
+        result,
+    )
+    apply_import(
+        parsed, uploaded, chunk_size or settings.ADMIN_BULK_ACTION_CHUNK_SIZE, result
+    )
+    return result
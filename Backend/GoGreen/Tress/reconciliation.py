@@ -0,0 +1,138 @@
+"""
+Reconcile unpaid ``TreeDonation`` rows with Razorpay's payment list.
+
+Instead of one ``GET /payments/<id>`` per order, the payments created in the
+reconciliation window are listed once (``GET /payments?from=&to=&count=&skip=``),
+one day slice per request stream, several slices at a time. The result is
+reduced to the most advanced payment per order id, and stale orders are then
+settled against that map in primary-key batches.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+
+from .models import TreeDonation
+
+logger = logging.getLogger(__name__)
+
+RAZORPAY_LIST_PAGE_SIZE = 100
+PAYMENT_STATUS_RANK = {"failed": 1, "authorized": 2, "captured": 3}
+SETTLED_PAYMENT_STATUSES = {"authorized", "captured"}
+
+
+def _fetch_payment_slice(client, start, end, page_size):
+    """Page through payments created in ``[start, end)``; raises ``RequestException``."""
+    payments = []
+    skip = 0
+    while True:
+        response = client.get(
+            "payments",
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+            params={
+                "from": int(start.timestamp()),
+                "to": int(end.timestamp()) - 1,
+                "count": page_size,
+                "skip": skip,
+            },
+        )
+        response.raise_for_status()
+        items = response.json().get("items") or []
+        payments.extend(items)
+        if len(items) < page_size:
+            return payments
+        skip += page_size
+
+
+def fetch_order_payments(client, since, until, concurrency=4, page_size=RAZORPAY_LIST_PAGE_SIZE):
+    """
+    Return ``{order_id: payment}`` for payments created between ``since`` and ``until``.
+
+    When an order has several attempts, the captured (then authorized, then
+    failed) one wins.
+    """
+    slices = []
+    start = since
+    while start < until:
+        end = min(start + timedelta(days=1), until)
+        slices.append((start, end))
+        start = end
+
+    by_order = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pages = pool.map(lambda bounds: _fetch_payment_slice(client, *bounds, page_size), slices)
+        for payments in pages:
+            for payment in payments:
+                order_id = payment.get("order_id")
+                rank = PAYMENT_STATUS_RANK.get(payment.get("status"), 0)
+                if not order_id or not rank:
+                    continue
+                current = by_order.get(order_id)
+                if current is None or rank > PAYMENT_STATUS_RANK[current["status"]]:
+                    by_order[order_id] = {
+                        "id": payment.get("id"),
+                        "status": payment.get("status"),
+                        "amount": payment.get("amount"),
+                    }
+    return by_order
+
+
+def stale_unpaid_queryset(since, stale_before):
+    """Created/failed donations from ``[since, stale_before)`` in primary-key order."""
+    return (
+        TreeDonation.objects.filter(
+            payment_status__in=("created", "failed"),
+            created_at__gte=since,
+            created_at__lt=stale_before,
+        )
+        .only("id", "payment_status", "razorpay_order_id", "amount_paise")
+        .order_by("pk")
+    )
+
+
+def stale_unpaid_donations(since, stale_before, after_id=0, batch_size=500):
+    """Yield batches of created/failed donations, walking the primary key from ``after_id``."""
+    queryset = stale_unpaid_queryset(since, stale_before)
+    while True:
+        batch = list(queryset.filter(pk__gt=after_id)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        after_id = batch[-1].pk
+
+
+def plan_reconciliation(donations, payments_by_order, fail_abandoned=False):
+    """
+    Split one batch into ``(to_paid, to_failed, mismatched)``.
+
+    ``to_paid`` maps donation id to ``(payment_id, "")`` for
+    ``Tress.payments.mark_donations_paid``; ``to_failed`` lists ids still
+    ``created`` whose only attempts failed (or that never had one, with
+    ``fail_abandoned``).
+    """
+    to_paid = {}
+    to_failed = []
+    mismatched = []
+    for donation in donations:
+        payment = payments_by_order.get(donation.razorpay_order_id)
+        if payment is None:
+            if fail_abandoned and donation.payment_status == "created":
+                to_failed.append(donation.pk)
+            continue
+        if payment["status"] in SETTLED_PAYMENT_STATUSES:
+            if payment["amount"] != donation.amount_paise:
+                mismatched.append(donation.pk)
+                logger.warning(
+                    "Payment %s amount %s does not match donation %s (%s paise)",
+                    payment["id"],
+                    payment["amount"],
+                    donation.pk,
+                    donation.amount_paise,
+                )
+                continue
+            to_paid[donation.pk] = (payment["id"], "")
+        elif donation.payment_status == "created":
+            to_failed.append(donation.pk)
+    return to_paid, to_failed, mismatched
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from GoGreen.image_urls import sync_image_urls
+from GoGreen.response_cache import invalidate_on_commit
+
+from .models import TreeDonation
+
+
+@receiver(post_save, sender=TreeDonation)
+@receiver(post_delete, sender=TreeDonation)
+def invalidate_public_impact(sender, **kwargs):
+    invalidate_on_commit("public_impact")
+
+
+@receiver(post_save, sender=TreeDonation)
+def store_proof_image_urls(sender, instance, update_fields=None, raw=False, **kwargs):
+    proof_fields = set(TreeDonation.PROOF_IMAGE_FIELDS)
+    if raw or (update_fields is not None and not set(update_fields) & proof_fields):
+        return
+    if update_fields is not None and "image_urls" in update_fields:
+        # Saved by Users.image_queue, which already stored the URLs.
+        return
+    sync_image_urls(instance, TreeDonation.PROOF_IMAGE_FIELDS)
@@ -0,0 +1,290 @@
+import hashlib
+import hmac
+import json
+import re
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib import admin
+from django.db import IntegrityError, connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from GoGreen.auth_tokens import issue_tokens
+from Users.models import OutboundEmail, User, UserReview
+from Users.outbox import due_emails
+from Users.views import _public_reviews, _verified_accounts
+
+from .impact import (
+    compute_impact_rollup,
+    growth_bucket_totals,
+    paid_donations_after,
+    read_growth_buckets,
+    store_impact_rollup,
+)
+from .models import RazorpayWebhookEvent, TreeDonation
+from .reconciliation import stale_unpaid_queryset
+from .views import _orders_page, _tracked_order, _visible_order, _visible_orders
+
+SEED_DONATIONS = 600
+
+
+class HotQueryIndexTests(TestCase):
+    """EXPLAIN the hot read paths and fail when one of them scans a whole table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                email=f"donor{index}@example.com",
+                full_name=f"Donor {index}",
+                phone="9999999999",
+                is_verified=True,
+            )
+            for index in range(5)
+        ]
+        statuses = [
+            ("created", "pending"),
+            ("failed", "pending"),
+            ("paid", "pending"),
+            ("paid", "approved"),
+            ("paid", "rejected"),
+        ]
+        TreeDonation.objects.bulk_create(
+            [
+                TreeDonation(
+                    user=cls.users[index % len(cls.users)],
+                    full_name=f"Donor {index % len(cls.users)}",
+                    email=f"donor{index % len(cls.users)}@example.com",
+                    phone="9999999999",
+                    number_of_trees=1 + index % 7,
+                    planting_location="Campus",
+                    objective="Greener campus",
+                    amount_paise=10000 * (1 + index % 7),
+                    payment_status=statuses[index % len(statuses)][0],
+                    approval_status=statuses[index % len(statuses)][1],
+                    razorpay_order_id=f"order_seed_{index}",
+                    is_user_deleted=index % 11 == 0,
+                )
+                for index in range(SEED_DONATIONS)
+            ]
+        )
+        UserReview.objects.bulk_create(
+            [
+                UserReview(
+                    user=user,
+                    full_name=user.full_name,
+                    email=user.email,
+                    rating=5,
+                    is_public=index % 2 == 0,
+                )
+                for index, user in enumerate(cls.users)
+            ]
+        )
+        OutboundEmail.objects.bulk_create(
+            [
+                OutboundEmail(subject="Seed", body="Seed", recipients=["a@example.com"])
+                for _ in range(50)
+            ]
+        )
+        cls.donation = TreeDonation.objects.filter(is_user_deleted=False).first()
+        cls.admin_user = User.objects.create_superuser(
+            email="admin@example.com", password="x", full_name="Admin", phone="9999999999"
+        )
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # With a few hundred rows Postgres would rightly prefer a seq scan;
+            # disabling it shows whether an index path exists at all.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def changelist_queryset(self, **params):
+        """The queryset the donation admin changelist pages through for ``params``."""
+        request = RequestFactory().get("/admin/Tress/treedonation/", params)
+        request.user = self.admin_user
+        return admin.site._registry[TreeDonation].get_changelist_instance(request).queryset
+
+    def assertNoSequentialScan(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == "postgresql":
+            full_scans = re.findall(r"Seq Scan on \S+", plan)
+        elif connection.vendor == "sqlite":
+            full_scans = [
+                line
+                for line in plan.splitlines()
+                if re.search(r"\bSCAN \w+$", line.strip())
+            ]
+        else:
+            self.skipTest(f"No plan check for {connection.vendor}")
+        self.assertEqual(full_scans, [], f"Sequential scan in plan:\n{plan}")
+
+    def test_user_orders_page(self):
+        orders = _visible_orders(self.users[0].id)
+        self.assertNoSequentialScan(_orders_page(orders)[:21])
+        newest = _orders_page(orders).first()
+        self.assertNoSequentialScan(
+            _orders_page(orders, (newest.created_at, newest.id))[:21]
+        )
+
+    def test_user_orders_validator(self):
+        self.assertNoSequentialScan(_visible_orders(self.users[0].id))
+
+    def test_user_order_detail(self):
+        self.assertNoSequentialScan(_visible_order(self.donation.user_id, self.donation.id))
+
+    def test_tracking_lookup(self):
+        self.assertNoSequentialScan(_tracked_order(self.donation.tracking_token))
+
+    def test_impact_rollup_chunk(self):
+        self.assertNoSequentialScan(paid_donations_after(TreeDonation.objects.all(), 0)[:500])
+
+    def test_growth_buckets(self):
+        since = timezone.localdate() - timedelta(days=30)
+        for granularity in ("day", "week"):
+            with self.subTest(granularity=granularity):
+                self.assertNoSequentialScan(growth_bucket_totals(granularity, since))
+
+    def test_admin_default_changelist(self):
+        self.assertNoSequentialScan(self.changelist_queryset()[:100])
+
+    def test_admin_status_filter(self):
+        self.assertNoSequentialScan(
+            self.changelist_queryset(payment_status__exact="paid", approval_status__exact="pending")
+        )
+
+    def test_reconcile_scan(self):
+        now = timezone.now()
+        self.assertNoSequentialScan(
+            stale_unpaid_queryset(now - timedelta(days=7), now).filter(pk__gt=0)[:500]
+        )
+
+    def test_verified_user_lookup(self):
+        self.assertNoSequentialScan(_verified_accounts(self.users[0].email))
+
+    def test_public_reviews(self):
+        self.assertNoSequentialScan(_public_reviews())
+
+    def test_outbox_due(self):
+        self.assertNoSequentialScan(due_emails(timezone.now())[:50])
+
+
+
+class OrderEditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="donor@example.com",
+            full_name="Donor",
+            phone="9999999999",
+            is_verified=True,
+        )
+        cls.donation = TreeDonation.objects.create(
+            user=cls.user,
+            full_name="Donor",
+            email="donor@example.com",
+            phone="9999999999",
+            number_of_trees=1,
+            planting_location="Campus",
+            objective="Greener campus",
+            amount_paise=10000,
+            razorpay_order_id="order_edit_1",
+        )
+
+    def edit(self, **changes):
+        token = issue_tokens(self.user)["access_token"]
+        return self.client.put(
+            reverse("user_tree_order_detail", args=[self.donation.pk]),
+            json.dumps(changes),
+            content_type="application/json",
+            secure=True,
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+    def test_tree_count_is_fixed_after_checkout(self):
+        response = self.edit(number_of_trees=50)
+        self.assertEqual(response.status_code, 400)
+        self.donation.refresh_from_db()
+        self.assertEqual((self.donation.number_of_trees, self.donation.amount_paise), (1, 10000))
+
+    def test_unchanged_tree_count_is_accepted(self):
+        response = self.edit(number_of_trees=1, notes="Near the gate")
+        self.assertEqual(response.status_code, 200)
+        self.donation.refresh_from_db()
+        self.assertEqual(self.donation.notes, "Near the gate")
+
+
+class GrowthBucketTests(TestCase):
+    def test_granularities_agree(self):
+        today = timezone.localdate()
+        user = User.objects.create_user(
+            email="donor@example.com", full_name="Donor", phone="9999999999"
+        )
+        common = {
+            "user": user,
+            "full_name": "Donor",
+            "email": "donor@example.com",
+            "phone": "9999999999",
+            "planting_location": "Campus",
+            "objective": "Greener campus",
+            "amount_paise": 30000,
+            "payment_status": "paid",
+        }
+        TreeDonation.objects.create(
+            number_of_trees=3,
+            trees_planted_count=0,
+            plantation_date=today,
+            razorpay_order_id="order_growth_1",
+            **common,
+        )
+        TreeDonation.objects.create(
+            number_of_trees=2,
+            trees_planted_count=5,
+            paid_at=timezone.now(),
+            razorpay_order_id="order_growth_2",
+            **common,
+        )
+        TreeDonation.objects.create(
+            number_of_trees=4,
+            plantation_date=today - timedelta(days=400),
+            razorpay_order_id="order_growth_3",
+            **common,
+        )
+        store_impact_rollup(*compute_impact_rollup())
+
+        month = sum(trees for period, trees in read_growth_buckets("month", 1))
+        self.assertEqual(month, 8)
+        for granularity in ("day", "week"):
+            with self.subTest(granularity=granularity):
+                totals = dict(growth_bucket_totals(granularity, today.replace(day=1)))
+                self.assertEqual(sum(totals.values()), month)
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET="webhook-secret")
+class RazorpayWebhookTests(TestCase):
+    def deliver(self, event_id):
+        body = json.dumps(
+            {"event": "payment.failed", "payload": {"order": {"entity": {"id": "order_1"}}}}
+        ).encode()
+        signature = hmac.new(b"webhook-secret", body, hashlib.sha256).hexdigest()
+        return Client(raise_request_exception=False).post(
+            reverse("razorpay_webhook"),
+            body,
+            content_type="application/json",
+            secure=True,
+            HTTP_X_RAZORPAY_SIGNATURE=signature,
+            HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def test_repeated_event_is_skipped(self):
+        self.assertEqual(self.deliver("evt_1").json(), {"status": "unknown_order"})
+        self.assertEqual(self.deliver("evt_1").json(), {"status": "duplicate"})
+
+    def test_integrity_error_while_applying_is_retried(self):
+        with mock.patch(
+            "Tress.views._apply_razorpay_event", side_effect=IntegrityError("rollup")
+        ), self.assertLogs("django.request", "ERROR"):
+            self.assertEqual(self.deliver("evt_2").status_code, 500)
+        self.assertFalse(RazorpayWebhookEvent.objects.filter(event_id="evt_2").exists())
+        self.assertEqual(self.deliver("evt_2").json(), {"status": "unknown_order"})
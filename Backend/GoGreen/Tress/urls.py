@@ -1,14 +1,22 @@
-from django.urls import path
+from django.urls import path, register_converter
 
 from . import views
+from .converters import TrackingTokenConverter
+
+register_converter(TrackingTokenConverter, "tracking_token")
 
 urlpatterns = [
     path("config/", views.payment_config, name="payment_config"),
     path("geocode/", views.geocode_locations, name="geocode_locations"),
+    path("geocode/stats/", views.geocode_cache_stats, name="geocode_cache_stats"),
+    path("upstream/stats/", views.upstream_stats, name="upstream_stats"),
     path("public-impact/", views.public_impact, name="public_impact"),
     path("create-order/", views.create_order, name="create_tree_order"),
     path("verify-payment/", views.verify_payment, name="verify_tree_payment"),
+    path("razorpay/webhook/", views.razorpay_webhook, name="razorpay_webhook"),
     path("orders/", views.user_orders, name="user_tree_orders"),
     path("orders/<int:donation_id>/", views.user_order_detail, name="user_tree_order_detail"),
-    path("track/<str:tracking_token>/", views.track_order, name="track_tree_order"),
+    path("track/<tracking_token:tracking_token>/", views.track_order, name="track_tree_order"),
+    # Anything else is a malformed token: answer in JSON without a query.
+    path("track/<str:tracking_token>/", views.track_order_not_found),
 ]
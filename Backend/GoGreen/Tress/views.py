@@ -1,228 +1,361 @@
+import base64
 import hashlib
 import hmac
 import json
 import logging
 import secrets
-from datetime import date
-from email.utils import parseaddr
-from urllib.parse import quote
+from datetime import datetime
 
 import requests
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import IntegerField, Sum
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
 from django.db.models.functions import Coalesce
-from django.db.utils import OperationalError, ProgrammingError
+from django.db.utils import IntegrityError, OperationalError, ProgrammingError
 from django.http import JsonResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
-from Users.models import User
-
-from .models import TreeDonation
+from GoGreen.auth_tokens import request_claims
+from GoGreen.conditional import conditional_view
+from GoGreen.http_client import CircuitOpenError, mapbox_client, razorpay_client
+from GoGreen.image_urls import stored_image_url
+from GoGreen.rate_limit import rate_limit
+from GoGreen.response_cache import get_or_refresh
+from Users.user_cache import verified_user_cache
+
+from .formatting import (
+    carbon_offset_kg_per_year,
+    certificate_url,
+    isoformat,
+    map_url_templates,
+    mapbox_live_map_url,
+    mapbox_search_url,
+    mapbox_static_map_url,
+    planted_tree_count,
+    tracking_url,
+)
+from .geocoding import GEOCODE_RESULT_LIMIT, fetch_mapbox_places, geocode_cache
+from .idempotency import idempotent
+from .impact import (
+    DEFAULT_GROWTH_WINDOW,
+    GROWTH_GRANULARITIES,
+    GROWTH_WINDOW_LIMITS,
+    ROLLUP_FIELDS,
+    apply_impact_change,
+    impact_contribution,
+    read_growth_buckets,
+    read_impact_rollup,
+)
+from .models import RazorpayWebhookEvent, TreeDonation
+from .payments import mark_donation_paid
+from .place_index import place_index
 
 logger = logging.getLogger(__name__)
 
+ORDERS_PAGE_DEFAULT_LIMIT = 20
+ORDERS_PAGE_MAX_LIMIT = 100
+RAZORPAY_WEBHOOK_EVENTS = {"payment.captured", "payment.failed", "order.paid"}
+
+
+# Each serialized key maps to a builder(donation, templates); nested dicts are
+# built from their own tables so unrequested sections cost nothing.
+_USER_ORDER_DETAIL_FIELDS = {
+    "full_name": lambda d, t: d.full_name,
+    "email": lambda d, t: d.email,
+    "phone": lambda d, t: d.phone,
+    "number_of_trees": lambda d, t: d.number_of_trees,
+    "tree_species": lambda d, t: d.tree_species,
+    "planting_location": lambda d, t: d.planting_location,
+    "latitude": lambda d, t: d.latitude,
+    "longitude": lambda d, t: d.longitude,
+    "requested_map_url": lambda d, t: mapbox_search_url(
+        d.latitude, d.longitude, d.planting_location, t
+    ),
+    "requested_map_live_url": lambda d, t: mapbox_live_map_url(d.latitude, d.longitude, t),
+    "requested_map_image_url": lambda d, t: mapbox_static_map_url(
+        d.latitude, d.longitude, t
+    ),
+    "objective": lambda d, t: d.objective,
+    "dedication_name": lambda d, t: d.dedication_name,
+    "notes": lambda d, t: d.notes,
+    "created_at": lambda d, t: isoformat(d.created_at),
+    "amount_paise": lambda d, t: d.amount_paise,
+    "currency": lambda d, t: d.currency,
+}
+
+_APPROVAL_DETAIL_FIELDS = {
+    "approval_status": lambda d, t: d.approval_status,
+    "approved_at": lambda d, t: isoformat(d.approved_at),
+    "planted_location": lambda d, t: d.planted_location,
+    "planted_latitude": lambda d, t: d.planted_latitude,
+    "planted_longitude": lambda d, t: d.planted_longitude,
+    "planted_map_url": lambda d, t: mapbox_search_url(
+        d.planted_latitude, d.planted_longitude, d.planted_location, t
+    ),
+    "planted_map_live_url": lambda d, t: mapbox_live_map_url(
+        d.planted_latitude, d.planted_longitude, t
+    ),
+    "planted_map_image_url": lambda d, t: mapbox_static_map_url(
+        d.planted_latitude, d.planted_longitude, t
+    ),
+    "plantation_date": lambda d, t: isoformat(d.plantation_date),
+    "trees_planted_count": lambda d, t: d.trees_planted_count,
+    "plantation_update": lambda d, t: d.plantation_update,
+    "thank_you_note": lambda d, t: d.thank_you_note,
+    "proof_image_1_url": lambda d, t: stored_image_url(d, "proof_image_1"),
+    "proof_image_1_thumbnail_url": lambda d, t: stored_image_url(
+        d, "proof_image_1", "thumbnail"
+    ),
+    "proof_image_1_medium_url": lambda d, t: stored_image_url(
+        d, "proof_image_1", "medium"
+    ),
+    "proof_image_2_url": lambda d, t: stored_image_url(d, "proof_image_2"),
+    "proof_image_2_thumbnail_url": lambda d, t: stored_image_url(
+        d, "proof_image_2", "thumbnail"
+    ),
+    "proof_image_2_medium_url": lambda d, t: stored_image_url(
+        d, "proof_image_2", "medium"
+    ),
+}
+
+_DONATION_FIELDS = {
+    "id": lambda d, t: d.id,
+    "full_name": lambda d, t: d.full_name,
+    "email": lambda d, t: d.email,
+    "phone": lambda d, t: d.phone,
+    "number_of_trees": lambda d, t: d.number_of_trees,
+    "tree_species": lambda d, t: d.tree_species,
+    "planting_location": lambda d, t: d.planting_location,
+    "latitude": lambda d, t: d.latitude,
+    "longitude": lambda d, t: d.longitude,
+    "objective": lambda d, t: d.objective,
+    "dedication_name": lambda d, t: d.dedication_name,
+    "notes": lambda d, t: d.notes,
+    "amount_paise": lambda d, t: d.amount_paise,
+    "currency": lambda d, t: d.currency,
+    "payment_status": lambda d, t: d.payment_status,
+    "approval_status": lambda d, t: d.approval_status,
+    "razorpay_order_id": lambda d, t: d.razorpay_order_id,
+    "razorpay_payment_id": lambda d, t: d.razorpay_payment_id,
+    "created_at": lambda d, t: isoformat(d.created_at),
+    "paid_at": lambda d, t: isoformat(d.paid_at),
+    "approved_at": lambda d, t: isoformat(d.approved_at),
+    "planted_location": lambda d, t: d.planted_location,
+    "planted_latitude": lambda d, t: d.planted_latitude,
+    "planted_longitude": lambda d, t: d.planted_longitude,
+    "plantation_date": lambda d, t: isoformat(d.plantation_date),
+    "trees_planted_count": lambda d, t: d.trees_planted_count,
+    "plantation_update": lambda d, t: d.plantation_update,
+    "thank_you_note": lambda d, t: d.thank_you_note,
+    "proof_image_1_url": lambda d, t: stored_image_url(d, "proof_image_1"),
+    "proof_image_1_thumbnail_url": lambda d, t: stored_image_url(
+        d, "proof_image_1", "thumbnail"
+    ),
+    "proof_image_1_medium_url": lambda d, t: stored_image_url(
+        d, "proof_image_1", "medium"
+    ),
+    "proof_image_2_url": lambda d, t: stored_image_url(d, "proof_image_2"),
+    "proof_image_2_thumbnail_url": lambda d, t: stored_image_url(
+        d, "proof_image_2", "thumbnail"
+    ),
+    "proof_image_2_medium_url": lambda d, t: stored_image_url(
+        d, "proof_image_2", "medium"
+    ),
+    "tracking_token": lambda d, t: d.tracking_token,
+    "tracking_url": lambda d, t: tracking_url(d.tracking_token),
+    "certificate_url": lambda d, t: certificate_url(d.tracking_token),
+    "impact": lambda d, t: {
+        "carbon_offset_kg_per_year": carbon_offset_kg_per_year(planted_tree_count(d)),
+        "trees_counted": planted_tree_count(d),
+        "unit": "kg/year",
+    },
+    "user_order_details": _USER_ORDER_DETAIL_FIELDS,
+    "approval_details": _APPROVAL_DETAIL_FIELDS,
+}
+
+# ?view=compact: enough for order lists and cards, no nested sections or map URLs.
+_COMPACT_DONATION_FIELDS = {
+    field: None
+    for field in (
+        "id",
+        "number_of_trees",
+        "tree_species",
+        "planting_location",
+        "amount_paise",
+        "currency",
+        "payment_status",
+        "approval_status",
+        "created_at",
+        "paid_at",
+        "approved_at",
+        "plantation_date",
+        "trees_planted_count",
+        "proof_image_1_thumbnail_url",
+        "tracking_token",
+        "tracking_url",
+        "certificate_url",
+        "impact",
+    )
+}
+
+_TRACKING_HIDDEN_FIELDS = ("email", "phone")
+
+
+def _build_fields(donation, builders, fields, templates):
+    data = {}
+    for key, builder in builders.items():
+        if fields is not None and key not in fields:
+            continue
+        if isinstance(builder, dict):
+            data[key] = _build_fields(
+                donation,
+                builder,
+                None if fields is None else fields[key],
+                templates,
+            )
+        else:
+            data[key] = builder(donation, templates)
+    return data
 
-def _tracking_url(token):
-    return f"{settings.FRONTEND_URL}/track/{token}"
 
+def _requested_donation_fields(request):
+    """
+    Parse ``?view=`` / ``?fields=`` into a field selection (``None`` = everything).
+
+    ``fields`` is comma separated; ``section.key`` picks a single key from
+    ``user_order_details`` or ``approval_details``. Raises ``ValueError`` with a
+    client-facing message on unknown names.
+    """
+    view = (request.GET.get("view") or "full").strip().lower()
+    if view not in {"full", "compact"}:
+        raise ValueError("View must be either full or compact")
+
+    raw_fields = (request.GET.get("fields") or "").strip()
+    if not raw_fields:
+        return dict(_COMPACT_DONATION_FIELDS) if view == "compact" else None
+
+    selection = {}
+    unknown = []
+    for name in (item.strip() for item in raw_fields.split(",")):
+        if not name:
+            continue
+        section, _, key = name.partition(".")
+        builder = _DONATION_FIELDS.get(section)
+        if builder is None or (key and (not isinstance(builder, dict) or key not in builder)):
+            unknown.append(name)
+            continue
+        if not key:
+            selection[section] = None
+        elif section not in selection or selection[section] is not None:
+            selection.setdefault(section, set()).add(key)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return selection
+
+
+def _serialize_donation(donation, fields=None, templates=None):
+    return _build_fields(
+        donation,
+        _DONATION_FIELDS,
+        fields,
+        templates or map_url_templates(),
+    )
 
-def _certificate_url(token):
-    return f"{settings.FRONTEND_URL}/certificate/{token}"
 
+def _serialize_tracking(donation, fields=None, templates=None):
+    data = _serialize_donation(donation, fields, templates)
+    for field in _TRACKING_HIDDEN_FIELDS:
+        data.pop(field, None)
+    if "user_order_details" in data:
+        for field in _TRACKING_HIDDEN_FIELDS:
+            data["user_order_details"].pop(field, None)
+    return data
 
-def _mapbox_live_map_url(latitude, longitude):
-    if latitude is None or longitude is None:
-        return None
-    if not settings.MAPBOX_ACCESS_TOKEN:
-        return None
-    return (
-        "https://api.mapbox.com/styles/v1/mapbox/streets-v12.html"
-        f"?title=false&zoomwheel=true&access_token={quote(settings.MAPBOX_ACCESS_TOKEN)}"
-        f"#14/{latitude}/{longitude}"
-    )
 
+def _authentication_required():
+    return JsonResponse({"error": "Authentication required"}, status=401)
 
-def _mapbox_search_url(latitude, longitude, location_text):
-    live_map = _mapbox_live_map_url(latitude, longitude)
-    if live_map:
-        return live_map
-    if location_text:
-        return f"https://www.mapbox.com/search?query={quote(location_text)}"
-    return None
 
+def _visible_orders(user_id):
+    return TreeDonation.objects.filter(user_id=user_id, is_user_deleted=False)
 
-def _mapbox_static_map_url(latitude, longitude):
-    if latitude is None or longitude is None:
-        return None
-    if not settings.MAPBOX_ACCESS_TOKEN:
-        return None
-    return (
-        "https://api.mapbox.com/styles/v1/mapbox/streets-v12/static/"
-        f"pin-s+0f766e({longitude},{latitude})/{longitude},{latitude},13,0/720x360"
-        f"?access_token={settings.MAPBOX_ACCESS_TOKEN}"
-    )
 
+def _visible_order(user_id, donation_id):
+    return _visible_orders(user_id).filter(id=donation_id)
 
-def _carbon_offset_kg_per_year(tree_count):
-    value = (tree_count or 0) * settings.CARBON_OFFSET_PER_TREE_KG_PER_YEAR
-    return round(value, 2)
 
+def _tracked_order(tracking_token):
+    return TreeDonation.objects.filter(tracking_token=tracking_token)
 
-def _serialize_donation(donation):
-    proof_image_1_url = None
-    proof_image_2_url = None
-    if donation.proof_image_1:
-        try:
-            proof_image_1_url = donation.proof_image_1.url
-        except Exception:
-            proof_image_1_url = str(donation.proof_image_1)
-    if donation.proof_image_2:
-        try:
-            proof_image_2_url = donation.proof_image_2.url
-        except Exception:
-            proof_image_2_url = str(donation.proof_image_2)
-
-    planted_tree_count = donation.trees_planted_count or donation.number_of_trees or 0
-    planted_map_url = _mapbox_search_url(
-        donation.planted_latitude,
-        donation.planted_longitude,
-        donation.planted_location,
-    )
-    planted_map_live_url = _mapbox_live_map_url(
-        donation.planted_latitude,
-        donation.planted_longitude,
-    )
-    planted_map_image_url = _mapbox_static_map_url(
-        donation.planted_latitude,
-        donation.planted_longitude,
-    )
-    requested_map_url = _mapbox_search_url(
-        donation.latitude,
-        donation.longitude,
-        donation.planting_location,
-    )
-    requested_map_live_url = _mapbox_live_map_url(
-        donation.latitude,
-        donation.longitude,
-    )
-    requested_map_image_url = _mapbox_static_map_url(
-        donation.latitude,
-        donation.longitude,
-    )
-    carbon_offset = _carbon_offset_kg_per_year(planted_tree_count)
 
-    return {
-        "id": donation.id,
-        "full_name": donation.full_name,
-        "email": donation.email,
-        "phone": donation.phone,
-        "number_of_trees": donation.number_of_trees,
-        "tree_species": donation.tree_species,
-        "planting_location": donation.planting_location,
-        "latitude": donation.latitude,
-        "longitude": donation.longitude,
-        "objective": donation.objective,
-        "dedication_name": donation.dedication_name,
-        "notes": donation.notes,
-        "amount_paise": donation.amount_paise,
-        "currency": donation.currency,
-        "payment_status": donation.payment_status,
-        "approval_status": donation.approval_status,
-        "razorpay_order_id": donation.razorpay_order_id,
-        "razorpay_payment_id": donation.razorpay_payment_id,
-        "created_at": donation.created_at.isoformat() if donation.created_at else None,
-        "paid_at": donation.paid_at.isoformat() if donation.paid_at else None,
-        "approved_at": donation.approved_at.isoformat() if donation.approved_at else None,
-        "planted_location": donation.planted_location,
-        "planted_latitude": donation.planted_latitude,
-        "planted_longitude": donation.planted_longitude,
-        "plantation_date": donation.plantation_date.isoformat()
-        if donation.plantation_date
-        else None,
-        "trees_planted_count": donation.trees_planted_count,
-        "plantation_update": donation.plantation_update,
-        "thank_you_note": donation.thank_you_note,
-        "proof_image_1_url": proof_image_1_url,
-        "proof_image_2_url": proof_image_2_url,
-        "tracking_token": donation.tracking_token,
-        "tracking_url": _tracking_url(donation.tracking_token),
-        "certificate_url": _certificate_url(donation.tracking_token),
-        "impact": {
-            "carbon_offset_kg_per_year": carbon_offset,
-            "trees_counted": planted_tree_count,
-            "unit": "kg/year",
-        },
-        "user_order_details": {
-            "full_name": donation.full_name,
-            "email": donation.email,
-            "phone": donation.phone,
-            "number_of_trees": donation.number_of_trees,
-            "tree_species": donation.tree_species,
-            "planting_location": donation.planting_location,
-            "latitude": donation.latitude,
-            "longitude": donation.longitude,
-            "requested_map_url": requested_map_url,
-            "requested_map_live_url": requested_map_live_url,
-            "requested_map_image_url": requested_map_image_url,
-            "objective": donation.objective,
-            "dedication_name": donation.dedication_name,
-            "notes": donation.notes,
-            "created_at": donation.created_at.isoformat() if donation.created_at else None,
-            "amount_paise": donation.amount_paise,
-            "currency": donation.currency,
-        },
-        "approval_details": {
-            "approval_status": donation.approval_status,
-            "approved_at": donation.approved_at.isoformat() if donation.approved_at else None,
-            "planted_location": donation.planted_location,
-            "planted_latitude": donation.planted_latitude,
-            "planted_longitude": donation.planted_longitude,
-            "planted_map_url": planted_map_url,
-            "planted_map_live_url": planted_map_live_url,
-            "planted_map_image_url": planted_map_image_url,
-            "plantation_date": donation.plantation_date.isoformat()
-            if donation.plantation_date
-            else None,
-            "trees_planted_count": donation.trees_planted_count,
-            "plantation_update": donation.plantation_update,
-            "thank_you_note": donation.thank_you_note,
-            "proof_image_1_url": proof_image_1_url,
-            "proof_image_2_url": proof_image_2_url,
-        },
-    }
+def _orders_page(orders, cursor=None):
+    """Newest first, continuing after ``cursor`` (``(created_at, id)`` of the last row seen)."""
+    page = orders.order_by("-created_at", "-id")
+    if cursor is not None:
+        cursor_created_at, cursor_id = cursor
+        page = page.filter(
+            Q(created_at__lt=cursor_created_at)
+            | Q(created_at=cursor_created_at, id__lt=cursor_id)
+        )
+    return page
 
 
-def _serialize_tracking(donation):
-    data = _serialize_donation(donation)
-    data.pop("email", None)
-    data.pop("phone", None)
-    if "user_order_details" in data:
-        data["user_order_details"].pop("email", None)
-        data["user_order_details"].pop("phone", None)
-    return data
+def _orders_validator(request):
+    claims = request_claims(request)
+    if claims is None:
+        return None
+    state = _visible_orders(claims.user_id).aggregate(
+        last_modified=Max("updated_at"),
+        total=Count("id"),
+    )
+    return f"{claims.user_id}:{state['total']}:{state['last_modified']}", state["last_modified"]
 
 
-def _get_verified_user(email):
-    normalized_email = (email or "").strip().lower()
-    if not normalized_email:
+def _order_detail_validator(request, donation_id):
+    claims = request_claims(request)
+    if claims is None:
         return None
-    return User.objects.filter(email=normalized_email, is_verified=True).first()
+    last_modified = (
+        _visible_order(claims.user_id, donation_id)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    if last_modified is None:
+        return None
+    return f"{claims.user_id}:{last_modified}", last_modified
 
 
-def _extract_email_from_request(request, data=None):
-    email = (request.GET.get("email") or "").strip().lower()
-    if email:
-        return email
+def _tracking_validator(request, tracking_token):
+    row = (
+        _tracked_order(tracking_token)
+        .values_list("id", "updated_at")
+        .first()
+    )
+    if row is None:
+        return None
+    return f"{row[0]}:{row[1]}", row[1]
 
-    if data and isinstance(data, dict):
-        email = (data.get("email") or "").strip().lower()
-        if email:
-            return email
 
-    email = (request.POST.get("email") or "").strip().lower()
-    return email
+def _encode_order_cursor(donation):
+    raw = f"{donation.created_at.isoformat()}|{donation.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_order_cursor(value):
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        created_at_raw, donation_id = (
+            base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|")
+        )
+        created_at = datetime.fromisoformat(created_at_raw)
+        donation_id = int(donation_id)
+    except (ValueError, UnicodeError):
+        return None
+    if timezone.is_naive(created_at):
+        return None
+    return created_at, donation_id
 
 
 def _parse_json_body(request):
@@ -246,72 +379,6 @@ def _to_float(value):
         return None
 
 
-def _admin_email():
-    candidate = (
-        settings.ADMIN_NOTIFICATION_EMAIL
-        or settings.EMAIL_HOST_USER
-        or settings.DEFAULT_FROM_EMAIL
-    )
-    parsed = parseaddr(candidate)[1]
-    return parsed or candidate
-
-
-def _build_admin_message(donation):
-    map_link = _mapbox_live_map_url(donation.latitude, donation.longitude) or _mapbox_search_url(
-        None,
-        None,
-        donation.planting_location,
-    )
-    if not map_link:
-        map_link = "-"
-    map_image = _mapbox_static_map_url(donation.latitude, donation.longitude) or "-"
-    carbon_offset = _carbon_offset_kg_per_year(
-        donation.trees_planted_count or donation.number_of_trees
-    )
-
-    lines = [
-        "A new tree donation has been paid successfully.",
-        "",
-        f"Donation ID: {donation.id}",
-        f"User Name: {donation.full_name}",
-        f"User Email: {donation.email}",
-        f"User Phone: {donation.phone}",
-        f"Trees Ordered: {donation.number_of_trees}",
-        f"Tree Species: {donation.tree_species or '-'}",
-        f"Objective: {donation.objective}",
-        f"Planting Location: {donation.planting_location}",
-        f"Latitude: {donation.latitude if donation.latitude is not None else '-'}",
-        f"Longitude: {donation.longitude if donation.longitude is not None else '-'}",
-        f"Mapbox Link: {map_link}",
-        f"Mapbox Static Preview: {map_image}",
-        f"Dedication: {donation.dedication_name or '-'}",
-        f"Notes: {donation.notes or '-'}",
-        f"Amount: {donation.amount_paise / 100:.2f} {donation.currency}",
-        f"Razorpay Order ID: {donation.razorpay_order_id}",
-        f"Razorpay Payment ID: {donation.razorpay_payment_id or '-'}",
-        f"Paid At: {donation.paid_at}",
-        f"Estimated Carbon Offset: {carbon_offset} kg/year",
-        f"Tracking URL: {_tracking_url(donation.tracking_token)}",
-        f"Certificate URL: {_certificate_url(donation.tracking_token)}",
-    ]
-    return "\n".join(lines)
-
-
-def _send_admin_notification(donation):
-    recipient = _admin_email()
-    if not recipient:
-        logger.warning("Admin email is not configured. Skipping donation notification.")
-        return
-
-    send_mail(
-        subject=f"New Tree Donation Paid (#{donation.id})",
-        message=_build_admin_message(donation),
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[recipient],
-        fail_silently=False,
-    )
-
-
 def _validate_payment_config():
     if not settings.RAZORPAY_KEY_ID or not settings.RAZORPAY_KEY_SECRET:
         return False
@@ -332,7 +399,14 @@ def payment_config(request):
     )
 
 
+def _known_places_response(known_places):
+    response = JsonResponse({"results": known_places})
+    response["X-Geocode-Cache"] = "index"
+    return response
+
+
 @csrf_exempt
+@rate_limit("geocode")
 def geocode_locations(request):
     if request.method != "GET":
         return JsonResponse({"error": "Invalid request"}, status=400)
@@ -342,48 +416,71 @@ def geocode_locations(request):
         return JsonResponse({"results": []})
     country = (request.GET.get("country") or "").strip()
 
+    known_places = place_index.search(query, country, limit=GEOCODE_RESULT_LIMIT)
+    if known_places and len(known_places) >= settings.PLACE_INDEX_MIN_RESULTS:
+        return _known_places_response(known_places)
+
     if not settings.MAPBOX_ACCESS_TOKEN:
+        if known_places:
+            return _known_places_response(known_places)
         return JsonResponse(
             {"error": "Mapbox token is missing on server"},
             status=503,
         )
 
     try:
-        url = (
-            "https://api.mapbox.com/geocoding/v5/mapbox.places/"
-            f"{quote(query)}.json"
-        )
-        params = {
-            "access_token": settings.MAPBOX_ACCESS_TOKEN,
-            "autocomplete": "true",
-            "limit": 5,
-            "types": "place,locality,neighborhood,address",
-            "language": "en",
-        }
-        if country:
-            params["country"] = country.lower()
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        payload = response.json()
+        results, cache_status = geocode_cache.lookup(query, country, fetch_mapbox_places)
+    except CircuitOpenError:
+        logger.warning("Mapbox circuit is open; skipping geocode for query=%s", query)
+        if known_places:
+            return _known_places_response(known_places)
+        return JsonResponse({"error": "Location search is temporarily unavailable"}, status=503)
     except requests.RequestException:
         logger.exception("Mapbox geocoding failed for query=%s", query)
+        if known_places:
+            return _known_places_response(known_places)
         return JsonResponse({"error": "Unable to fetch locations"}, status=502)
 
-    results = []
-    for feature in payload.get("features", []):
-        center = feature.get("center") or [None, None]
-        results.append(
-            {
-                "place_name": feature.get("place_name"),
-                "latitude": center[1],
-                "longitude": center[0],
-            }
-        )
+    if cache_status == "miss":
+        place_index.add(results, country, source="mapbox")
 
-    return JsonResponse({"results": results})
+    # Known places first, then Mapbox suggestions the index does not have yet.
+    seen = {place["place_name"].casefold() for place in known_places}
+    merged = known_places + [
+        place
+        for place in results
+        if (place.get("place_name") or "").casefold() not in seen
+    ]
+    response = JsonResponse({"results": merged[:GEOCODE_RESULT_LIMIT]})
+    response["X-Geocode-Cache"] = cache_status
+    return response
 
 
 @csrf_exempt
+@staff_member_required
+def geocode_cache_stats(request):
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    return JsonResponse({"geocode_cache": geocode_cache.stats()})
+
+
+@csrf_exempt
+@staff_member_required
+def upstream_stats(request):
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    return JsonResponse(
+        {
+            "razorpay": razorpay_client.stats(),
+            "mapbox": mapbox_client.stats(),
+        }
+    )
+
+
+@csrf_exempt
+@idempotent("create_order")
 def create_order(request):
     if request.method != "POST":
         return JsonResponse({"error": "Invalid request"}, status=400)
@@ -416,7 +513,7 @@ def create_order(request):
     if number_of_trees <= 0:
         return JsonResponse({"error": "Number of trees must be greater than 0"}, status=400)
 
-    user = User.objects.filter(email=email, is_verified=True).first()
+    user = verified_user_cache.get_verified(email)
     if not user:
         return JsonResponse(
             {"error": "Please login with a verified account to donate trees"},
@@ -427,8 +524,8 @@ def create_order(request):
     receipt = f"tree_{timezone.now().strftime('%Y%m%d%H%M%S')}_{secrets.token_hex(3)}"
 
     try:
-        order_response = requests.post(
-            "https://api.razorpay.com/v1/orders",
+        order_response = razorpay_client.post(
+            "orders",
             auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
             json={
                 "amount": amount_paise,
@@ -439,9 +536,11 @@ def create_order(request):
                     "trees": str(number_of_trees),
                 },
             },
-            timeout=20,
         )
         payload = order_response.json()
+    except CircuitOpenError:
+        logger.warning("Razorpay circuit is open; rejecting order creation")
+        return JsonResponse({"error": "Payment gateway is temporarily unavailable"}, status=503)
     except requests.RequestException:
         logger.exception("Razorpay order creation failed")
         return JsonResponse({"error": "Unable to start payment"}, status=502)
@@ -459,7 +558,7 @@ def create_order(request):
         return JsonResponse({"error": "Invalid order response from payment gateway"}, status=502)
 
     donation = TreeDonation.objects.create(
-        user=user,
+        user_id=user.id,
         full_name=full_name,
         email=email,
         phone=phone,
@@ -490,7 +589,42 @@ def create_order(request):
     )
 
 
+def _apply_razorpay_event(event, payload):
+    """Apply one webhook event; returns a short outcome string for the response."""
+    payment = (payload.get("payment") or {}).get("entity") or {}
+    order = (payload.get("order") or {}).get("entity") or {}
+    order_id = order.get("id") or payment.get("order_id")
+    if not order_id:
+        return "ignored"
+
+    donation = TreeDonation.objects.filter(razorpay_order_id=order_id).first()
+    if donation is None:
+        logger.warning("Razorpay %s webhook for unknown order=%s", event, order_id)
+        return "unknown_order"
+
+    if event == "payment.failed":
+        updated = TreeDonation.objects.filter(pk=donation.pk, payment_status="created").update(
+            payment_status="failed", updated_at=timezone.now()
+        )
+        return "failed" if updated else "unchanged"
+
+    amount = _to_int(order.get("amount_paid") if order else payment.get("amount"))
+    if amount != donation.amount_paise:
+        logger.warning(
+            "Razorpay %s amount mismatch for order=%s: got %s, expected %s",
+            event,
+            order_id,
+            amount,
+            donation.amount_paise,
+        )
+        return "amount_mismatch"
+
+    payment_id = payment.get("id") or donation.razorpay_payment_id or ""
+    return "paid" if mark_donation_paid(donation, payment_id) else "unchanged"
+
+
 @csrf_exempt
+@idempotent("verify_payment")
 def verify_payment(request):
     if request.method != "POST":
         return JsonResponse({"error": "Invalid request"}, status=400)
@@ -529,52 +663,12 @@ def verify_payment(request):
 
     if not hmac.compare_digest(generated_signature, signature):
         donation.payment_status = "failed"
-        donation.save(update_fields=["payment_status"])
+        donation.save(update_fields=["payment_status", "updated_at"])
         return JsonResponse({"error": "Payment signature verification failed"}, status=400)
 
-    try:
-        payment_resp = requests.get(
-            f"https://api.razorpay.com/v1/payments/{payment_id}",
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
-            timeout=20,
-        )
-        payment_payload = payment_resp.json()
-    except requests.RequestException:
-        logger.exception("Razorpay payment validation failed for payment=%s", payment_id)
-        return JsonResponse({"error": "Unable to validate payment status"}, status=502)
-
-    if payment_resp.status_code >= 400:
-        return JsonResponse({"error": "Payment validation failed"}, status=400)
-
-    status_value = payment_payload.get("status")
-    payment_order_id = payment_payload.get("order_id")
-    amount = _to_int(payment_payload.get("amount"))
-
-    if payment_order_id != donation.razorpay_order_id or amount != donation.amount_paise:
-        donation.payment_status = "failed"
-        donation.save(update_fields=["payment_status"])
-        return JsonResponse({"error": "Payment details mismatch"}, status=400)
-
-    if status_value not in {"authorized", "captured"}:
-        return JsonResponse({"error": "Payment is not completed yet"}, status=400)
-
-    donation.razorpay_payment_id = payment_id
-    donation.razorpay_signature = signature
-    donation.payment_status = "paid"
-    donation.paid_at = timezone.now()
-    donation.save(
-        update_fields=[
-            "razorpay_payment_id",
-            "razorpay_signature",
-            "payment_status",
-            "paid_at",
-        ]
-    )
-
-    try:
-        _send_admin_notification(donation)
-    except Exception:
-        logger.exception("Failed to send admin donation email for donation=%s", donation.id)
+    # The checkout signature is only issued for a successful payment, so no
+    # round trip to Razorpay is needed; the webhook confirms it independently.
+    mark_donation_paid(donation, payment_id, signature)
 
     return JsonResponse(
         {
@@ -585,30 +679,121 @@ def verify_payment(request):
 
 
 @csrf_exempt
+def razorpay_webhook(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    if not settings.RAZORPAY_WEBHOOK_SECRET:
+        return JsonResponse({"error": "Razorpay webhook secret is missing on server"}, status=503)
+
+    expected_signature = hmac.new(
+        settings.RAZORPAY_WEBHOOK_SECRET.encode("utf-8"),
+        request.body,
+        hashlib.sha256,
+    ).hexdigest()
+    signature = request.headers.get("X-Razorpay-Signature", "")
+    if not hmac.compare_digest(expected_signature, signature):
+        return JsonResponse({"error": "Invalid webhook signature"}, status=400)
+
+    data = _parse_json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    event = data.get("event") or ""
+    payload = data.get("payload") or {}
+    event_id = (
+        request.headers.get("X-Razorpay-Event-Id")
+        or data.get("id")
+        or hashlib.sha256(request.body).hexdigest()
+    )[:64]
+    payment = (payload.get("payment") or {}).get("entity") or {}
+    order = (payload.get("order") or {}).get("entity") or {}
+
+    # The event row and its effects commit together, so a failed delivery
+    # (any error in applying it is a 500) is retried by Razorpay and a repeated
+    # one is skipped.
+    with transaction.atomic():
+        try:
+            # Savepoint around the insert only: integrity errors raised while
+            # applying the event are not duplicates.
+            with transaction.atomic():
+                RazorpayWebhookEvent.objects.create(
+                    event_id=event_id,
+                    event=event[:64],
+                    razorpay_order_id=(order.get("id") or payment.get("order_id") or "")[:100],
+                    razorpay_payment_id=(payment.get("id") or "")[:100],
+                    payload=payload,
+                )
+        except IntegrityError:
+            return JsonResponse({"status": "duplicate"})
+        outcome = (
+            _apply_razorpay_event(event, payload)
+            if event in RAZORPAY_WEBHOOK_EVENTS
+            else "ignored"
+        )
+
+    return JsonResponse({"status": outcome})
+
+
+@csrf_exempt
+@conditional_view(_orders_validator)
 def user_orders(request):
     if request.method != "GET":
         return JsonResponse({"error": "Invalid request"}, status=400)
 
     try:
-        email = _extract_email_from_request(request)
-        user = _get_verified_user(email)
-        if not user:
-            return JsonResponse({"error": "Verified user not found"}, status=404)
+        claims = request_claims(request)
+        if claims is None:
+            return _authentication_required()
 
-        orders = TreeDonation.objects.filter(user=user, is_user_deleted=False)
+        limit = _to_int(request.GET.get("limit"), ORDERS_PAGE_DEFAULT_LIMIT)
+        if limit < 1 or limit > ORDERS_PAGE_MAX_LIMIT:
+            return JsonResponse(
+                {"error": f"Limit must be between 1 and {ORDERS_PAGE_MAX_LIMIT}"},
+                status=400,
+            )
+
+        try:
+            fields = _requested_donation_fields(request)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+        orders = _visible_orders(claims.user_id)
+        cursor = None
+        raw_cursor = (request.GET.get("cursor") or "").strip()
+        if raw_cursor:
+            cursor = _decode_order_cursor(raw_cursor)
+            if cursor is None:
+                return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+        page = list(_orders_page(orders, cursor)[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        summary = orders.aggregate(
+            total_orders=Count("id"),
+            completed_orders=Count(
+                "id", filter=Q(payment_status="paid", approval_status="approved")
+            ),
+            pending_orders=Count(
+                "id", filter=Q(payment_status="paid", approval_status="pending")
+            ),
+            rejected_orders=Count("id", filter=Q(approval_status="rejected")),
+            unpaid_orders=Count("id", filter=~Q(payment_status="paid")),
+            total_trees=Coalesce(Sum("number_of_trees"), 0),
+            paid_amount_paise=Coalesce(
+                Sum("amount_paise", filter=Q(payment_status="paid")), 0
+            ),
+        )
+        templates = map_url_templates()
         return JsonResponse(
             {
-                "orders": [_serialize_donation(order) for order in orders],
-                "summary": {
-                    "total_orders": orders.count(),
-                    "completed_orders": orders.filter(
-                        payment_status="paid", approval_status="approved"
-                    ).count(),
-                    "pending_orders": orders.filter(
-                        payment_status="paid", approval_status="pending"
-                    ).count(),
-                    "rejected_orders": orders.filter(approval_status="rejected").count(),
-                    "unpaid_orders": orders.exclude(payment_status="paid").count(),
+                "orders": [_serialize_donation(order, fields, templates) for order in page],
+                "summary": summary,
+                "pagination": {
+                    "limit": limit,
+                    "has_more": has_more,
+                    "next_cursor": _encode_order_cursor(page[-1]) if has_more else None,
                 },
             }
         )
@@ -626,24 +811,27 @@ def user_orders(request):
 
 
 @csrf_exempt
+@conditional_view(_order_detail_validator)
 def user_order_detail(request, donation_id):
     try:
         data = (
             _parse_json_body(request) if request.method in {"PUT", "PATCH", "DELETE"} else None
         )
-        email = _extract_email_from_request(request, data)
-        user = _get_verified_user(email)
-        if not user:
-            return JsonResponse({"error": "Verified user not found"}, status=404)
-
-        donation = TreeDonation.objects.filter(
-            id=donation_id, user=user, is_user_deleted=False
-        ).first()
+        claims = request_claims(request)
+        if claims is None:
+            return _authentication_required()
+
+        try:
+            fields = _requested_donation_fields(request)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+        donation = _visible_order(claims.user_id, donation_id).first()
         if not donation:
             return JsonResponse({"error": "Order not found"}, status=404)
 
         if request.method == "GET":
-            return JsonResponse({"order": _serialize_donation(donation)})
+            return JsonResponse({"order": _serialize_donation(donation, fields)})
 
         if request.method in {"PUT", "PATCH"}:
             if data is None:
@@ -661,6 +849,7 @@ def user_order_detail(request, donation_id):
             notes = data.get("notes")
 
             has_updates = False
+            impact_before = impact_contribution(donation)
 
             if full_name is not None:
                 full_name = str(full_name).strip()
@@ -683,8 +872,16 @@ def user_order_detail(request, donation_id):
                         {"error": "Number of trees must be greater than 0"},
                         status=400,
                     )
-                donation.number_of_trees = trees
-                if donation.payment_status != "paid":
+                if trees != donation.number_of_trees:
+                    # The Razorpay order was created for amount_paise, and
+                    # verify_payment trusts the checkout signature for it, so
+                    # the tree count is fixed once an order exists.
+                    if donation.razorpay_order_id:
+                        return JsonResponse(
+                            {"error": "Number of trees cannot be changed after checkout"},
+                            status=400,
+                        )
+                    donation.number_of_trees = trees
                     donation.amount_paise = trees * settings.TREE_PRICE_INR * 100
                 has_updates = True
 
@@ -742,18 +939,20 @@ def user_order_detail(request, donation_id):
                 donation.proof_image_2 = None
                 donation.thank_you_note = ""
 
-            donation.save()
+            with transaction.atomic():
+                donation.save()
+                apply_impact_change(impact_before, impact_contribution(donation))
             return JsonResponse(
                 {
                     "message": "Order updated successfully",
-                    "order": _serialize_donation(donation),
+                    "order": _serialize_donation(donation, fields),
                 }
             )
 
         if request.method == "DELETE":
             donation.is_user_deleted = True
             donation.user_deleted_at = timezone.now()
-            donation.save(update_fields=["is_user_deleted", "user_deleted_at"])
+            donation.save(update_fields=["is_user_deleted", "user_deleted_at", "updated_at"])
             return JsonResponse({"message": "Order deleted successfully"})
 
         return JsonResponse({"error": "Invalid request"}, status=400)
@@ -770,156 +969,135 @@ def user_order_detail(request, donation_id):
         )
 
 
+_GROWTH_LABEL_FORMATS = {"month": "%b", "week": "%b %d", "day": "%b %d"}
+
+
+def _public_impact_payload(totals, growth, granularity="month", window=DEFAULT_GROWTH_WINDOW):
+    # Public totals should reflect all paid plantation entries in DB.
+    trees_total = totals["trees_total"]
+    approved_trees_total = totals["approved_trees_total"]
+
+    active_donors = totals["active_donors"]
+    donors_total = active_donors
+
+    approved_projects = totals["approved_projects"]
+    total_projects = totals["total_projects"]
+    approval_rate = (
+        round((approved_projects / total_projects) * 100, 1) if total_projects else 0
+    )
+
+    donations_inr_total = round(totals["donation_amount_paise"] / 100, 2)
+
+    co2_offset_kg = round(
+        trees_total * settings.CARBON_OFFSET_PER_TREE_KG_PER_YEAR,
+        2,
+    )
+    co2_offset_tonnes = round(co2_offset_kg / 1000, 2)
+
+    label_format = _GROWTH_LABEL_FORMATS[granularity]
+    monthly_growth = [
+        {
+            "month": period_start.strftime(label_format),
+            "period_start": period_start.isoformat(),
+            "trees": trees,
+        }
+        for period_start, trees in growth
+    ]
+    peak_monthly_trees = max((item["trees"] for item in monthly_growth), default=0)
+
+    return {
+        "metrics": {
+            "trees_planted": trees_total,
+            "approved_trees_planted": approved_trees_total,
+            "co2_offset_tonnes": co2_offset_tonnes,
+            "co2_offset_tonnes_per_year": co2_offset_tonnes,
+            "co2_offset_kg_per_year": co2_offset_kg,
+            "donations_inr_total": donations_inr_total,
+            "active_donors": active_donors,
+            "global_donors": donors_total,
+            "approved_projects": approved_projects,
+            "total_projects": total_projects,
+            "approval_rate_percent": approval_rate,
+        },
+        "growth": {
+            "granularity": granularity,
+            "window": window,
+            "monthly_growth": monthly_growth,
+            "peak_monthly_trees": peak_monthly_trees,
+        },
+        "commitment": {
+            "operations_share_percent": 10,
+            "plantation_share_percent": 90,
+            "transparency_percent": 100,
+            "monitoring_support": "24/7",
+        },
+        "benchmarks": {
+            "community_survival_rate_percent": 85,
+            "industry_survival_rate_percent": 60,
+        },
+    }
+
+
 @csrf_exempt
 def public_impact(request):
     if request.method != "GET":
         return JsonResponse({"error": "Invalid request"}, status=400)
 
-    try:
-        paid_orders = TreeDonation.objects.filter(payment_status="paid")
-        approved_orders = paid_orders.filter(approval_status="approved")
-
-        # Public totals should reflect all paid plantation entries in DB.
-        trees_total = (
-            paid_orders.annotate(
-                counted_trees=Coalesce(
-                    "trees_planted_count",
-                    "number_of_trees",
-                    output_field=IntegerField(),
-                )
-            ).aggregate(total=Coalesce(Sum("counted_trees"), 0))["total"]
-            or 0
-        )
-        approved_trees_total = (
-            approved_orders.annotate(
-                counted_trees=Coalesce(
-                    "trees_planted_count",
-                    "number_of_trees",
-                    output_field=IntegerField(),
-                )
-            ).aggregate(total=Coalesce(Sum("counted_trees"), 0))["total"]
-            or 0
-        )
-
-        active_donors = paid_orders.values("email").distinct().count()
-        donors_total = active_donors
-
-        approved_projects = approved_orders.count()
-        total_projects = paid_orders.count()
-        approval_rate = (
-            round((approved_projects / total_projects) * 100, 1) if total_projects else 0
+    granularity = (request.GET.get("granularity") or "month").strip().lower()
+    if granularity not in GROWTH_GRANULARITIES:
+        return JsonResponse(
+            {"error": "Granularity must be one of: day, week, month"},
+            status=400,
         )
 
-        donation_amount_paise = (
-            paid_orders.aggregate(total=Coalesce(Sum("amount_paise"), 0))["total"] or 0
+    raw_window = (request.GET.get("window") or "").strip()
+    window = _to_int(raw_window, None) if raw_window else DEFAULT_GROWTH_WINDOW
+    if window is None:
+        return JsonResponse({"error": "Window must be a whole number"}, status=400)
+    max_window = GROWTH_WINDOW_LIMITS[granularity]
+    if window < 1 or window > max_window:
+        return JsonResponse(
+            {"error": f"Window must be between 1 and {max_window} for {granularity}"},
+            status=400,
         )
-        donations_inr_total = round(donation_amount_paise / 100, 2)
 
-        co2_offset_kg = round(
-            trees_total * settings.CARBON_OFFSET_PER_TREE_KG_PER_YEAR,
-            2,
+    try:
+        payload = get_or_refresh(
+            "public_impact",
+            lambda: _public_impact_payload(
+                read_impact_rollup(),
+                read_growth_buckets(granularity, window),
+                granularity,
+                window,
+            ),
+            variant=f"{granularity}:{window}",
         )
-        co2_offset_tonnes = round(co2_offset_kg / 1000, 2)
-
-        today = timezone.localdate()
-        months = []
-        month_totals = {}
-        for offset in range(5, -1, -1):
-            month = today.month - offset
-            year = today.year
-            while month <= 0:
-                month += 12
-                year -= 1
-            month_start = date(year, month, 1)
-            key = (year, month)
-            months.append((month_start, key))
-            month_totals[key] = 0
-
-        for order in paid_orders.values(
-            "plantation_date",
-            "approved_at",
-            "paid_at",
-            "created_at",
-            "trees_planted_count",
-            "number_of_trees",
-        ):
-            planted_on = order["plantation_date"]
-            if not planted_on and order["paid_at"]:
-                planted_on = order["paid_at"].date()
-            if not planted_on and order["approved_at"]:
-                planted_on = order["approved_at"].date()
-            if not planted_on and order["created_at"]:
-                planted_on = order["created_at"].date()
-            if not planted_on:
-                continue
-
-            key = (planted_on.year, planted_on.month)
-            if key not in month_totals:
-                continue
-            month_totals[key] += int(
-                order["trees_planted_count"] or order["number_of_trees"] or 0
-            )
-
-        monthly_growth = [
-            {"month": month_start.strftime("%b"), "trees": month_totals[key]}
-            for month_start, key in months
-        ]
-        peak_monthly_trees = max((item["trees"] for item in monthly_growth), default=0)
     except (OperationalError, ProgrammingError):
         logger.exception("Public impact query failed. Returning safe fallback metrics.")
-        trees_total = 0
-        approved_trees_total = 0
-        co2_offset_kg = 0
-        co2_offset_tonnes = 0
-        donations_inr_total = 0
-        active_donors = 0
-        donors_total = 0
-        approved_projects = 0
-        total_projects = 0
-        approval_rate = 0
-        monthly_growth = []
-        peak_monthly_trees = 0
+        payload = _public_impact_payload(
+            dict.fromkeys(ROLLUP_FIELDS, 0), [], granularity, window
+        )
 
-    return JsonResponse(
-        {
-            "metrics": {
-                "trees_planted": trees_total,
-                "approved_trees_planted": approved_trees_total,
-                "co2_offset_tonnes": co2_offset_tonnes,
-                "co2_offset_tonnes_per_year": co2_offset_tonnes,
-                "co2_offset_kg_per_year": co2_offset_kg,
-                "donations_inr_total": donations_inr_total,
-                "active_donors": active_donors,
-                "global_donors": donors_total,
-                "approved_projects": approved_projects,
-                "total_projects": total_projects,
-                "approval_rate_percent": approval_rate,
-            },
-            "growth": {
-                "monthly_growth": monthly_growth,
-                "peak_monthly_trees": peak_monthly_trees,
-            },
-            "commitment": {
-                "operations_share_percent": 10,
-                "plantation_share_percent": 90,
-                "transparency_percent": 100,
-                "monitoring_support": "24/7",
-            },
-            "benchmarks": {
-                "community_survival_rate_percent": 85,
-                "industry_survival_rate_percent": 60,
-            },
-        }
-    )
+    return JsonResponse(payload)
 
 
 @csrf_exempt
+@conditional_view(_tracking_validator)
 def track_order(request, tracking_token):
     if request.method != "GET":
         return JsonResponse({"error": "Invalid request"}, status=400)
 
-    donation = TreeDonation.objects.filter(tracking_token=tracking_token).first()
+    try:
+        fields = _requested_donation_fields(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    donation = _tracked_order(tracking_token).first()
     if not donation:
         return JsonResponse({"error": "Tracking record not found"}, status=404)
 
-    return JsonResponse({"order": _serialize_tracking(donation)})
+    return JsonResponse({"order": _serialize_tracking(donation, fields)})
+
+
+def track_order_not_found(request, tracking_token):
+    return JsonResponse({"error": "Tracking record not found"}, status=404)
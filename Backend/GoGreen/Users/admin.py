@@ -1,8 +1,11 @@
 from django.contrib import admin
+from django.utils import timezone
+
+from GoGreen.admin_pagination import EstimatedCountPaginator
 
 # Register your models here.
 
-from .models import User, UserReview
+from .models import OutboundEmail, PendingImage, User, UserReview
 
 
 @admin.register(User)
@@ -10,6 +13,10 @@ class UserAdmin(admin.ModelAdmin):
     list_display = ("id", "full_name", "email", "phone", "is_verified", "created_at")
     search_fields = ("full_name", "email", "phone")
     list_filter = ("is_verified", "is_staff", "is_active")
+    ordering = ("-created_at", "-id")
+    date_hierarchy = "created_at"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(UserReview)
@@ -17,4 +24,60 @@ class UserReviewAdmin(admin.ModelAdmin):
     list_display = ("id", "full_name", "email", "rating", "is_public", "updated_at")
     search_fields = ("full_name", "email", "review_text")
     list_filter = ("rating", "is_public")
+    date_hierarchy = "updated_at"
+    autocomplete_fields = ("user",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    actions = ("requeue",)
+    list_display = ("id", "subject", "status", "attempts", "next_attempt_at", "sent_at", "created_at")
+    search_fields = ("subject", "last_error")
+    list_filter = ("status",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ("attempts", "last_error", "sent_at", "expires_at", "created_at")
+
+    def get_exclude(self, request, obj=None):
+        # Expiring rows carry OTP codes; keep them out of the change form.
+        if obj is not None and obj.expires_at:
+            return ("body",)
+        return super().get_exclude(request, obj)
+
+    @admin.action(description="Requeue selected emails now")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=OutboundEmail.STATUS_SENT).update(
+            status=OutboundEmail.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} email(s) requeued.")
+
+
+@admin.register(PendingImage)
+class PendingImageAdmin(admin.ModelAdmin):
+    actions = ("requeue",)
+    list_display = (
+        "id",
+        "model_label",
+        "object_id",
+        "field_name",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "created_at",
+    )
+    list_filter = ("status", "model_label", "field_name")
+    readonly_fields = ("spool_name", "attempts", "last_error", "created_at")
 
+    @admin.action(description="Requeue selected images now")
+    def requeue(self, request, queryset):
+        updated = queryset.update(
+            status=PendingImage.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} image(s) requeued.")
@@ -0,0 +1,195 @@
+"""
+Background processing for uploaded photos.
+
+Views and the admin call ``queue_image`` instead of assigning the upload to the
+``CloudinaryField`` (which would push the raw file to Cloudinary inside the
+request). The raw upload is spooled to ``IMAGE_QUEUE_STORAGE_BACKEND`` (a
+directory under ``IMAGE_QUEUE_SPOOL_DIR`` by default; large uploads Django
+already wrote to a temporary file are moved there, not copied) and a
+``PendingImage`` row keeps its name. ``manage.py process_images`` runs it
+through ``GoGreen.image_processing``, uploads the WebP and JPEG renditions,
+points the field at the WebP and stores both URLs in ``image_urls``
+(``"url"``/variants for the WebP, ``"jpeg"`` for the fallback). Failures are
+retried with backoff and end in the dead letter status, like the email outbox.
+The spooled file is removed when its row is deleted (see ``Users/signals.py``).
+"""
+
+import logging
+import random
+import uuid
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from GoGreen.image_processing import ImageProcessingError, process_image
+from GoGreen.image_storage import get_uploader, upload_renditions
+
+from .models import PendingImage
+
+logger = logging.getLogger(__name__)
+
+# (model label, field) -> (upload folder, setting holding the longest side in px)
+IMAGE_TARGETS = {
+    ("Users.User", "avatar"): ("avatars", "AVATAR_MAX_DIMENSION"),
+    ("Tress.TreeDonation", "proof_image_1"): ("tree_proofs", "PROOF_IMAGE_MAX_DIMENSION"),
+    ("Tress.TreeDonation", "proof_image_2"): ("tree_proofs", "PROOF_IMAGE_MAX_DIMENSION"),
+}
+RETRY_BASE_SECONDS = 30
+RETRY_CAP_SECONDS = 3600
+
+
+def spool_storage():
+    """The storage raw uploads wait in between the request and the worker."""
+    storage_class = import_string(settings.IMAGE_QUEUE_STORAGE_BACKEND)
+    if issubclass(storage_class, FileSystemStorage):
+        return storage_class(location=settings.IMAGE_QUEUE_SPOOL_DIR)
+    return storage_class()
+
+
+def queue_image(instance, field_name, upload):
+    """Store ``upload`` for background processing into ``instance.<field_name>``."""
+    model_label = instance._meta.label
+    if (model_label, field_name) not in IMAGE_TARGETS:
+        raise ValueError(f"No image pipeline for {model_label}.{field_name}")
+    upload.seek(0)
+    storage = spool_storage()
+    spool_name = storage.save(f"{field_name}/{uuid.uuid4().hex}", upload)
+    try:
+        with transaction.atomic():
+            # A newer upload replaces one still waiting for the same field. Rows
+            # a worker has leased are left alone; ``_apply`` drops them as
+            # superseded.
+            PendingImage.objects.filter(
+                model_label=model_label,
+                object_id=instance.pk,
+                field_name=field_name,
+                status=PendingImage.STATUS_PENDING,
+                next_attempt_at__lte=timezone.now(),
+            ).delete()
+            return PendingImage.objects.create(
+                model_label=model_label,
+                object_id=instance.pk,
+                field_name=field_name,
+                original_name=(getattr(upload, "name", "") or "")[:255],
+                spool_name=spool_name,
+            )
+    except Exception:
+        storage.delete(spool_name)
+        raise
+
+
+def process_for_target(model_label, field_name, data):
+    """Run the pipeline with the size limit for this field; returns ``ProcessedImage``."""
+    _, dimension_setting = IMAGE_TARGETS[(model_label, field_name)]
+    return process_image(bytes(data), getattr(settings, dimension_setting))
+
+
+def _retry_delay(attempts):
+    delay = min(RETRY_CAP_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=random.uniform(delay / 2, delay))
+
+
+def _claim_due_images(batch_size):
+    """Lease up to ``batch_size`` due rows to this worker (see ``Users.outbox``)."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            PendingImage.objects.select_for_update(skip_locked=True)
+            .filter(status=PendingImage.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if jobs:
+            PendingImage.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                next_attempt_at=now + timedelta(seconds=settings.IMAGE_QUEUE_LEASE_SECONDS)
+            )
+    return jobs
+
+
+def _record_failure(job, error, permanent=False):
+    job.attempts += 1
+    job.last_error = str(error)[:2000]
+    if permanent or job.attempts >= settings.IMAGE_QUEUE_MAX_ATTEMPTS:
+        job.status = PendingImage.STATUS_DEAD
+        logger.error("Image %s moved to dead letter: %s", job.pk, job.last_error)
+    else:
+        job.next_attempt_at = timezone.now() + _retry_delay(job.attempts)
+    # update() rather than save(): the row may have been deleted meanwhile.
+    PendingImage.objects.filter(pk=job.pk).update(
+        attempts=job.attempts,
+        last_error=job.last_error,
+        status=job.status,
+        next_attempt_at=job.next_attempt_at,
+    )
+
+
+def _apply(job, stored_value, urls):
+    model = apps.get_model(job.model_label)
+    with transaction.atomic():
+        instance = model.objects.select_for_update().filter(pk=job.object_id).first()
+        superseded = PendingImage.objects.filter(
+            model_label=job.model_label,
+            object_id=job.object_id,
+            field_name=job.field_name,
+            pk__gt=job.pk,
+        ).exists()
+        if instance is not None and not superseded:
+            image_urls = dict(instance.image_urls or {})
+            image_urls[job.field_name] = urls
+            setattr(instance, job.field_name, stored_value)
+            instance.image_urls = image_urls
+            update_fields = [job.field_name, "image_urls"]
+            if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+                update_fields.append("updated_at")
+            # post_save handlers see image_urls in update_fields and keep these URLs.
+            instance.save(update_fields=update_fields)
+        job.delete()
+
+
+def process_due_images(batch_size=None):
+    """Process one batch of due uploads; returns ``(done, failed)`` counts."""
+    jobs = _claim_due_images(batch_size or settings.IMAGE_QUEUE_BATCH_SIZE)
+    storage = spool_storage()
+    done = failed = 0
+    for job in jobs:
+        folder, _ = IMAGE_TARGETS[(job.model_label, job.field_name)]
+        try:
+            with storage.open(job.spool_name, "rb") as spooled:
+                data = spooled.read()
+        except FileNotFoundError as exc:
+            logger.warning("Image %s has no spooled upload: %s", job.pk, exc)
+            _record_failure(job, exc, permanent=True)
+            failed += 1
+            continue
+        try:
+            processed = process_for_target(job.model_label, job.field_name, data)
+        except ImageProcessingError as exc:
+            logger.warning("Image %s cannot be processed: %s", job.pk, exc)
+            _record_failure(job, exc, permanent=True)
+            failed += 1
+            continue
+        try:
+            stored_value, urls = upload_renditions(
+                get_uploader(folder), f"{job.field_name}-{job.object_id}", processed
+            )
+            _apply(job, stored_value, urls)
+        except Exception as exc:
+            logger.warning("Image %s upload failed: %s", job.pk, exc)
+            _record_failure(job, exc)
+            failed += 1
+            continue
+        logger.info(
+            "Image %s: %s bytes in, %s bytes WebP / %s bytes JPEG at %sx%s",
+            job.pk,
+            len(data),
+            len(processed.webp),
+            len(processed.jpeg),
+            processed.width,
+            processed.height,
+        )
+        done += 1
+    return done, failed
@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from Users.image_queue import process_due_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Resize, convert and upload queued avatar and proof photos "
+        "(runs as a worker loop unless --once is given)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.IMAGE_QUEUE_BATCH_SIZE,
+            help="Images claimed per round.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.IMAGE_QUEUE_POLL_SECONDS,
+            help="Seconds to sleep when nothing is due.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process everything currently due, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be greater than 0")
+
+        total_done = total_failed = 0
+        try:
+            while True:
+                close_old_connections()
+                done, failed = process_due_images(batch_size)
+                total_done += done
+                total_failed += failed
+                if done or failed:
+                    self.stdout.write(f"Processed {done} image(s), {failed} failed.")
+                if done + failed < batch_size:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Image queue done: {total_done} processed, {total_failed} failed.")
+        )
@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from Users.outbox import deliver_due_emails, purge_sent_emails
+
+# How often the worker loop deletes sent rows past EMAIL_OUTBOX_RETENTION_DAYS.
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails (runs as a worker loop unless --once is given)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help="Emails sent per SMTP connection.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.EMAIL_OUTBOX_POLL_SECONDS,
+            help="Seconds to sleep when nothing is due.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver everything currently due, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be greater than 0")
+
+        total_sent = total_failed = 0
+        next_purge = 0
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() >= next_purge:
+                    purged = purge_sent_emails()
+                    if purged:
+                        self.stdout.write(f"Purged {purged} sent email(s).")
+                    next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                sent, failed = deliver_due_emails(batch_size)
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent} email(s), {failed} failed.")
+                if sent + failed < batch_size:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Outbox done: {total_sent} sent, {total_failed} failed.")
+        )
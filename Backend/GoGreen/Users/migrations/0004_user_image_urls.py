@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0003_userreview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='image_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0005_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userreview',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-updated_at'], name='review_public_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 01:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0008_pending_image_queue'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='otp',
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-17 01:22
+
+from django.db import migrations, models
+
+
+def delete_queued_otp_emails(apps, schema_editor):
+    # Rows queued before expires_at existed keep OTP codes in their body; any
+    # such code has long expired.
+    OutboundEmail = apps.get_model("Users", "OutboundEmail")
+    OutboundEmail.objects.filter(subject="Your OTP Code").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0009_remove_user_otp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='outboundemail',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at'], name='outbox_expiring_idx'),
+        ),
+        migrations.RunPython(delete_queued_otp_emails, migrations.RunPython.noop),
+    ]
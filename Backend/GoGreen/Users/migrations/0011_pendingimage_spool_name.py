@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-17 02:10
+
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations, models
+from django.utils.module_loading import import_string
+
+
+def _spool_storage():
+    storage_class = import_string(settings.IMAGE_QUEUE_STORAGE_BACKEND)
+    if issubclass(storage_class, FileSystemStorage):
+        return storage_class(location=settings.IMAGE_QUEUE_SPOOL_DIR)
+    return storage_class()
+
+
+def spool_queued_images(apps, schema_editor):
+    PendingImage = apps.get_model("Users", "PendingImage")
+    storage = _spool_storage()
+    for job in PendingImage.objects.iterator(chunk_size=50):
+        job.spool_name = storage.save(
+            f"{job.field_name}/{uuid.uuid4().hex}", ContentFile(bytes(job.data))
+        )
+        job.save(update_fields=["spool_name"])
+
+
+def load_spooled_images(apps, schema_editor):
+    PendingImage = apps.get_model("Users", "PendingImage")
+    storage = _spool_storage()
+    for job in PendingImage.objects.iterator(chunk_size=50):
+        with storage.open(job.spool_name, "rb") as spooled:
+            job.data = spooled.read()
+        job.save(update_fields=["data"])
+        storage.delete(job.spool_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0010_outboundemail_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingimage',
+            name='spool_name',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='pendingimage',
+            name='data',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(spool_queued_images, load_spooled_images),
+        migrations.RemoveField(
+            model_name='pendingimage',
+            name='data',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0011_pendingimage_spool_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userreview',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
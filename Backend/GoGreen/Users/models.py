@@ -1,8 +1,4 @@
-import random
-from time import timezone
 from django.db import models
-from datetime import timedelta
-import random
 
 # Create your models here.
 from django.db import models
@@ -10,6 +6,7 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Permis
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils.timezone import now
 from cloudinary.models import CloudinaryField
 
 
@@ -75,6 +72,8 @@ class User(AbstractBaseUser, PermissionsMixin):
         null=True,
         
     )
+    # Resolved avatar URL and variants (see GoGreen/image_urls.py)
+    image_urls = models.JSONField(default=dict, blank=True, editable=False)
 
     # 🔐 Authentication fields
     is_active = models.BooleanField(default=True)
@@ -83,9 +82,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     # 🔥 Important: User validation field
     is_verified = models.BooleanField(default=False)
 
-    created_at = models.DateTimeField(auto_now_add=True)
-    otp = models.CharField(max_length=6, blank=True, null=True)
-    
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     objects = UserManager()
 
@@ -94,12 +91,6 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def __str__(self):
         return self.email
-    
-    def generate_otp(self):
-        self.otp = str(random
-        .randint(100000, 999999))
-        self.otp_expiry = timezone.now() + timedelta(minutes=5)
-        self.save()
 
 
 class UserReview(models.Model):
@@ -122,8 +113,94 @@ class UserReview(models.Model):
 
     class Meta:
         ordering = ["-updated_at", "-created_at"]
+        indexes = [
+            # Public review list. The admin date_hierarchy over all reviews reads
+            # the table directly: one row per email, rarely browsed.
+            models.Index(
+                fields=["-updated_at"],
+                condition=models.Q(is_public=True),
+                name="review_public_recent_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.email} ({self.rating}/5)"
 
 
+
+
+class OutboundEmail(models.Model):
+    """
+    Email queued by a request and delivered by ``manage.py send_outbox_emails``.
+
+    Rows with ``expires_at`` (OTP codes) are deleted once sent or expired, so
+    their body is never kept.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_DEAD, "Dead letter"),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+            models.Index(
+                fields=["expires_at"],
+                name="outbox_expiring_idx",
+                condition=models.Q(expires_at__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class PendingImage(models.Model):
+    """Photo upload waiting for ``manage.py process_images`` (see ``Users/image_queue.py``)."""
+
+    STATUS_PENDING = "pending"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DEAD, "Dead letter"),
+    )
+
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    field_name = models.CharField(max_length=50)
+    original_name = models.CharField(max_length=255, blank=True)
+    # Name of the raw upload in the IMAGE_QUEUE_STORAGE_BACKEND spool
+    spool_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="image_queue_due_idx"),
+            models.Index(
+                fields=["model_label", "object_id", "field_name"], name="image_queue_target_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_id}.{self.field_name} ({self.status})"
@@ -0,0 +1,107 @@
+"""
+Email OTPs held in the ``otp`` cache alias instead of the ``User`` row.
+
+``issue_otp(email)`` stores an HMAC of a fresh six-digit code (never the code
+itself) with a ``OTP_TTL_SECONDS`` timeout and returns the code for the email.
+``check_otp(email, code)`` counts the guess first and only then compares in
+constant time, so at most ``OTP_MAX_ATTEMPTS`` guesses are ever compared, even
+in parallel; after that many wrong ones the code is discarded and a new one has
+to be requested. Issuing a code replaces the previous one and resets the count.
+
+Redis and local memory increment the counter atomically. ``FileBasedCache``
+(the fallback without ``REDIS_URL``) does a read and a write, so the counter is
+updated under an exclusive lock on ``<OTP_CACHE_DIR>/.attempts.lock``; that is
+only safe between processes on one host.
+"""
+
+import os
+import secrets
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+OTP_VALID = "valid"
+OTP_INVALID = "invalid"
+OTP_EXPIRED = "expired"
+OTP_LOCKED = "locked"
+
+_HMAC_SALT = "gogreen.otp"
+
+
+def _cache():
+    return caches["otp"]
+
+
+def _code_key(email):
+    return f"code:{email}"
+
+
+def _attempts_key(email):
+    return f"attempts:{email}"
+
+
+def _digest(email, code):
+    return salted_hmac(_HMAC_SALT, f"{email}:{code}").hexdigest()
+
+
+@contextmanager
+def _attempts_lock(cache):
+    os.makedirs(cache._dir, exist_ok=True)
+    with open(os.path.join(cache._dir, ".attempts.lock"), "ab") as lock_file:
+        locks.lock(lock_file, locks.LOCK_EX)
+        try:
+            yield
+        finally:
+            locks.unlock(lock_file)
+
+
+def _count_attempt(cache, email):
+    """Add one guess to the counter and return the new count; raises ``ValueError`` if gone."""
+    key = _attempts_key(email)
+    if not isinstance(cache, FileBasedCache):
+        return cache.incr(key)
+    with _attempts_lock(cache):
+        attempts = cache.get(key)
+        if attempts is None:
+            raise ValueError(f"Key '{key}' not found")
+        attempts += 1
+        cache.set(key, attempts, timeout=settings.OTP_TTL_SECONDS)
+        return attempts
+
+
+def issue_otp(email):
+    """Generate and store a new code for ``email``; returns the code to send."""
+    code = f"{secrets.randbelow(1_000_000):06d}"
+    cache = _cache()
+    cache.set_many(
+        {_code_key(email): _digest(email, code), _attempts_key(email): 0},
+        timeout=settings.OTP_TTL_SECONDS,
+    )
+    return code
+
+
+def check_otp(email, code):
+    """Return ``OTP_VALID``, ``OTP_INVALID``, ``OTP_EXPIRED`` or ``OTP_LOCKED``."""
+    cache = _cache()
+    stored = cache.get(_code_key(email))
+    if stored is None:
+        return OTP_EXPIRED
+    try:
+        attempts = _count_attempt(cache, email)
+    except ValueError:
+        # The counter expired between the two reads; so has the code.
+        return OTP_EXPIRED
+    if attempts > settings.OTP_MAX_ATTEMPTS:
+        cache.delete_many([_code_key(email), _attempts_key(email)])
+        return OTP_LOCKED
+    if constant_time_compare(stored, _digest(email, code)):
+        cache.delete_many([_code_key(email), _attempts_key(email)])
+        return OTP_VALID
+    if attempts >= settings.OTP_MAX_ATTEMPTS:
+        cache.delete_many([_code_key(email), _attempts_key(email)])
+        return OTP_LOCKED
+    return OTP_INVALID
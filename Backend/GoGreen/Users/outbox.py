@@ -0,0 +1,199 @@
+"""
+Transactional email outbox.
+
+Views and admin actions call ``enqueue_email`` instead of talking to SMTP. The
+row is written in the caller's transaction, so an email exists only if the
+change that triggered it was committed, and it survives worker restarts.
+``manage.py send_outbox_emails`` delivers due rows in batches over one SMTP
+connection, retries failures with exponential backoff and moves rows that keep
+failing to the dead letter status for an admin to inspect and requeue. Sent
+rows are purged after ``EMAIL_OUTBOX_RETENTION_DAYS``.
+
+Emails queued with ``expires_in`` (OTP codes) are not worth sending late and
+should not be kept: the row is deleted as soon as it is sent, and deleted
+unsent once it expires.
+"""
+
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, body, recipients, from_email=None, expires_in=None):
+    """
+    Queue one email; returns the ``OutboundEmail`` row (``None`` without recipients).
+
+    With ``expires_in`` (seconds) the email is dropped if it cannot be sent in
+    time, and the row is deleted instead of kept once it is.
+    """
+    recipients = [recipient for recipient in recipients if recipient]
+    if not recipients:
+        return None
+    return OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or "",
+        recipients=recipients,
+        expires_at=timezone.now() + timedelta(seconds=expires_in) if expires_in else None,
+    )
+
+
+def enqueue_emails(messages):
+    """
+    Queue many ``(subject, body, recipients)`` emails with one insert.
+
+    Messages without recipients are dropped; returns the number queued.
+    """
+    from_email = settings.DEFAULT_FROM_EMAIL or ""
+    rows = [
+        OutboundEmail(
+            subject=subject[:255],
+            body=body,
+            from_email=from_email,
+            recipients=[recipient for recipient in recipients if recipient],
+        )
+        for subject, body, recipients in messages
+        if any(recipients)
+    ]
+    OutboundEmail.objects.bulk_create(rows)
+    return len(rows)
+
+
+def _retry_delay(attempts):
+    delay = min(
+        settings.EMAIL_OUTBOX_RETRY_CAP_SECONDS,
+        settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+    )
+    return timedelta(seconds=random.uniform(delay / 2, delay))
+
+
+def due_emails(now):
+    """Pending rows whose next attempt is due at ``now``, oldest first."""
+    return OutboundEmail.objects.filter(
+        status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now
+    ).order_by("next_attempt_at", "id")
+
+
+def _claim_due_emails(batch_size):
+    """
+    Lease up to ``batch_size`` due rows to this worker.
+
+    Rows are locked with ``SKIP LOCKED`` (where the database supports it) and
+    their ``next_attempt_at`` is pushed past the lease, so parallel workers
+    never pick the same row and a crashed worker's rows become due again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(due_emails(now).select_for_update(skip_locked=True)[:batch_size])
+        if emails:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+            )
+    return emails
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:2000]
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboundEmail.STATUS_DEAD
+        logger.error(
+            "Outbox email %s moved to dead letter after %s attempts: %s",
+            email.pk,
+            email.attempts,
+            email.last_error,
+        )
+    else:
+        email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+    # The row may have been deleted meanwhile (expired, or removed in the admin).
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        attempts=email.attempts,
+        last_error=email.last_error,
+        status=email.status,
+        next_attempt_at=email.next_attempt_at,
+    )
+
+
+def delete_expired_emails():
+    """
+    Delete expiring rows past ``expires_at``; returns the count.
+
+    Rows leased to a worker (``next_attempt_at`` still ahead) are left for that
+    worker and go once the lease or retry delay runs out.
+    """
+    now = timezone.now()
+    return OutboundEmail.objects.filter(expires_at__lte=now, next_attempt_at__lte=now).delete()[0]
+
+
+def deliver_due_emails(batch_size=None):
+    """Send one batch of due emails; returns ``(sent, failed)`` counts."""
+    delete_expired_emails()
+    emails = _claim_due_emails(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.exception("Unable to open email connection for outbox batch")
+        for email in emails:
+            _record_failure(email, exc)
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or None,
+                to=email.recipients,
+                connection=connection,
+            )
+            try:
+                message.send(fail_silently=False)
+            except Exception as exc:
+                logger.warning("Outbox email %s failed: %s", email.pk, exc)
+                _record_failure(email, exc)
+                failed += 1
+                continue
+            sent += 1
+            sent_rows = OutboundEmail.objects.filter(pk=email.pk)
+            if email.expires_at:
+                sent_rows.delete()
+                continue
+            sent_rows.update(
+                status=OutboundEmail.STATUS_SENT,
+                attempts=email.attempts + 1,
+                sent_at=timezone.now(),
+                last_error="",
+            )
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def purge_sent_emails(retention_days=None, chunk_size=1000):
+    """Delete sent rows older than the retention period; returns the number deleted."""
+    if retention_days is None:
+        retention_days = settings.EMAIL_OUTBOX_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    expired = OutboundEmail.objects.filter(
+        status=OutboundEmail.STATUS_SENT, sent_at__lt=cutoff
+    ).order_by("pk")
+    deleted = 0
+    while True:
+        pks = list(expired.values_list("pk", flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        deleted += OutboundEmail.objects.filter(pk__in=pks).delete()[0]
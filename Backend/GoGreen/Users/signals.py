@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from GoGreen.image_urls import sync_image_urls
+from GoGreen.response_cache import invalidate_on_commit
+
+from .image_queue import spool_storage
+from .models import PendingImage, User, UserReview
+from .user_cache import verified_user_cache
+
+
+@receiver(post_save, sender=UserReview)
+@receiver(post_delete, sender=UserReview)
+def invalidate_public_reviews(sender, **kwargs):
+    invalidate_on_commit("reviews")
+
+
+@receiver(post_save, sender=User)
+def store_avatar_urls(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and "avatar" not in update_fields):
+        return
+    if update_fields is not None and "image_urls" in update_fields:
+        # Saved by Users.image_queue, which already stored the URLs.
+        return
+    sync_image_urls(instance, ("avatar",))
+
+
+_REVIEW_AUTHOR_FIELDS = {"full_name", "avatar", "image_urls"}
+
+
+@receiver(post_save, sender=User)
+def invalidate_reviews_for_user(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Reviews embed the author's name fallback and avatar.
+    if raw or (update_fields is not None and not _REVIEW_AUTHOR_FIELDS & set(update_fields)):
+        return
+    if instance.reviews.exists():
+        invalidate_on_commit("reviews")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    verified_user_cache.invalidate(instance)
+    # Again after commit, in case a concurrent request re-read the old row meanwhile.
+    transaction.on_commit(lambda: verified_user_cache.invalidate(instance))
+
+
+@receiver(post_delete, sender=PendingImage)
+def delete_spooled_upload(sender, instance, **kwargs):
+    # After commit: a rolled back delete still needs its file.
+    transaction.on_commit(lambda: spool_storage().delete(instance.spool_name))
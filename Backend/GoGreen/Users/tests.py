@@ -1,3 +1,274 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import time
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from django.core import signing
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from GoGreen.auth_tokens import (
+    ACCESS_SALT,
+    InvalidToken,
+    issue_tokens,
+    read_access_token,
+    read_refresh_token,
+    request_claims,
+)
+from GoGreen.rate_limit import client_ip, parse_rate, take_token
+
+from .models import User
+from .otp import OTP_EXPIRED, OTP_INVALID, OTP_LOCKED, OTP_VALID, check_otp, issue_otp
+
+_LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "otp": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "otp-tests"},
+}
+
+
+def _bearer(token):
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+class AuthTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="donor@example.com",
+            full_name="Donor",
+            phone="9999999999",
+            password="first-password",
+            is_verified=True,
+        )
+
+    def setUp(self):
+        self.tokens = issue_tokens(self.user)
+
+    def refresh(self, refresh_token):
+        return self.client.post(
+            reverse("refresh_token"),
+            json.dumps({"refresh_token": refresh_token}),
+            content_type="application/json",
+            secure=True,
+        )
+
+    def test_access_token_round_trip(self):
+        claims = read_access_token(self.tokens["access_token"])
+        self.assertEqual(claims.user_id, self.user.pk)
+        self.assertTrue(claims.is_verified)
+
+    def test_tampered_access_token_is_rejected(self):
+        token = self.tokens["access_token"]
+        payload, _, signature = token.rpartition(":")
+        forged = signing.dumps({"uid": self.user.pk + 1, "ver": True}, salt=ACCESS_SALT)
+        for bad in (
+            f"{payload}:{signature[:-1]}{'A' if signature[-1] != 'A' else 'B'}",
+            f"{forged.rpartition(':')[0]}:{signature}",
+            "not-a-token",
+        ):
+            with self.subTest(token=bad), self.assertRaises(InvalidToken):
+                read_access_token(bad)
+
+    def test_expired_access_token_is_rejected(self):
+        with self.settings(AUTH_ACCESS_TOKEN_TTL=60):
+            with mock.patch("time.time", return_value=time.time() - 61):
+                token = issue_tokens(self.user)["access_token"]
+            with self.assertRaisesMessage(InvalidToken, "expired"):
+                read_access_token(token)
+            response = self.client.get(reverse("profile_user"), secure=True, **_bearer(token))
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        with self.assertRaises(InvalidToken):
+            read_access_token(self.tokens["refresh_token"])
+        with self.assertRaises(InvalidToken):
+            read_refresh_token(self.tokens["access_token"])
+        response = self.client.get(
+            reverse("profile_user"), secure=True, **_bearer(self.tokens["refresh_token"])
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_unverified_claims_are_ignored(self):
+        self.user.is_verified = False
+        token = issue_tokens(self.user)["access_token"]
+        request = RequestFactory().get("/", **_bearer(token))
+        self.assertIsNone(request_claims(request))
+
+    def test_refresh_issues_a_new_pair(self):
+        response = self.refresh(self.tokens["refresh_token"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(read_access_token(response.json()["access_token"]).user_id, self.user.pk)
+
+    def test_refresh_rejected_after_password_change(self):
+        self.user.set_password("second-password")
+        self.user.save()
+        self.assertEqual(self.refresh(self.tokens["refresh_token"]).status_code, 401)
+
+    def test_refresh_rejected_after_deactivation(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.refresh(self.tokens["refresh_token"]).status_code, 401)
+
+    def test_expired_refresh_token_is_rejected(self):
+        with self.settings(AUTH_REFRESH_TOKEN_TTL=60):
+            with mock.patch("time.time", return_value=time.time() - 61):
+                token = issue_tokens(self.user)["refresh_token"]
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("expired", response.json()["error"])
+
+
+@override_settings(CACHES=_LOCMEM_CACHES, OTP_TTL_SECONDS=600, OTP_MAX_ATTEMPTS=3)
+class OtpTests(TestCase):
+    email = "otp@example.com"
+
+    def wrong(self, code):
+        return "000000" if code != "000000" else "111111"
+
+    def test_valid_code_is_used_once(self):
+        code = issue_otp(self.email)
+        self.assertEqual(check_otp(self.email, code), OTP_VALID)
+        self.assertEqual(check_otp(self.email, code), OTP_EXPIRED)
+
+    def test_wrong_code_then_right_code(self):
+        code = issue_otp(self.email)
+        self.assertEqual(check_otp(self.email, self.wrong(code)), OTP_INVALID)
+        self.assertEqual(check_otp(self.email, code), OTP_VALID)
+
+    def test_lockout_discards_the_code(self):
+        code = issue_otp(self.email)
+        outcomes = [check_otp(self.email, self.wrong(code)) for _ in range(3)]
+        self.assertEqual(outcomes, [OTP_INVALID, OTP_INVALID, OTP_LOCKED])
+        self.assertEqual(check_otp(self.email, code), OTP_EXPIRED)
+
+    def test_new_code_resets_attempts(self):
+        code = issue_otp(self.email)
+        check_otp(self.email, self.wrong(code))
+        check_otp(self.email, self.wrong(code))
+        code = issue_otp(self.email)
+        self.assertEqual(check_otp(self.email, self.wrong(code)), OTP_INVALID)
+        self.assertEqual(check_otp(self.email, code), OTP_VALID)
+
+    def test_code_expires(self):
+        code = issue_otp(self.email)
+        with mock.patch("time.time", return_value=time.time() + 601):
+            self.assertEqual(check_otp(self.email, code), OTP_EXPIRED)
+
+    def test_parallel_guesses_on_file_cache_stay_within_limit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            caches_setting = {
+                **_LOCMEM_CACHES,
+                "otp": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": directory,
+                },
+            }
+            with self.settings(CACHES=caches_setting):
+                code = issue_otp(self.email)
+                outcomes = []
+
+                def guess():
+                    outcomes.append(check_otp(self.email, self.wrong(code)))
+
+                threads = [threading.Thread(target=guess) for _ in range(20)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        counts = Counter(outcomes)
+        # Only OTP_MAX_ATTEMPTS guesses are ever compared.
+        self.assertEqual(counts[OTP_INVALID] + counts[OTP_LOCKED], 3)
+
+    def test_verify_endpoint_reports_lockout(self):
+        User.objects.create_user(
+            email=self.email, full_name="Otp", phone="9999999999", password="x"
+        )
+        code = issue_otp(self.email)
+        with self.settings(RATE_LIMITS={}):
+            for expected in (400, 400, 429):
+                response = self.client.post(
+                    reverse("verify_otp"),
+                    json.dumps({"email": self.email, "otp": self.wrong(code)}),
+                    content_type="application/json",
+                    secure=True,
+                )
+                self.assertEqual(response.status_code, expected)
+
+
+@override_settings(
+    CACHES=_LOCMEM_CACHES,
+    RATE_LIMITS={"login": {"ip": "3/m", "email": "2/m"}},
+    RATE_LIMIT_PROXY_COUNT=1,
+)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def login(self, email, **extra):
+        return self.client.post(
+            reverse("login_user"),
+            json.dumps({"email": email, "password": "wrong"}),
+            content_type="application/json",
+            secure=True,
+            **extra,
+        )
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("10/m"), (10, 60))
+        self.assertEqual(parse_rate("5/10m"), (5, 600))
+        self.assertEqual(parse_rate("3/hour"), (3, 3600))
+        self.assertIsNone(parse_rate(""))
+        with self.assertRaises(ValueError):
+            parse_rate("often")
+
+    def test_bucket_drains_and_refills(self):
+        now = time.time()
+        with mock.patch("time.time", return_value=now):
+            self.assertEqual([take_token("test", (2, 10)) for _ in range(2)], [0, 0])
+            self.assertEqual(take_token("test", (2, 10)), 5)
+        with mock.patch("time.time", return_value=now + 5):
+            self.assertEqual(take_token("test", (2, 10)), 0)
+
+    def test_drained_email_bucket_returns_429_with_retry_after(self):
+        statuses = [self.login("Donor@Example.com ").status_code for _ in range(2)]
+        self.assertEqual(statuses, [401, 401])
+        with self.assertLogs("GoGreen.rate_limit", "WARNING"):
+            response = self.login("donor@example.com", HTTP_X_FORWARDED_FOR="203.0.113.9")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(response.json()["retry_after"], int(response["Retry-After"]))
+
+    def test_ip_bucket_is_shared_across_emails(self):
+        for index in range(3):
+            self.assertEqual(self.login(f"user{index}@example.com").status_code, 401)
+        with self.assertLogs("GoGreen.rate_limit", "WARNING"):
+            self.assertEqual(self.login("user9@example.com").status_code, 429)
+        # Another client address has its own bucket.
+        other = self.login("user9@example.com", HTTP_X_FORWARDED_FOR="203.0.113.9")
+        self.assertEqual(other.status_code, 401)
+
+    def test_client_ip_from_forwarded_for(self):
+        factory = RequestFactory()
+        spoofed = factory.get(
+            "/", HTTP_X_FORWARDED_FOR="198.51.100.1, 203.0.113.9", REMOTE_ADDR="10.0.0.2"
+        )
+        self.assertEqual(client_ip(spoofed), "203.0.113.9")
+        with self.settings(RATE_LIMIT_PROXY_COUNT=2):
+            self.assertEqual(client_ip(spoofed), "198.51.100.1")
+        with self.settings(RATE_LIMIT_PROXY_COUNT=0):
+            self.assertEqual(client_ip(spoofed), "10.0.0.2")
+        self.assertEqual(client_ip(factory.get("/", REMOTE_ADDR="10.0.0.2")), "10.0.0.2")
+
+    def test_spoofed_forwarded_for_does_not_reset_the_bucket(self):
+        for index in range(3):
+            self.login(
+                f"user{index}@example.com",
+                HTTP_X_FORWARDED_FOR=f"198.51.100.{index}, 203.0.113.9",
+            )
+        with self.assertLogs("GoGreen.rate_limit", "WARNING"):
+            response = self.login(
+                "user9@example.com", HTTP_X_FORWARDED_FOR="198.51.100.99, 203.0.113.9"
+            )
+        self.assertEqual(response.status_code, 429)
@@ -8,7 +8,9 @@ urlpatterns = [
     path('verify-otp/', views.verify_otp, name='verify_otp'),
     path('resend-otp/', views.resend_otp, name='resend_otp'),
     path('login/', views.login_user, name='login_user'),
+    path('token/refresh/', views.refresh_token, name='refresh_token'),
     path('profile/', views.profile_user, name='profile_user'),
     path('support/', views.support_request, name='support_request'),
     path('reviews/', views.reviews, name='reviews'),
+    path('user-cache/stats/', views.user_cache_stats, name='user_cache_stats'),
 ]
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from GoGreen.image_urls import stored_image_url
+
+from .models import User
+
+CachedUser = namedtuple("CachedUser", ["id", "email", "is_verified", "full_name", "avatar_url"])
+
+_CACHED_FIELDS = ("id", "email", "is_verified", "full_name", "avatar", "image_urls")
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def _to_record(user):
+    return CachedUser(
+        user.pk,
+        user.email,
+        user.is_verified,
+        user.full_name,
+        stored_image_url(user, "avatar"),
+    )
+
+
+class VerifiedUserCache:
+    """
+    Process-wide TTL + LRU cache of compact user records, keyed by email.
+
+    ``post_save``/``post_delete`` on ``User`` (see ``Users/signals.py``) drop
+    the entry in the process that made the write; other worker processes
+    notice within ``ttl_seconds``, so keep that short. Unknown emails are not
+    cached, so a new registration is always read from the database.
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._emails_by_id = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _get(self, email):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(email)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(email)
+            self.misses += 1
+        return None
+
+    def _put(self, record):
+        email = normalize_email(record.email)
+        with self._lock:
+            self._entries[email] = (time.monotonic() + self.ttl_seconds, record)
+            self._entries.move_to_end(email)
+            self._emails_by_id[record.id] = email
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, email):
+        entry = self._entries.pop(email, None)
+        if entry is not None and self._emails_by_id.get(entry[1].id) == email:
+            del self._emails_by_id[entry[1].id]
+
+    def get_by_email(self, email):
+        """``CachedUser`` for the email (verified or not), or ``None`` if there is no such user."""
+        email = normalize_email(email)
+        if not email:
+            return None
+        record = self._get(email)
+        if record is None:
+            user = User.objects.filter(email=email).only(*_CACHED_FIELDS).first()
+            if user is None:
+                return None
+            record = _to_record(user)
+            self._put(record)
+        return record
+
+    def get_by_id(self, user_id):
+        with self._lock:
+            email = self._emails_by_id.get(user_id)
+        record = self._get(email)
+        if record is None:
+            user = User.objects.filter(pk=user_id).only(*_CACHED_FIELDS).first()
+            if user is None:
+                return None
+            record = _to_record(user)
+            self._put(record)
+        return record
+
+    def get_verified(self, email):
+        """Shortcut for the common check: the record if the user exists and is verified."""
+        record = self.get_by_email(email)
+        return record if record is not None and record.is_verified else None
+
+    def invalidate(self, user):
+        """Forget ``user`` under its current and previously cached email."""
+        with self._lock:
+            for email in {normalize_email(user.email), self._emails_by_id.get(user.pk)}:
+                if email and email in self._entries:
+                    self._drop(email)
+                    self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._emails_by_id.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+
+verified_user_cache = VerifiedUserCache(
+    max_entries=settings.VERIFIED_USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.VERIFIED_USER_CACHE_TTL,
+)
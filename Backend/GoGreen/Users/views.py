@@ -1,59 +1,60 @@
 import json
 import logging
-import random
 from email.utils import parseaddr
-from threading import Thread
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg, Count, Q
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.db.models import Avg, Count, Max, Q
 from django.db.utils import OperationalError, ProgrammingError
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
-from .models import User, UserReview
+from GoGreen.auth_tokens import (
+    InvalidToken,
+    issue_tokens,
+    read_refresh_token,
+    refresh_matches_user,
+    request_claims,
+)
+from GoGreen.image_processing import ImageProcessingError, identify_image
+from GoGreen.image_urls import stored_image_url
+from GoGreen.rate_limit import rate_limit
+from GoGreen.conditional import conditional_view
+from GoGreen.response_cache import get_or_refresh, is_shared, namespace_version
+
+from .image_queue import queue_image
+from .models import User, UserReview, validate_avatar_size
+from .otp import OTP_EXPIRED, OTP_LOCKED, OTP_VALID, check_otp, issue_otp
+from .outbox import enqueue_email
+from .user_cache import verified_user_cache
 
 logger = logging.getLogger(__name__)
 
 
 def _serialize_user(user):
-    avatar_url = None
-    if user.avatar:
-        try:
-            avatar_url = user.avatar.url
-        except Exception:
-            avatar_url = str(user.avatar)
-
     return {
         "id": user.id,
         "full_name": user.full_name,
         "email": user.email,
         "phone": user.phone,
-        "avatar": avatar_url,
+        "avatar": stored_image_url(user, "avatar"),
+        "avatar_thumbnail_url": stored_image_url(user, "avatar", "thumbnail"),
         "is_verified": user.is_verified,
     }
 
 
-def _send_otp_email(email, otp):
-    send_mail(
+def _queue_otp_email(email, otp):
+    minutes = max(1, settings.OTP_TTL_SECONDS // 60)
+    # Deleted from the outbox once sent, or unsent once the code has expired.
+    enqueue_email(
         "Your OTP Code",
-        f"Your OTP is {otp}",
-        settings.DEFAULT_FROM_EMAIL,
+        f"Your OTP is {otp}. It expires in {minutes} minutes.",
         [email],
-        fail_silently=False,
+        expires_in=settings.OTP_TTL_SECONDS,
     )
 
 
-def _send_otp_email_async(email, otp):
-    def _runner():
-        try:
-            _send_otp_email(email, otp)
-        except Exception:
-            logger.exception("Failed to send OTP email for %s", email)
-
-    Thread(target=_runner, daemon=True).start()
-
-
 def _parse_json_body(request):
     try:
         return json.loads(request.body or "{}")
@@ -63,14 +64,12 @@ def _parse_json_body(request):
 
 def _serialize_review(review):
     avatar_url = None
+    avatar_thumbnail_url = None
     user_id = None
     if review.user:
         user_id = review.user.id
-        if review.user.avatar:
-            try:
-                avatar_url = review.user.avatar.url
-            except Exception:
-                avatar_url = str(review.user.avatar)
+        avatar_url = stored_image_url(review.user, "avatar")
+        avatar_thumbnail_url = stored_image_url(review.user, "avatar", "thumbnail")
 
     return {
         "id": review.id,
@@ -78,6 +77,7 @@ def _serialize_review(review):
         "full_name": review.full_name or (review.user.full_name if review.user else "Anonymous"),
         "email": review.email,
         "avatar": avatar_url,
+        "avatar_thumbnail_url": avatar_thumbnail_url,
         "rating": review.rating,
         "review_text": review.review_text or "",
         "is_public": review.is_public,
@@ -103,7 +103,28 @@ def _normalized_whatsapp_number():
     return digits
 
 
+def _authentication_required():
+    return JsonResponse({"error": "Authentication required"}, status=401)
+
+
+def _verified_accounts(email):
+    return User.objects.filter(email=email, is_verified=True)
+
+
+def _avatar_error(avatar):
+    """Cheap checks done in the request; resizing and upload happen in ``process_images``."""
+    try:
+        validate_avatar_size(avatar)
+        identify_image(avatar)
+    except ValidationError as exc:
+        return exc.messages[0]
+    except ImageProcessingError:
+        return "Avatar must be a JPEG, PNG, WebP or GIF image."
+    return None
+
+
 @csrf_exempt
+@rate_limit("register")
 def register(request):
     if request.method != "POST":
         return JsonResponse({"error": "Invalid request"}, status=400)
@@ -117,19 +138,21 @@ def register(request):
     if not all([full_name, email, phone, password]):
         return JsonResponse({"error": "Missing required fields"}, status=400)
 
-    if User.objects.filter(email=email, is_verified=True).exists():
+    if avatar is not None:
+        avatar_error = _avatar_error(avatar)
+        if avatar_error:
+            return JsonResponse({"error": avatar_error}, status=400)
+
+    # Authoritative read: a cached record may predate verification in another worker.
+    if _verified_accounts(email).exists():
         return JsonResponse({"error": "Email already exists"}, status=400)
 
-    otp = str(random.randint(100000, 999999))
     user = User.objects.filter(email=email, is_verified=False).first()
 
     if user:
         user.full_name = full_name
         user.phone = phone
         user.set_password(password)
-        user.otp = otp
-        if avatar is not None:
-            user.avatar = avatar
         user.save()
     else:
         user = User.objects.create_user(
@@ -137,13 +160,13 @@ def register(request):
             password=password,
             full_name=full_name,
             phone=phone,
-            avatar=avatar,
-            otp=otp,
             is_verified=False,
         )
+    if avatar is not None:
+        queue_image(user, "avatar", avatar)
 
-    # Keep registration fast by sending email in background.
-    _send_otp_email_async(email, otp)
+    # Keep registration fast: the outbox worker sends the email.
+    _queue_otp_email(email, issue_otp(email))
 
     return JsonResponse(
         {"message": "Registration successful. OTP sent to email.", "email": email},
@@ -152,6 +175,7 @@ def register(request):
 
 
 @csrf_exempt
+@rate_limit("verify_otp")
 def verify_otp(request):
     if request.method != "POST":
         return JsonResponse({"error": "Invalid request"}, status=400)
@@ -175,19 +199,31 @@ def verify_otp(request):
             {"message": "Email already verified", "user": _serialize_user(user)}
         )
 
-    if user.otp != otp:
+    outcome = check_otp(email, otp)
+    if outcome == OTP_EXPIRED:
+        return JsonResponse({"error": "OTP has expired. Please request a new one."}, status=400)
+    if outcome == OTP_LOCKED:
+        return JsonResponse(
+            {"error": "Too many incorrect attempts. Please request a new OTP."},
+            status=429,
+        )
+    if outcome != OTP_VALID:
         return JsonResponse({"error": "Invalid OTP"}, status=400)
 
     user.is_verified = True
-    user.otp = None
-    user.save(update_fields=["is_verified", "otp"])
+    user.save(update_fields=["is_verified"])
 
     return JsonResponse(
-        {"message": "Email verified successfully", "user": _serialize_user(user)}
+        {
+            "message": "Email verified successfully",
+            "user": _serialize_user(user),
+            **issue_tokens(user),
+        }
     )
 
 
 @csrf_exempt
+@rate_limit("resend_otp")
 def resend_otp(request):
     if request.method != "POST":
         return JsonResponse({"error": "Invalid request"}, status=400)
@@ -200,22 +236,20 @@ def resend_otp(request):
     if not email:
         return JsonResponse({"error": "Email is required"}, status=400)
 
-    user = User.objects.filter(email=email).first()
+    user = verified_user_cache.get_by_email(email)
     if not user:
         return JsonResponse({"error": "User not found"}, status=404)
 
     if user.is_verified:
         return JsonResponse({"error": "Email is already verified"}, status=400)
 
-    otp = str(random.randint(100000, 999999))
-    user.otp = otp
-    user.save(update_fields=["otp"])
-    _send_otp_email_async(email, otp)
+    _queue_otp_email(email, issue_otp(email))
 
     return JsonResponse({"message": "OTP resent successfully"})
 
 
 @csrf_exempt
+@rate_limit("login")
 def login_user(request):
     if request.method != "POST":
         return JsonResponse({"error": "Invalid request"}, status=400)
@@ -240,32 +274,47 @@ def login_user(request):
             status=403,
         )
 
-    return JsonResponse({"message": "Login successful", "user": _serialize_user(user)})
+    return JsonResponse(
+        {"message": "Login successful", "user": _serialize_user(user), **issue_tokens(user)}
+    )
+
+
+@csrf_exempt
+def refresh_token(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    data = _parse_json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    try:
+        claims = read_refresh_token((data.get("refresh_token") or "").strip())
+    except InvalidToken as exc:
+        return JsonResponse({"error": str(exc)}, status=401)
+
+    user = User.objects.filter(pk=claims["uid"]).first()
+    if not user or not refresh_matches_user(claims, user):
+        return JsonResponse({"error": "Invalid refresh token"}, status=401)
+
+    return JsonResponse(issue_tokens(user))
 
 
 @csrf_exempt
 def profile_user(request):
-    if request.method == "GET":
-        email = (request.GET.get("email") or "").strip().lower()
-        if not email:
-            return JsonResponse({"error": "Email is required"}, status=400)
+    claims = request_claims(request)
+    if claims is None:
+        return _authentication_required()
 
-        user = User.objects.filter(email=email).first()
+    if request.method == "GET":
+        user = User.objects.filter(pk=claims.user_id).first()
         if not user:
             return JsonResponse({"error": "User not found"}, status=404)
 
         return JsonResponse({"user": _serialize_user(user)})
 
     if request.method == "POST":
-        email = (request.POST.get("email") or "").strip().lower()
-        if not email:
-            payload = _parse_json_body(request) or {}
-            email = (payload.get("email") or "").strip().lower()
-
-        if not email:
-            return JsonResponse({"error": "Email is required"}, status=400)
-
-        user = User.objects.filter(email=email).first()
+        user = User.objects.filter(pk=claims.user_id).first()
         if not user:
             return JsonResponse({"error": "User not found"}, status=404)
 
@@ -295,14 +344,21 @@ def profile_user(request):
             user.phone = phone
             updates.append("phone")
         if avatar is not None:
-            user.avatar = avatar
+            avatar_error = _avatar_error(avatar)
+            if avatar_error:
+                return JsonResponse({"error": avatar_error}, status=400)
             updates.append("avatar")
 
         if not updates:
             return JsonResponse({"error": "No profile fields provided"}, status=400)
 
         user.save()
-        return JsonResponse({"message": "Profile updated", "user": _serialize_user(user)})
+        response = {"message": "Profile updated", "user": _serialize_user(user)}
+        if avatar is not None:
+            # The stored avatar changes once process_images has run.
+            queue_image(user, "avatar", avatar)
+            response["avatar_pending"] = True
+        return JsonResponse(response)
 
     return JsonResponse({"error": "Invalid request"}, status=400)
 
@@ -359,16 +415,10 @@ def support_request(request):
         )
 
         try:
-            send_mail(
-                subject=f"[GoGreen Support] {subject}",
-                message=email_body,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[recipient],
-                fail_silently=False,
-            )
-        except Exception:
-            logger.exception("Failed to send support email for %s", email)
-            return JsonResponse({"error": "Unable to send support request"}, status=502)
+            enqueue_email(f"[GoGreen Support] {subject}", email_body, [recipient])
+        except (OperationalError, ProgrammingError):
+            logger.exception("Failed to queue support email for %s", email)
+            return JsonResponse({"error": "Unable to send support request"}, status=503)
 
         return JsonResponse(
             {"message": "Support request sent. Our team will contact you shortly."}
@@ -377,50 +427,91 @@ def support_request(request):
     return JsonResponse({"error": "Invalid request"}, status=400)
 
 
+def _public_reviews():
+    return UserReview.objects.filter(is_public=True).select_related("user").order_by("-updated_at")
+
+
+def _public_reviews_payload():
+    queryset = _public_reviews()
+    summary_raw = queryset.aggregate(
+        avg=Avg("rating"),
+        total=Count("id"),
+        r1=Count("id", filter=Q(rating=1)),
+        r2=Count("id", filter=Q(rating=2)),
+        r3=Count("id", filter=Q(rating=3)),
+        r4=Count("id", filter=Q(rating=4)),
+        r5=Count("id", filter=Q(rating=5)),
+    )
+    return {
+        "summary": {
+            "average_rating": round(summary_raw["avg"] or 0, 2),
+            "total_reviews": summary_raw["total"] or 0,
+            "rating_breakdown": {
+                "1": summary_raw["r1"] or 0,
+                "2": summary_raw["r2"] or 0,
+                "3": summary_raw["r3"] or 0,
+                "4": summary_raw["r4"] or 0,
+                "5": summary_raw["r5"] or 0,
+            },
+        },
+        "reviews": [_serialize_review(review) for review in queryset],
+    }
+
+
+def _public_reviews_seed(request):
+    """
+    Version of the public review list derived from the rows, so every worker
+    agrees on it. Reviewer name/avatar changes only bump the ``reviews`` cache
+    namespace, which is added when that stamp is shared between workers.
+    """
+    if not hasattr(request, "_reviews_seed"):
+        state = _public_reviews().order_by().aggregate(
+            latest=Max("updated_at"), total=Count("id")
+        )
+        latest = state["latest"].isoformat() if state["latest"] else ""
+        seed = f"{latest}:{state['total']}"
+        if is_shared():
+            seed = f"{seed}:{namespace_version('reviews')}"
+        request._reviews_seed = seed
+    return request._reviews_seed
+
+
+def _reviews_validator(request):
+    claims = request_claims(request)
+    user_id = claims.user_id if claims else None
+    own_updated_at = None
+    if user_id:
+        own_updated_at = (
+            UserReview.objects.filter(user_id=user_id)
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+    return f"{_public_reviews_seed(request)}:{user_id}:{own_updated_at}", None
+
+
 @csrf_exempt
+@conditional_view(_reviews_validator)
 def reviews(request):
     if request.method == "GET":
         try:
-            user_email = (request.GET.get("email") or "").strip().lower()
-
-            queryset = (
-                UserReview.objects.filter(is_public=True)
-                .select_related("user")
-                .order_by("-updated_at")
-            )
-            summary_raw = queryset.aggregate(
-                avg=Avg("rating"),
-                total=Count("id"),
-                r1=Count("id", filter=Q(rating=1)),
-                r2=Count("id", filter=Q(rating=2)),
-                r3=Count("id", filter=Q(rating=3)),
-                r4=Count("id", filter=Q(rating=4)),
-                r5=Count("id", filter=Q(rating=5)),
+            claims = request_claims(request)
+
+            # Keyed by the seed too, so a worker never pairs a new ETag with an
+            # old cached list.
+            payload = dict(
+                get_or_refresh(
+                    "reviews", _public_reviews_payload, variant=_public_reviews_seed(request)
+                )
             )
 
             current_user_review = None
-            if user_email:
-                review = UserReview.objects.filter(email=user_email).first()
+            if claims:
+                review = UserReview.objects.filter(user_id=claims.user_id).first()
                 if review:
                     current_user_review = _serialize_review(review)
+            payload["current_user_review"] = current_user_review
 
-            return JsonResponse(
-                {
-                    "summary": {
-                        "average_rating": round(summary_raw["avg"] or 0, 2),
-                        "total_reviews": summary_raw["total"] or 0,
-                        "rating_breakdown": {
-                            "1": summary_raw["r1"] or 0,
-                            "2": summary_raw["r2"] or 0,
-                            "3": summary_raw["r3"] or 0,
-                            "4": summary_raw["r4"] or 0,
-                            "5": summary_raw["r5"] or 0,
-                        },
-                    },
-                    "reviews": [_serialize_review(review) for review in queryset],
-                    "current_user_review": current_user_review,
-                }
-            )
+            return JsonResponse(payload)
         except (OperationalError, ProgrammingError):
             logger.exception("Reviews table/query not ready")
             return JsonResponse(
@@ -439,13 +530,14 @@ def reviews(request):
             if data is None:
                 return JsonResponse({"error": "Invalid JSON body"}, status=400)
 
-            email = (data.get("email") or "").strip().lower()
+            claims = request_claims(request)
+            if claims is None:
+                return _authentication_required()
+
             full_name = (data.get("full_name") or "").strip()
             review_text = (data.get("review_text") or "").strip()
             rating = data.get("rating")
 
-            if not email:
-                return JsonResponse({"error": "Email is required"}, status=400)
             if rating is None:
                 return JsonResponse({"error": "Rating is required"}, status=400)
 
@@ -457,14 +549,14 @@ def reviews(request):
             if rating < 1 or rating > 5:
                 return JsonResponse({"error": "Rating must be between 1 and 5"}, status=400)
 
-            user = User.objects.filter(email=email, is_verified=True).first()
-            if not user:
+            user = verified_user_cache.get_by_id(claims.user_id)
+            if not user or not user.is_verified:
                 return JsonResponse({"error": "Verified user not found"}, status=404)
 
             review, created = UserReview.objects.update_or_create(
-                email=email,
+                email=user.email,
                 defaults={
-                    "user": user,
+                    "user_id": user.id,
                     "full_name": full_name or user.full_name,
                     "rating": rating,
                     "review_text": review_text,
@@ -493,3 +585,12 @@ def reviews(request):
             )
 
     return JsonResponse({"error": "Invalid request"}, status=400)
+
+
+@csrf_exempt
+@staff_member_required
+def user_cache_stats(request):
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    return JsonResponse({"verified_user_cache": verified_user_cache.stats()})
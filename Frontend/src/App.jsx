@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { Navigate, Route, Routes, useLocation } from "react-router-dom";
 
 import Navbar from "./components/users/common/Navbar.jsx";
@@ -14,6 +14,7 @@ import OrderTracking from "./components/pages/OrderTracking.jsx";
 import Certificate from "./components/pages/Certificate.jsx";
 import LandingPage from "./components/users/landingPage/LandingPage.jsx";
 import ImpactPage from "./components/users/landingPage/ImpactPage.jsx";
+import { SESSION_EXPIRED_EVENT, clearTokens } from "./config/auth";
 
 const AUTH_STORAGE_KEY = "gogreen_user";
 
@@ -48,8 +49,14 @@ function App() {
   const handleLogout = () => {
     setUser(null);
     localStorage.removeItem(AUTH_STORAGE_KEY);
+    clearTokens();
   };
 
+  useEffect(() => {
+    window.addEventListener(SESSION_EXPIRED_EVENT, handleLogout);
+    return () => window.removeEventListener(SESSION_EXPIRED_EVENT, handleLogout);
+  }, []);
+
   return (
     <>
       {!isCertificateRoute && (
@@ -2,6 +2,7 @@ import { useEffect, useMemo, useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
 import { Headset, Mail, MessageCircle, Send, Star } from "lucide-react";
 import { TREES_API_BASE, USERS_API_BASE } from "../../config/api";
+import { authFetch } from "../../config/auth";
 
 const DEFAULT_SUPPORT_CONTACT = {
   support_email: "support@greencampustracker.com",
@@ -80,6 +81,8 @@ export default function Dashboard({ user }) {
     unpaid_orders: 0,
   });
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
   const [message, setMessage] = useState("");
   const [expandedOrderId, setExpandedOrderId] = useState(null);
@@ -119,22 +122,18 @@ export default function Dashboard({ user }) {
   });
 
   const totals = useMemo(() => {
-    const totalTrees = orders.reduce(
-      (acc, order) => acc + (order.number_of_trees || 0),
-      0,
-    );
-    const totalSpent = orders
-      .filter((order) => order.payment_status === "paid")
-      .reduce((acc, order) => acc + (order.amount_paise || 0), 0);
+    const totalTrees = summary.total_trees || 0;
+    const totalSpent = summary.paid_amount_paise || 0;
     return {
       totalTrees,
       totalSpentInr: (totalSpent / 100).toFixed(2),
     };
-  }, [orders]);
+  }, [summary]);
 
   const fetchOrders = async () => {
     if (!user?.email) {
       setOrders([]);
+      setNextCursor(null);
       setSummary({
         total_orders: 0,
         completed_orders: 0,
@@ -149,14 +148,13 @@ export default function Dashboard({ user }) {
     setLoading(true);
     setError("");
     try {
-      const response = await fetch(
-        `${TREES_API_BASE}/orders/?email=${encodeURIComponent(user.email)}`,
-      );
+      const response = await authFetch(`${TREES_API_BASE}/orders/`);
       const data = await parseApiJson(response, "Unable to load orders");
       if (!response.ok) {
         throw new Error(data.error || "Unable to load orders");
       }
       setOrders(data.orders || []);
+      setNextCursor(data.pagination?.next_cursor || null);
       setSummary(
         data.summary || {
           total_orders: 0,
@@ -173,6 +171,33 @@ export default function Dashboard({ user }) {
     }
   };
 
+  const loadMoreOrders = async () => {
+    if (!user?.email || !nextCursor) {
+      return;
+    }
+
+    setLoadingMore(true);
+    setError("");
+    try {
+      const response = await authFetch(
+        `${TREES_API_BASE}/orders/?cursor=${encodeURIComponent(nextCursor)}`,
+      );
+      const data = await parseApiJson(response, "Unable to load orders");
+      if (!response.ok) {
+        throw new Error(data.error || "Unable to load orders");
+      }
+      setOrders((current) => [...current, ...(data.orders || [])]);
+      setNextCursor(data.pagination?.next_cursor || null);
+      if (data.summary) {
+        setSummary(data.summary);
+      }
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchOrders();
     // eslint-disable-next-line react-hooks/exhaustive-deps
@@ -203,10 +228,7 @@ export default function Dashboard({ user }) {
       setReviewError("");
       try {
         setCurrentUserReview(null);
-        const query = user?.email
-          ? `?email=${encodeURIComponent(user.email)}`
-          : "";
-        const response = await fetch(`${USERS_API_BASE}/reviews/${query}`);
+        const response = await authFetch(`${USERS_API_BASE}/reviews/`);
         const data = await parseApiJson(response, "Unable to load reviews");
 
         if (!response.ok) {
@@ -282,7 +304,6 @@ export default function Dashboard({ user }) {
     try {
       const payload = {
         ...editForm,
-        email: user.email,
         number_of_trees: Number(editForm.number_of_trees),
         latitude:
           editForm.latitude === "" || editForm.latitude === null
@@ -294,7 +315,7 @@ export default function Dashboard({ user }) {
             : Number(editForm.longitude),
       };
 
-      const response = await fetch(`${TREES_API_BASE}/orders/${orderId}/`, {
+      const response = await authFetch(`${TREES_API_BASE}/orders/${orderId}/`, {
         method: "PUT",
         headers: {
           "Content-Type": "application/json",
@@ -326,10 +347,9 @@ export default function Dashboard({ user }) {
     setMessage("");
 
     try {
-      const response = await fetch(
-        `${TREES_API_BASE}/orders/${orderId}/?email=${encodeURIComponent(user.email)}`,
-        { method: "DELETE" },
-      );
+      const response = await authFetch(`${TREES_API_BASE}/orders/${orderId}/`, {
+        method: "DELETE",
+      });
       const data = await parseApiJson(response, "Unable to delete order");
       if (!response.ok) {
         throw new Error(data.error || "Unable to delete order");
@@ -432,14 +452,13 @@ export default function Dashboard({ user }) {
 
     setReviewSubmitting(true);
     try {
-      const response = await fetch(`${USERS_API_BASE}/reviews/`, {
+      const response = await authFetch(`${USERS_API_BASE}/reviews/`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
         },
         body: JSON.stringify({
           full_name: user?.full_name || "",
-          email: user.email,
           rating: reviewForm.rating,
           review_text: reviewForm.review_text.trim(),
         }),
@@ -451,9 +470,7 @@ export default function Dashboard({ user }) {
 
       setReviewNotice(data.message || "Review submitted successfully.");
 
-      const fetchResponse = await fetch(
-        `${USERS_API_BASE}/reviews/?email=${encodeURIComponent(user.email)}`,
-      );
+      const fetchResponse = await authFetch(`${USERS_API_BASE}/reviews/`);
       const fetchData = await parseApiJson(fetchResponse, "Unable to refresh reviews");
       if (fetchResponse.ok) {
         setReviews(fetchData.reviews || []);
@@ -816,7 +833,10 @@ export default function Dashboard({ user }) {
                                         rel="noreferrer"
                                       >
                                         <img
-                                          src={approvalInfo.proof_image_1_url}
+                                          src={
+                                            approvalInfo.proof_image_1_thumbnail_url ||
+                                            approvalInfo.proof_image_1_url
+                                          }
                                           alt="Proof 1"
                                           className="w-20 h-20 rounded-lg object-cover border"
                                         />
@@ -829,7 +849,10 @@ export default function Dashboard({ user }) {
                                         rel="noreferrer"
                                       >
                                         <img
-                                          src={approvalInfo.proof_image_2_url}
+                                          src={
+                                            approvalInfo.proof_image_2_thumbnail_url ||
+                                            approvalInfo.proof_image_2_url
+                                          }
                                           alt="Proof 2"
                                           className="w-20 h-20 rounded-lg object-cover border"
                                         />
@@ -904,7 +927,9 @@ export default function Dashboard({ user }) {
                               name="number_of_trees"
                               value={editForm.number_of_trees}
                               onChange={handleEditChange}
-                              className="w-full p-2 rounded-lg border border-gray-300"
+                              readOnly
+                              title="The tree count is fixed once checkout has started"
+                              className="w-full p-2 rounded-lg border border-gray-300 bg-gray-100"
                             />
                             <input
                               type="text"
@@ -985,6 +1010,18 @@ export default function Dashboard({ user }) {
                   </div>
                 );
               })}
+              {nextCursor && (
+                <div className="flex justify-center">
+                  <button
+                    type="button"
+                    onClick={loadMoreOrders}
+                    disabled={loadingMore}
+                    className="px-4 py-2 rounded-xl border-2 border-emerald-700 text-emerald-800 font-semibold hover:bg-emerald-50 transition disabled:opacity-60"
+                  >
+                    {loadingMore ? "Loading..." : "Load more orders"}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { TREES_API_BASE } from "../../config/api";
 
@@ -25,8 +25,14 @@ const OBJECTIVE_OPTIONS = [
   "Other",
 ];
 
+const newIdempotencyKey = () =>
+  window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
 export default function DonateTrees({ user }) {
   const navigate = useNavigate();
+  // Re-submitting the same order (e.g. after a timeout) reuses its key, so the
+  // backend replays the first order instead of creating another one.
+  const orderAttemptRef = useRef({ payload: "", key: "" });
 
   const [config, setConfig] = useState({
     razorpay_key_id: "",
@@ -196,12 +202,18 @@ export default function DonateTrees({ user }) {
         notes: formData.notes,
       };
 
+      const orderBody = JSON.stringify(orderPayload);
+      if (orderAttemptRef.current.payload !== orderBody) {
+        orderAttemptRef.current = { payload: orderBody, key: newIdempotencyKey() };
+      }
+
       const orderRes = await fetch(`${TREES_API_BASE}/create-order/`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          "Idempotency-Key": orderAttemptRef.current.key,
         },
-        body: JSON.stringify(orderPayload),
+        body: orderBody,
       });
 
       const orderData = await orderRes.json();
@@ -239,6 +251,7 @@ export default function DonateTrees({ user }) {
               method: "POST",
               headers: {
                 "Content-Type": "application/json",
+                "Idempotency-Key": `verify-${paymentResult.razorpay_payment_id}`,
               },
               body: JSON.stringify(paymentResult),
             });
@@ -247,6 +260,7 @@ export default function DonateTrees({ user }) {
               throw new Error(verifyData.error || "Payment verification failed");
             }
 
+            orderAttemptRef.current = { payload: "", key: "" };
             setMessage(
               "Payment successful. Your donation is confirmed and admin has been notified.",
             );
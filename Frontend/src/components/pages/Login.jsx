@@ -1,6 +1,7 @@
 import { useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { USERS_API_BASE } from "../../config/api";
+import { saveTokens } from "../../config/auth";
 
 export default function Login({ onLogin }) {
   const navigate = useNavigate();
@@ -45,6 +46,7 @@ export default function Login({ onLogin }) {
         throw new Error(result.error || "Login failed");
       }
 
+      saveTokens(result);
       if (onLogin && result.user) {
         onLogin(result.user);
       }
@@ -1,6 +1,7 @@
 import { useState } from "react";
 import { useLocation, useNavigate } from "react-router-dom";
 import { USERS_API_BASE } from "../../config/api";
+import { saveTokens } from "../../config/auth";
 
 function VerifyOTP({ onLogin }) {
   const location = useLocation();
@@ -41,6 +42,13 @@ function VerifyOTP({ onLogin }) {
         throw new Error(data.error || "OTP verification failed");
       }
 
+      // An already verified email gets no tokens here; sign in with the password instead.
+      if (!data.access_token) {
+        navigate("/login");
+        return;
+      }
+
+      saveTokens(data);
       if (onLogin && data.user) {
         onLogin(data.user);
       }
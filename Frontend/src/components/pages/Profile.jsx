@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { USERS_API_BASE } from "../../config/api";
+import { authFetch } from "../../config/auth";
 
 const fallbackAvatar = (name) =>
   `https://ui-avatars.com/api/?name=${encodeURIComponent(
@@ -49,9 +50,7 @@ export default function Profile({ user, onProfileUpdated }) {
     setLoading(true);
     setError("");
     try {
-      const response = await fetch(
-        `${USERS_API_BASE}/profile/?email=${encodeURIComponent(user.email)}`,
-      );
+      const response = await authFetch(`${USERS_API_BASE}/profile/`);
       const result = await parseResponse(response);
       if (!response.ok) {
         throw new Error(result.error || "Unable to load profile");
@@ -108,14 +107,13 @@ export default function Profile({ user, onProfileUpdated }) {
 
     try {
       const payload = new FormData();
-      payload.append("email", formData.email);
       payload.append("full_name", formData.full_name);
       payload.append("phone", formData.phone);
       if (formData.avatar) {
         payload.append("avatar", formData.avatar);
       }
 
-      const response = await fetch(`${USERS_API_BASE}/profile/`, {
+      const response = await authFetch(`${USERS_API_BASE}/profile/`, {
         method: "POST",
         body: payload,
       });
@@ -132,7 +130,10 @@ export default function Profile({ user, onProfileUpdated }) {
           phone: result.user.phone || "",
           avatar: null,
         });
-        setAvatarPreview(result.user.avatar || fallbackAvatar(result.user.full_name));
+        // A new avatar is processed in the background; keep the local preview until then.
+        if (!result.avatar_pending) {
+          setAvatarPreview(result.user.avatar || fallbackAvatar(result.user.full_name));
+        }
         if (onProfileUpdated) {
           onProfileUpdated(result.user);
         }
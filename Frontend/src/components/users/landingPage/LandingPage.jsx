@@ -437,7 +437,7 @@ export default function LandingPage({ isAuthenticated }) {
                   <div className="flex items-start gap-3">
                     {review.avatar ? (
                       <img
-                        src={review.avatar}
+                        src={review.avatar_thumbnail_url || review.avatar}
                         alt={`${review.full_name || "User"} avatar`}
                         className="h-12 w-12 shrink-0 rounded-full object-cover ring-2 ring-emerald-100"
                       />
@@ -0,0 +1,84 @@
+import { USERS_API_BASE } from "./api";
+
+const TOKEN_STORAGE_KEY = "gogreen_tokens";
+
+// Dispatched on window when the session cannot be refreshed; App logs out on it.
+export const SESSION_EXPIRED_EVENT = "gogreen:session-expired";
+
+const loadTokens = () => {
+  try {
+    const raw = localStorage.getItem(TOKEN_STORAGE_KEY);
+    return raw ? JSON.parse(raw) : null;
+  } catch {
+    return null;
+  }
+};
+
+export const saveTokens = (result) => {
+  if (!result?.access_token) return;
+  localStorage.setItem(
+    TOKEN_STORAGE_KEY,
+    JSON.stringify({
+      access_token: result.access_token,
+      refresh_token: result.refresh_token,
+    }),
+  );
+};
+
+export const clearTokens = () => {
+  localStorage.removeItem(TOKEN_STORAGE_KEY);
+};
+
+// One refresh at a time, shared by every request that got a 401 meanwhile.
+let pendingRefresh = null;
+
+const refreshTokens = () => {
+  if (!pendingRefresh) {
+    pendingRefresh = (async () => {
+      const refreshToken = loadTokens()?.refresh_token;
+      if (!refreshToken) return false;
+      try {
+        const response = await fetch(`${USERS_API_BASE}/token/refresh/`, {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify({ refresh_token: refreshToken }),
+        });
+        if (!response.ok) {
+          clearTokens();
+          return false;
+        }
+        saveTokens(await response.json());
+        return true;
+      } catch {
+        return false;
+      }
+    })().finally(() => {
+      pendingRefresh = null;
+    });
+  }
+  return pendingRefresh;
+};
+
+const withAuthHeader = (options) => {
+  const headers = new Headers(options.headers || {});
+  const accessToken = loadTokens()?.access_token;
+  if (accessToken) {
+    headers.set("Authorization", `Bearer ${accessToken}`);
+  }
+  return { ...options, headers };
+};
+
+// fetch() with the stored access token; refreshes it once on a 401 and retries.
+export const authFetch = async (url, options = {}) => {
+  const response = await fetch(url, withAuthHeader(options));
+  if (response.status !== 401) {
+    return response;
+  }
+  if (!(await refreshTokens())) {
+    window.dispatchEvent(new Event(SESSION_EXPIRED_EVENT));
+    return response;
+  }
+  return fetch(url, withAuthHeader(options));
+};